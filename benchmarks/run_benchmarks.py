@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ログ処理とパイプラインのベンチマーク（ディスプレイ不要）
+
+Tkのウィジェットの代わりに最小限の代用ウィジェットを使い、次の項目を計測する。
+
+- sink:     LogHandler._gui_sink のスループット
+- drain:    1k/10k/100k件たまったキューの _check_log_queue + _append_log_to_widget
+- dispatch: window_id が 2/10/50 個ある場合のloguruの振り分けコスト
+            （LogRouter と、window_idごとにフィルター付きシンクを登録する方式の比較）
+- pipeline: process_data / process_data2 の所要時間（time.sleepによるシミュレーションを
+            CPU負荷またはI/O待ちの合成負荷に置き換える）
+
+結果はJSONで出力し、ベースラインがあれば比較する。
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --only sink,drain --quick
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+# プロジェクトルートをパスに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from loguru import logger
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BENCHMARKS = ("sink", "drain", "dispatch", "pipeline")
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+
+
+# ---- 代用ウィジェット ----
+
+
+class StandInRoot:
+    """after()の予約を記録するだけのルートウィンドウの代用"""
+
+    def __init__(self):
+        self.scheduled = 0
+
+    def after(self, ms, func=None):
+        self.scheduled += 1
+        return f"after#{self.scheduled}"
+
+    def after_cancel(self, after_id):
+        pass
+
+
+class StandInText:
+    """tk.Textの代用（insert/see/index/deleteを行のリストで再現）"""
+
+    def __init__(self):
+        self.lines = []
+
+    def insert(self, index, text):
+        self.lines.extend(text.splitlines())
+
+    def see(self, index):
+        pass
+
+    def index(self, index):
+        return f"{len(self.lines) + 1}.0"
+
+    def delete(self, first, last=None):
+        end = int(str(last).split(".")[0]) - 1 if last else len(self.lines)
+        del self.lines[:end]
+
+
+# ---- 計測の補助 ----
+
+
+def _result(value, unit, better, **extra):
+    return dict(value=round(value, 4), unit=unit, better=better, **extra)
+
+
+def _make_records(count, window_id="bench"):
+    from src.gui.log_record import LogRecord
+
+    now = datetime.datetime.now()
+    return [
+        LogRecord(now, 20, "INFO", window_id, f"ベンチマーク用のログメッセージ {i}", ("bench", i % 50))
+        for i in range(count)
+    ]
+
+
+# ---- 各ベンチマーク ----
+
+
+def bench_sink(quick):
+    """LogHandler._gui_sink のスループット（件/秒）"""
+    from src.gui.gui_tkinter import LogHandler
+
+    count = 20_000 if quick else 200_000
+    records = _make_records(count)
+    results = {}
+    for delivery in ("poll", "event"):
+        handler = LogHandler(window_id="bench", delivery=delivery, max_queue=count)
+        start = time.perf_counter()
+        for record in records:
+            handler._gui_sink(record)
+        elapsed = time.perf_counter() - start
+        results[f"sink.{delivery}"] = _result(count / elapsed, "msgs/s", "higher", messages=count)
+    return results
+
+
+def bench_drain(quick):
+    """キューにたまったN件を表示し終えるまでのコスト"""
+    from src.gui.gui_tkinter import LogHandler
+
+    sizes = (1_000, 10_000) if quick else (1_000, 10_000, 100_000)
+    results = {}
+    for size in sizes:
+        handler = LogHandler(window_id="bench", delivery="poll", max_queue=size)
+        for record in _make_records(size):
+            handler.log_queue.put(record)
+        widget, root = StandInText(), StandInRoot()
+        start = time.perf_counter()
+        while not handler.log_queue.empty():
+            handler._check_log_queue(widget, root)
+        elapsed = time.perf_counter() - start
+        results[f"drain.{size}"] = _result(
+            elapsed * 1000,
+            "ms",
+            "lower",
+            us_per_message=round(elapsed / size * 1e6, 3),
+            ticks=handler.drain_stats["ticks"],
+        )
+    return results
+
+
+def bench_dispatch(quick):
+    """loguruの振り分けコスト（1件あたりのµs）"""
+    from src.gui.log_router import LogRouter
+
+    count = 5_000 if quick else 50_000
+    results = {}
+    for windows in (2, 10, 50):
+        window_ids = [f"w{i}" for i in range(windows)]
+        received = [0]
+
+        def gui_sink(record):
+            received[0] += 1
+
+        # 現在の方式: シンクは1つでwindow_idの辞書引きで振り分け
+        router = LogRouter()
+        logger.remove()
+        router.install()
+        for window_id in window_ids:
+            router.register(window_id, gui_sink=gui_sink)
+        results[f"dispatch.router.{windows}"] = _measure_dispatch(window_ids, count)
+        router.uninstall()
+
+        # 比較用: window_idごとにフィルター付きシンクを登録する方式
+        logger.remove()
+        for window_id in window_ids:
+            logger.add(
+                lambda message: gui_sink(message.record),
+                level="DEBUG",
+                format="{message}",
+                filter=lambda record, w=window_id: record["extra"].get("window_id") == w,
+            )
+        results[f"dispatch.filtered.{windows}"] = _measure_dispatch(window_ids, count)
+        logger.remove()
+    return results
+
+
+def _measure_dispatch(window_ids, count):
+    bound = [logger.bind(window_id=window_id) for window_id in window_ids]
+    start = time.perf_counter()
+    for i in range(count):
+        bound[i % len(bound)].info("ベンチマーク用のログメッセージ")
+    elapsed = time.perf_counter() - start
+    return _result(elapsed / count * 1e6, "us/msg", "lower", messages=count)
+
+
+def _cpu_workload(scale):
+    def work(seconds):
+        # 元の待ち時間に比例した回数だけ計算する
+        total = 0
+        for i in range(int(seconds * scale * 1_000_000)):
+            total += i * i
+        return total
+
+    return work
+
+
+def _io_workload(scale):
+    def work(seconds):
+        time.sleep(seconds * scale)
+
+    return work
+
+
+def bench_pipeline(quick, workload="cpu", scale=None, repeat=None):
+    """process_data / process_data2 の所要時間（秒）"""
+    from src.logic import pipeline
+    from src.logic.metrics import span_recorder
+
+    repeat = repeat or (1 if quick else 3)
+    if scale is None:
+        scale = 0.05 if workload == "cpu" else 0.01
+    work = _cpu_workload(scale) if workload == "cpu" else _io_workload(scale)
+
+    logger.remove()
+    results = {}
+    previous = pipeline.set_workload(work)
+    metrics_enabled = span_recorder.enabled
+    span_recorder.disable()
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            # チェックポイントなどの出力先を一時フォルダにする
+            os.chdir(directory)
+            cases = (
+                ("pipeline.process_data", lambda: pipeline.process_data()),
+                ("pipeline.process_data2.serial", lambda: pipeline.process_data2(batch_mode="serial")),
+                ("pipeline.process_data2.thread", lambda: pipeline.process_data2(batch_mode="thread")),
+            )
+            for name, func in cases:
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    func()
+                    timings.append(time.perf_counter() - start)
+                results[name] = _result(
+                    min(timings),
+                    "s",
+                    "lower",
+                    runs=repeat,
+                    mean=round(sum(timings) / len(timings), 4),
+                    workload=workload,
+                    scale=scale,
+                )
+    finally:
+        os.chdir(cwd)
+        pipeline.set_workload(previous)
+        if metrics_enabled:
+            span_recorder.enable()
+    return results
+
+
+# ---- 比較・出力 ----
+
+
+def compare(results, baseline, threshold):
+    """ベースラインとの比較 {名前: {"baseline", "change", "regressed"}}"""
+    comparison = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("value"):
+            continue
+        change = (result["value"] - base["value"]) / base["value"]
+        worse = -change if result["better"] == "higher" else change
+        comparison[name] = {
+            "baseline": base["value"],
+            "change": round(change, 4),
+            "regressed": worse > threshold,
+        }
+    return comparison
+
+
+def print_table(results, comparison, stream):
+    for name, result in results.items():
+        line = f"{name:<36} {result['value']:>14,.3f} {result['unit']:<7}"
+        diff = comparison.get(name)
+        if diff is not None:
+            mark = "  << 悪化" if diff["regressed"] else ""
+            line += f" ({diff['change'] * 100:+.1f}% / ベースライン {diff['baseline']:,.3f}){mark}"
+        stream.write(line + "\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="ログ処理とパイプラインのベンチマーク")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="実行する項目（カンマ区切り）")
+    parser.add_argument("--quick", action="store_true", help="件数・回数を減らして短時間で実行")
+    parser.add_argument("--output", default=None, help="結果のJSONの出力先（省略時は標準出力）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="比較するベースラインのJSON")
+    parser.add_argument("--save-baseline", action="store_true", help="結果をベースラインとして保存")
+    parser.add_argument("--threshold", type=float, default=0.10, help="悪化とみなす変化率（既定: 0.10）")
+    parser.add_argument("--workload", choices=("cpu", "io"), default="cpu", help="パイプラインの合成負荷")
+    parser.add_argument("--scale", type=float, default=None, help="合成負荷の倍率（元の待ち時間に対する比）")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    selected = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        sys.stderr.write(f"不明なベンチマークです: {', '.join(unknown)}\n")
+        return 2
+
+    runners = {
+        "sink": lambda: bench_sink(args.quick),
+        "drain": lambda: bench_drain(args.quick),
+        "dispatch": lambda: bench_dispatch(args.quick),
+        "pipeline": lambda: bench_pipeline(args.quick, args.workload, args.scale),
+    }
+    results = {}
+    for name in selected:
+        sys.stderr.write(f"{name} を計測中...\n")
+        results.update(runners[name]())
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    comparison = compare(results, baseline, args.threshold)
+
+    document = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+        "comparison": comparison,
+    }
+    text = json.dumps(document, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    print_table(results, comparison, sys.stderr)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": document["meta"], "results": results}, f, ensure_ascii=False, indent=2)
+        sys.stderr.write(f"ベースラインを保存しました: {args.baseline}\n")
+
+    regressed = [name for name, diff in comparison.items() if diff["regressed"]]
+    if regressed:
+        sys.stderr.write(f"悪化した項目: {', '.join(regressed)}\n")
+        return EXIT_REGRESSION
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
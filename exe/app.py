@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
+import multiprocessing
 
 # PyInstallerでのパス解決を考慮
 if hasattr(sys, '_MEIPASS'):
@@ -17,7 +18,11 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 try:
+    # 起動時間の計測（他のモジュールより先に読み込む）
+    from src.gui.startup import startup_timer
+
     from src.gui.gui_tkinter import gui_run
+    startup_timer.mark("import")
 except ImportError as e:
     print(f"Import error: {e}")
     # フォールバック：相対パスで直接インポート
@@ -47,4 +52,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # exe化した環境でプロセスプール（パイプライン2のバッチ処理）を使うために必要
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GUIなしでパイプラインを実行するエントリーポイント（src.logic.cliを参照）"""
+import sys
+import os
+import multiprocessing
+
+# PyInstallerでのパス解決を考慮
+if hasattr(sys, '_MEIPASS'):
+    base_path = sys._MEIPASS
+else:
+    base_path = os.path.dirname(__file__)
+
+# プロジェクトルートをパスに追加
+project_root = os.path.abspath(os.path.join(base_path, ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.logic.cli import main
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
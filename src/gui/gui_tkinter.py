@@ -6,70 +6,132 @@ loguruログ統合対応のマルチウィンドウGUI
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import collections
 import os
 import queue
 import threading
+import time
 from loguru import logger
 
-from src.logic.pipeline import process_data, process_data2
+from src.gui.log_queue import BoundedLogQueue, CallSiteRateLimiter
+from src.gui.log_router import AsyncWindowFileWriter, DeferredFileWriter, log_router
+from src.gui.log_view import VirtualLogView
+from src.gui.progress_view import ProgressPanel
+from src.gui.ui_monitor import DiagnosticsWindow, UiMonitor
+from src.logic.engine import PipelineCancelled
+from src.logic.jobs import JobExecutor
+
+# パイプライン本体（src.logic.pipeline・folder_batchなど）は起動を速くするため、
+# 実行時（ジョブのスレッド内）または最初の描画後にバックグラウンドで読み込む
 
 
 class LogHandler:
     """ログをGUIに転送するためのハンドラー"""
 
-    def __init__(self, window_id="main"):
+    # ウィジェットに保持する最大行数（超えたら古い行を削除）
+    MAX_LINES = 1000
+    # 1回のチェックで処理するメッセージ数・時間の上限（UIフリーズ対策）
+    MAX_MESSAGES_PER_TICK = 500
+    MAX_DRAIN_SECONDS = 0.02
+    # eventモードで到着フラグを確認する間隔（ms）。フラグを見るだけなので軽い
+    EVENT_CHECK_MS = 15
+
+    def __init__(
+        self,
+        window_id="main",
+        batch_drain=True,
+        delivery="poll",
+        max_queue=5000,
+        overflow_policy="drop_oldest",
+        debug_rate_limit=20,
+    ):
         self.window_id = window_id
-        self.log_queue = queue.Queue()
+        # 上限付きキュー（溢れた場合はoverflow_policyに従って破棄・集約）
+        self.log_queue = BoundedLogQueue(maxsize=max_queue, policy=overflow_policy)
+        # 同じ呼び出し箇所からのDEBUGログは1秒あたりdebug_rate_limit件まで
+        self.rate_limiter = (
+            CallSiteRateLimiter(max_per_second=debug_rate_limit)
+            if debug_rate_limit
+            else None
+        )
         self.gui_widgets = []  # ログを表示するテキストウィジェットのリスト
         self.is_setup = False
         self.logger_id = None
-
-    def setup_logger(self):
-        """loguruの設定とGUI用シンクの追加"""
+        self.file_writer = None
+        self.batch_drain = batch_drain  # Falseの場合は1件ずつ挿入する従来の動作
+        # "poll": 100ms間隔でキューを確認 / "event": ログ到着時のみキューを処理
+        # （eventモードでもシンクからTkは呼ばず、到着フラグをTkスレッドが確認する）
+        if delivery not in ("poll", "event"):
+            raise ValueError(f"不明なdeliveryモードです: {delivery}")
+        self.delivery = delivery
+        self._wakeup_lock = threading.Lock()
+        self._wakeup_pending = False
+        self._wakeup_requested_at = 0.0
+        # ドレイン統計（tickごとの処理件数）
+        self.drain_stats = {
+            "ticks": 0,
+            "messages": 0,
+            "last_tick_messages": 0,
+            "max_tick_messages": 0,
+            "budget_exhausted": 0,
+            "wakeups": 0,
+            "last_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+        }
+
+    def setup_logger(self, defer_file=False):
+        """loguruの設定とGUI用シンクの追加
+
+        defer_file=Trueの場合、ファイル出力はstart_file_output()までメモリにためる。
+        """
         if self.is_setup:
             return
 
-        # GUI用のカスタムシンク（ウィンドウIDごとに異なるシンクを追加）
-        self.logger_id = logger.add(
-            self._gui_sink,
-            level="DEBUG",
-            format="{time:HH:mm:ss} | <level>{level: <8}</level> | {message}",
-            colorize=False,
-            catch=True,
-            filter=lambda record: record.get("extra", {}).get("window_id", "main") == self.window_id
-        )
+        def create_file_writer():
+            return AsyncWindowFileWriter(
+                self.window_id, log_dir="logs", retention_days=30, compression="zip"
+            )
 
-        # ファイル出力も追加（ウィンドウIDごとに異なるファイルに出力）
-        log_dir = "logs"
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-
-        logger.add(
-            os.path.join(log_dir, f"app_{self.window_id}_{{time:YYYY-MM-DD}}.log"),
-            level="INFO",
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-            rotation="1 day",
-            retention="30 days",
-            compression="zip",
-            encoding="utf-8",
-            filter=lambda record: record.get("extra", {}).get("window_id", "main") == self.window_id
-        )
+        if defer_file:
+            file_writer = DeferredFileWriter(create_file_writer)
+        else:
+            file_writer = create_file_writer()
+        self.file_writer = file_writer
+
+        # GUI用シンクとファイル出力を中央ルーターに登録（ウィンドウIDで振り分け）
+        self.logger_id = log_router.install()
+        log_router.register(self.window_id, gui_sink=self._gui_sink, file_writer=file_writer)
 
         self.is_setup = True
         logger.info("ログシステムが初期化されました")
 
-    def _gui_sink(self, message):
-        """GUI用のログシンク"""
-        try:
-            # ANSIエスケープシーケンスを削除
-            import re
+    def start_file_output(self):
+        """遅延していたファイル出力を開始"""
+        if isinstance(self.file_writer, DeferredFileWriter):
+            self.file_writer.start()
 
-            clean_message = re.sub(
-                r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])", "", str(message)
-            )
+    def teardown_logger(self):
+        """ルーターからこのウィンドウの出力先を登録解除"""
+        if not self.is_setup:
+            return
+        log_router.unregister(self.window_id)
+        self.is_setup = False
+
+    def _gui_sink(self, record):
+        """GUI用のログシンク（LogRecordを受け取り、整形は表示時に行う）"""
+        try:
+            if self.rate_limiter is not None and not self.rate_limiter.allow(
+                record.site, record.level_no
+            ):
+                # 抑制件数の通知を表示するためにウェイクアップだけ依頼
+                if self.delivery == "event":
+                    self._request_wakeup()
+                return
 
             # キューに追加（メインスレッドで処理するため）
-            self.log_queue.put(clean_message)
+            self.log_queue.put(record)
+            if self.delivery == "event":
+                self._request_wakeup()
         except Exception as e:
             print(f"GUI log sink error: {e}")
 
@@ -77,7 +139,7 @@ class LogHandler:
         """ログを表示するテキストウィジェットを登録"""
         self.gui_widgets.append((text_widget, root_widget))
 
-        # 定期的にキューをチェックしてログを表示
+        # 定期的にキューをチェックしてログを表示（eventモードでは到着時のみ）
         self._check_log_queue(text_widget, root_widget)
 
     def unregister_widget(self, text_widget):
@@ -88,36 +150,127 @@ class LogHandler:
 
     def _check_log_queue(self, text_widget, root_widget):
         """ログキューをチェックして新しいログを表示"""
+        if self.delivery == "event" and not self._wakeup_pending:
+            # 新しいログが届いていなければキューに触れずに再予約するだけ
+            self._schedule_check(text_widget, root_widget, self.EVENT_CHECK_MS)
+            return
+
+        self._report_rate_limited()
         try:
-            while True:
-                try:
-                    log_message = self.log_queue.get_nowait()
-                    self._append_log_to_widget(text_widget, log_message)
-                except queue.Empty:
-                    break
+            if self.batch_drain:
+                has_more = self._drain_batch(text_widget)
+            else:
+                has_more = False
+                while True:
+                    try:
+                        record = self.log_queue.get_nowait()
+                        self._append_log_to_widget(text_widget, [record])
+                    except queue.Empty:
+                        break
         except tk.TclError:
             # ウィジェットが削除されている場合
             self.unregister_widget(text_widget)
             return
 
-        # 100ms後に再チェック
+        if self.delivery == "event":
+            self._finish_wakeup(has_more)
+            delay = 1 if has_more else self.EVENT_CHECK_MS
+        else:
+            # 予算を使い切った場合はすぐに続きを処理、それ以外は100ms後に再チェック
+            delay = 1 if has_more else 100
+        self._schedule_check(text_widget, root_widget, delay)
+
+    def _schedule_check(self, text_widget, root_widget, delay_ms):
         try:
             root_widget.after(
-                100, lambda: self._check_log_queue(text_widget, root_widget)
+                delay_ms, lambda: self._check_log_queue(text_widget, root_widget)
             )
         except tk.TclError:
             pass
 
-    def _append_log_to_widget(self, text_widget, message):
-        """テキストウィジェットにログメッセージを追加"""
+    def _request_wakeup(self):
+        """Tkスレッドにキュー処理を依頼（保留中のウェイクアップは1つだけ）
+
+        loguruのシンクから（ロガーのロックを持ったまま）任意のスレッドで呼ばれるので、
+        Tkは呼ばずにフラグを立てるだけにする。Tkを呼ぶとメインスレッドの応答待ちになり、
+        メインスレッドがログを出そうとした時点でデッドロックする。
+        """
+        with self._wakeup_lock:
+            if self._wakeup_pending:
+                return
+            self._wakeup_pending = True
+            self._wakeup_requested_at = time.perf_counter()
+            self.drain_stats["wakeups"] += 1
+
+    def _finish_wakeup(self, has_more):
+        """eventモードのドレイン後処理（遅延の記録）"""
+        with self._wakeup_lock:
+            if self._wakeup_pending:
+                latency_ms = (time.perf_counter() - self._wakeup_requested_at) * 1000
+                stats = self.drain_stats
+                stats["last_latency_ms"] = latency_ms
+                stats["max_latency_ms"] = max(stats["max_latency_ms"], latency_ms)
+            # 予算超過で残っている場合はウェイクアップを保留扱いのまま続きを処理
+            self._wakeup_pending = has_more
+
+    def _report_rate_limited(self):
+        """レート制限で抑制したDEBUGログの件数をキューに通知"""
+        if self.rate_limiter is None:
+            return
+        suppressed = self.rate_limiter.take_suppressed()
+        if suppressed:
+            self.log_queue.put_notice(
+                f"ループ内のDEBUGログ {suppressed} 件をレート制限で抑制しました"
+            )
+
+    def _drain_batch(self, text_widget):
+        """保留中のログをまとめて1回の挿入で表示（予算超過時はTrueを返す）"""
+        records = []
+        deadline = time.perf_counter() + self.MAX_DRAIN_SECONDS
+        has_more = False
+        while True:
+            if len(records) >= self.MAX_MESSAGES_PER_TICK or (
+                time.perf_counter() >= deadline
+            ):
+                has_more = not self.log_queue.empty()
+                break
+            try:
+                records.append(self.log_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        count = len(records)
+        stats = self.drain_stats
+        stats["ticks"] += 1
+        stats["messages"] += count
+        stats["last_tick_messages"] = count
+        stats["max_tick_messages"] = max(stats["max_tick_messages"], count)
+        if has_more:
+            stats["budget_exhausted"] += 1
+
+        if records:
+            self._append_log_to_widget(text_widget, records)
+        return has_more
+
+    def _append_log_to_widget(self, text_widget, records):
+        """テキストウィジェットにログレコードを追加"""
         try:
+            if isinstance(text_widget, VirtualLogView):
+                # レコードのまま保持し、表示範囲の行だけビュー側で整形する
+                if not text_widget.winfo_exists():
+                    raise tk.TclError("log view destroyed")
+                text_widget.append_records(records)
+                return
+
+            message = "".join(record.format() + "\n" for record in records)
             text_widget.insert(tk.END, message)
             text_widget.see(tk.END)
 
-            # 行数制限（パフォーマンス対策）
+            # 行数制限（パフォーマンス対策）: 上限を超えたら新しい半分だけ残す
             lines = int(text_widget.index("end-1c").split(".")[0])
-            if lines > 1000:
-                text_widget.delete("1.0", "500.0")
+            if lines > self.MAX_LINES:
+                keep = self.MAX_LINES // 2
+                text_widget.delete("1.0", f"{lines - keep}.0")
         except tk.TclError:
             # ウィジェットが削除されている場合
             self.unregister_widget(text_widget)
@@ -129,6 +282,34 @@ log_handler = LogHandler(window_id="main")
 # Window2用のログハンドラー
 log_handler_window2 = LogHandler(window_id="window2")
 
+# パイプライン実行用のジョブ管理（同じパイプラインは同時に1つまで、残りは待機列へ）
+job_executor = JobExecutor(
+    max_workers=4,
+    limits={"pipeline1": 1, "pipeline2": 1, "folder_batch": 1, "folder_watch": 1},
+)
+
+
+# 起動時に準備する常駐ワーカープロセス（gui_runで作成、PIPELINE_WORKERS=0で無効）
+worker_pool = None
+
+
+def run_with_profile(enabled, name, bound_logger, func):
+    """enabledならcProfile・tracemallocで計測しながらfuncを実行し、要約をログに出力"""
+    if not enabled:
+        return func()
+
+    from src.logic.profiling import RunProfiler
+
+    bound_logger.info("プロファイルを取得しながら実行します（通常より遅くなります）")
+    profiler = RunProfiler(name)
+    try:
+        with profiler:
+            return func()
+    finally:
+        if profiler.stats is not None:
+            for line in profiler.summary_lines():
+                bound_logger.info(line)
+
 
 class Window1:
     """高度なファイル操作を提供するクラス"""
@@ -193,7 +374,7 @@ class Window2:
     def _setup_window(self):
         """ウィンドウの設定"""
         self.window.title("パイプライン2 実行画面")
-        self.window.geometry("600x500")
+        self.window.geometry("600x560")
 
         # 親ウィンドウがある場合は中央に配置
         if self.parent:
@@ -215,7 +396,7 @@ class Window2:
             parent_height = self.parent.winfo_height()
 
             window_width = 600
-            window_height = 500
+            window_height = 560
 
             x = parent_x + (parent_width // 2) - (window_width // 2)
             y = parent_y + (parent_height // 2) - (window_height // 2)
@@ -275,24 +456,26 @@ class Window2:
         text_frame.columnconfigure(0, weight=1)
         text_frame.rowconfigure(0, weight=1)
 
-        self.log_text = tk.Text(
-            text_frame, height=10, wrap=tk.WORD, font=("Consolas", 9)
-        )
+        # リングバッファで履歴を保持する仮想化ログビュー（スクロールバー込み）
+        self.log_text = VirtualLogView(text_frame, height=10, font=("Consolas", 9))
         self.log_text.grid(row=0, column=0, sticky=tk.W + tk.E + tk.N + tk.S)
 
-        # スクロールバー
-        scrollbar = ttk.Scrollbar(
-            text_frame, orient=tk.VERTICAL, command=self.log_text.yview
-        )
-        scrollbar.grid(row=0, column=1, sticky=tk.N + tk.S)
-        self.log_text.config(yscrollcommand=scrollbar.set)
-
         # Window2専用のログハンドラーにウィジェットを登録
         log_handler_window2.register_widget(self.log_text, self.window)
 
+        # 進捗バー
+        self.progress_panel = ProgressPanel(main_frame)
+        self.progress_panel.grid(row=3, column=0, sticky=tk.W + tk.E, pady=(10, 0))
+
         # ボタンフレーム
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=3, column=0, sticky=tk.W + tk.E, pady=(10, 0))
+        button_frame.grid(row=4, column=0, sticky=tk.W + tk.E, pady=(10, 0))
+
+        # 次回の実行だけプロファイルを取る（実行時に自動でオフに戻る）
+        self.profile_next_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            button_frame, text="次回の実行をプロファイル", variable=self.profile_next_var
+        ).pack(side=tk.LEFT)
 
         # ボタンを右寄せにするためのフレーム
         right_frame = ttk.Frame(button_frame)
@@ -313,6 +496,13 @@ class Window2:
             command=self._clear_log,
         ).pack(side=tk.LEFT, padx=(0, 10))
 
+        # 中止ボタン
+        ttk.Button(
+            right_frame,
+            text="中止",
+            command=self._cancel_pipeline2,
+        ).pack(side=tk.LEFT, padx=(0, 10))
+
         # 閉じるボタン
         ttk.Button(right_frame, text="閉じる", command=self._on_closing).pack(
             side=tk.LEFT
@@ -350,10 +540,27 @@ class Window2:
         self.logger.info(f"入力ファイル: {self.config_file_path}")
 
         try:
-            # 別スレッドでパイプラインを実行（GUIがブロックされないように）
-            def run_pipeline():
+            config_file_path = self.config_file_path
+            profile = self.profile_next_var.get()
+            self.profile_next_var.set(False)
+
+            # ジョブとして実行（GUIがブロックされないように）
+            def run_pipeline(job):
+                from src.logic.pipeline import process_data2
+
                 try:
-                    process_data2(window_id="window2")  # Window2用のwindow_idを指定
+                    # Window2用のwindow_idを指定
+                    run_with_profile(
+                        profile,
+                        "window2",
+                        self.logger,
+                        lambda: process_data2(
+                            window_id="window2",
+                            input_path=config_file_path,
+                            cancel_event=job.cancel_event,
+                            progress=self.progress_panel.new_channel(),
+                        ),
+                    )
                     self.logger.success("パイプライン2の実行が完了しました！")
                     self.logger.info("=" * 50)
 
@@ -364,6 +571,10 @@ class Window2:
                             "完了", "パイプライン2の実行が完了しました"
                         ),
                     )
+                except PipelineCancelled:
+                    self.logger.warning("パイプライン2の実行を中止しました")
+                    self.logger.info("=" * 50)
+                    raise
                 except Exception as e:
                     self.logger.error(
                         f"パイプライン2の実行中にエラーが発生しました: {str(e)}"
@@ -376,8 +587,13 @@ class Window2:
                         ),
                     )
 
-            # 別スレッドで実行
-            threading.Thread(target=run_pipeline, daemon=True).start()
+            # 実行中の場合は待機列に入る
+            if job_executor.active_jobs("pipeline2"):
+                self.logger.info(
+                    "パイプライン2は実行中のため、待機列に追加しました"
+                    f"（待機 {job_executor.queued_count('pipeline2') + 1} 件）"
+                )
+            job_executor.submit(run_pipeline, key="pipeline2", name="パイプライン2")
 
         except Exception as e:
             self.logger.error(f"パイプライン2の起動中にエラーが発生しました: {str(e)}")
@@ -385,6 +601,13 @@ class Window2:
                 "エラー", f"パイプライン2の起動に失敗しました:\n{str(e)}"
             )
 
+    def _cancel_pipeline2(self):
+        """実行中・待機中のパイプライン2を中止"""
+        if job_executor.cancel("pipeline2"):
+            self.logger.warning("パイプライン2の中止を要求しました")
+        else:
+            self.logger.info("実行中のパイプライン2はありません")
+
     def _clear_log(self):
         """ログ表示エリアをクリア"""
         self.log_text.delete(1.0, tk.END)
@@ -400,12 +623,22 @@ class Window2:
 class FileManagerApp:
     """ファイル管理アプリケーションのメインクラス"""
 
-    def __init__(self, root):
+    FOLDER_STATUS_MS = 200  # フォルダ処理の進捗表示を更新する間隔
+
+    def __init__(self, root, ui_monitor=None):
         self.root = root
+        self.ui_monitor = ui_monitor
+        self.diagnostics_window = None
         self.selected_files = []
+        self.selected_folder = None
         self.pipeline2_window = None
+        self._folder_status_text = None  # ワーカースレッドが置いた最新の進捗
+        self._folder_status_shown = None
+        self._folder_errors = collections.deque()  # Tkスレッドで表示するエラーダイアログ
+        self._watching = False  # フォルダ監視のジョブが動いているか（監視スレッドが戻す）
         self._setup_window()
         self._create_widgets()
+        self.root.after(self.FOLDER_STATUS_MS, self._poll_folder_status)
 
         # メインウィンドウ用のロガーバインディングを作成
         self.logger = logger.bind(window_id="main")
@@ -466,6 +699,47 @@ class FileManagerApp:
         # 選択時のイベント
         self.model_combo.bind("<<ComboboxSelected>>", self._on_model_selected)
 
+        # フォルダ一括処理フレーム
+        folder_frame = ttk.LabelFrame(left_frame, text="フォルダ一括処理", padding="10")
+        folder_frame.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(folder_frame, text="対象ファイル:").pack(anchor=tk.W)
+        self.folder_pattern_var = tk.StringVar(value="*.xlsx; *.xlsm")
+        ttk.Entry(folder_frame, textvariable=self.folder_pattern_var, width=20).pack(
+            fill=tk.X, pady=(0, 5)
+        )
+
+        self.folder_recursive_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            folder_frame, text="サブフォルダも含める", variable=self.folder_recursive_var
+        ).pack(anchor=tk.W, pady=(0, 5))
+
+        # マニフェストと比較して追加・変更されたファイルだけを処理
+        self.folder_incremental_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            folder_frame, text="変更分のみ処理", variable=self.folder_incremental_var
+        ).pack(anchor=tk.W, pady=(0, 5))
+
+        ttk.Button(
+            folder_frame, text="フォルダ一括実行", command=self._run_folder_batch
+        ).pack(fill=tk.X, pady=(0, 5))
+        self.watch_button_text = tk.StringVar(value="フォルダ監視を開始")
+        ttk.Button(
+            folder_frame, textvariable=self.watch_button_text, command=self._toggle_folder_watch
+        ).pack(fill=tk.X, pady=(0, 5))
+        ttk.Button(
+            folder_frame, text="一括処理を中止", command=self._cancel_folder_batch
+        ).pack(fill=tk.X, pady=(0, 5))
+
+        # 進捗・スループット表示
+        self.folder_status_var = tk.StringVar(value="")
+        ttk.Label(
+            folder_frame,
+            textvariable=self.folder_status_var,
+            foreground="gray",
+            wraplength=180,
+        ).pack(anchor=tk.W)
+
         # 右側: ログ・結果表示エリア
         result_frame = ttk.LabelFrame(main_frame, text="ログ・結果表示", padding="10")
         result_frame.grid(row=0, column=1, sticky=tk.W + tk.E + tk.N + tk.S)
@@ -478,18 +752,10 @@ class FileManagerApp:
         text_frame.columnconfigure(0, weight=1)
         text_frame.rowconfigure(0, weight=1)
 
-        self.result_text = tk.Text(
-            text_frame, height=25, wrap=tk.WORD, font=("Consolas", 9)
-        )
+        # リングバッファで履歴を保持する仮想化ログビュー（スクロールバー込み）
+        self.result_text = VirtualLogView(text_frame, height=25, font=("Consolas", 9))
         self.result_text.grid(row=0, column=0, sticky=tk.W + tk.E + tk.N + tk.S)
 
-        # スクロールバー
-        scrollbar = ttk.Scrollbar(
-            text_frame, orient=tk.VERTICAL, command=self.result_text.yview
-        )
-        scrollbar.grid(row=0, column=1, sticky=tk.N + tk.S)
-        self.result_text.config(yscrollcommand=scrollbar.set)
-
         # ログハンドラーにメインウィンドウのテキストエリアも登録
         log_handler.register_widget(self.result_text, self.root)
 
@@ -497,9 +763,14 @@ class FileManagerApp:
         clear_button_frame = ttk.Frame(result_frame)
         clear_button_frame.grid(row=1, column=0, sticky=tk.E, pady=(5, 0))
 
+        if self.ui_monitor is not None:
+            ttk.Button(
+                clear_button_frame, text="診断", command=self._open_diagnostics
+            ).pack(side=tk.LEFT, padx=(0, 10))
+
         ttk.Button(
             clear_button_frame, text="ログクリア", command=self._clear_log
-        ).pack()
+        ).pack(side=tk.LEFT)
 
         # 下部ボタンエリア（パイプライン1とパイプライン2）
         # パイプライン1ボタン（左下）
@@ -510,7 +781,21 @@ class FileManagerApp:
             pipeline1_button_frame,
             text="パイプライン1実行",
             command=self._run_pipeline1,
-        ).pack()
+        ).pack(side=tk.LEFT)
+
+        ttk.Button(
+            pipeline1_button_frame,
+            text="中止",
+            command=self._cancel_pipeline1,
+        ).pack(side=tk.LEFT, padx=(10, 0))
+
+        # 次回の実行だけプロファイルを取る（実行時に自動でオフに戻る）
+        self.profile_next_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            pipeline1_button_frame,
+            text="次回の実行をプロファイル",
+            variable=self.profile_next_var,
+        ).pack(side=tk.LEFT, padx=(10, 0))
 
         # パイプライン2ボタン（右下）
         pipeline2_button_frame = ttk.Frame(main_frame)
@@ -523,6 +808,12 @@ class FileManagerApp:
             style="Accent.TButton",
         ).pack()
 
+        # パイプライン1の進捗バー
+        self.progress_panel = ProgressPanel(main_frame)
+        self.progress_panel.grid(
+            row=2, column=0, columnspan=2, sticky=tk.W + tk.E, pady=(10, 0)
+        )
+
     def _select_excel(self):
         """Excelファイル選択"""
         file_path = Window1.select_excel_file()
@@ -533,10 +824,207 @@ class FileManagerApp:
         """フォルダ選択"""
         folder_path = Window1.select_folder()
         if folder_path:
+            self.selected_folder = folder_path
             # 従来の表示も残す
             self.result_text.insert(tk.END, f"選択されたフォルダ: {folder_path}\n\n")
             self.result_text.see(tk.END)
 
+    def _folder_job_conflicts(self, other_key, message):
+        """もう一方のフォルダ処理が動いていれば警告してTrueを返す
+
+        一括・差分処理と監視は同じマニフェストと保存先に書くので、同時には実行しない。
+        """
+        if not job_executor.active_jobs(other_key):
+            return False
+        self.logger.warning(message)
+        messagebox.showwarning("警告", message)
+        return True
+
+    def _run_folder_batch(self):
+        """選択フォルダ内の対象ファイルをまとめてパイプライン1で処理"""
+        if self._folder_job_conflicts(
+            "folder_watch", "フォルダ監視中は一括処理・差分処理を実行できません。監視を停止してください"
+        ):
+            return
+        if not self.selected_folder:
+            self.logger.warning("フォルダが選択されていません")
+            messagebox.showwarning("警告", "フォルダを選択してください")
+            return
+
+        from src.logic.folder_batch import parse_patterns
+
+        folder = self.selected_folder
+        patterns = parse_patterns(self.folder_pattern_var.get())
+        recursive = self.folder_recursive_var.get()
+        params = {"model": self.model_var.get()}
+
+        if self.folder_incremental_var.get():
+            self._run_incremental(folder, patterns, recursive, params)
+            return
+
+        def run_batch(job):
+            from src.logic.folder_batch import run_folder_batch, scan_folder
+
+            try:
+                files = list(scan_folder(folder, patterns, recursive=recursive))
+                self.logger.info(
+                    f"フォルダ一括処理を開始します: {len(files)} ファイル "
+                    f"({', '.join(patterns)}{'、サブフォルダ含む' if recursive else ''})"
+                )
+                progress = run_folder_batch(
+                    files,
+                    params=params,
+                    cancel_event=job.cancel_event,
+                    on_result=self._log_file_result,
+                    on_progress=self._update_folder_progress,
+                    root=folder,
+                )
+            except PipelineCancelled:
+                self.logger.warning("フォルダ一括処理を中止しました")
+                raise
+            except Exception as e:
+                self._report_folder_error("フォルダ一括処理", e)
+                return
+            self._update_folder_progress(progress)
+            self.logger.success(
+                f"フォルダ一括処理が完了しました: {progress.summary()} "
+                f"({progress.elapsed:.1f}秒)"
+            )
+
+        job_executor.submit(run_batch, key="folder_batch", name="フォルダ一括処理")
+
+    def _run_incremental(self, folder, patterns, recursive, params):
+        """前回の処理から追加・変更されたファイルだけを処理"""
+
+        def run_batch(job):
+            from src.logic.watch_folder import FolderWatcher
+
+            try:
+                watcher = FolderWatcher(folder, patterns, recursive=recursive)
+                self.logger.info(
+                    f"差分処理を開始します（処理済み {len(watcher.manifest.entries)} ファイル）"
+                )
+                progress, unsettled = watcher.run_settled(
+                    params=params,
+                    cancel_event=job.cancel_event,
+                    on_result=self._log_file_result,
+                    on_progress=self._update_folder_progress,
+                )
+            except PipelineCancelled:
+                self.logger.warning("差分処理を中止しました")
+                raise
+            except Exception as e:
+                self._report_folder_error("差分処理", e)
+                return
+            self._log_incremental_cycle(progress, unsettled)
+
+        job_executor.submit(run_batch, key="folder_batch", name="フォルダ差分処理")
+
+    def _toggle_folder_watch(self):
+        """フォルダ監視の開始・停止"""
+        if job_executor.active_jobs("folder_watch"):
+            job_executor.cancel("folder_watch")
+            self.logger.info("フォルダ監視の停止を要求しました")
+            return
+
+        if self._folder_job_conflicts(
+            "folder_batch", "一括処理・差分処理の実行中はフォルダ監視を開始できません"
+        ):
+            return
+        if not self.selected_folder:
+            self.logger.warning("フォルダが選択されていません")
+            messagebox.showwarning("警告", "フォルダを選択してください")
+            return
+
+        from src.logic.folder_batch import parse_patterns
+
+        folder = self.selected_folder
+        patterns = parse_patterns(self.folder_pattern_var.get())
+        recursive = self.folder_recursive_var.get()
+        params = {"model": self.model_var.get()}
+
+        def run_watch(job):
+            from src.logic.watch_folder import FolderWatcher
+
+            try:
+                watcher = FolderWatcher(folder, patterns, recursive=recursive)
+                self.logger.info(f"フォルダ監視を開始しました: {folder}")
+                watcher.watch(
+                    interval=5.0,
+                    cancel_event=job.cancel_event,
+                    on_cycle=lambda progress, unsettled: self._log_incremental_cycle(
+                        progress, unsettled, log_idle=False
+                    ),
+                    params=params,
+                    on_result=self._log_file_result,
+                    on_progress=self._update_folder_progress,
+                )
+            except PipelineCancelled:
+                raise
+            except Exception as e:
+                self._report_folder_error("フォルダ監視", e)
+            finally:
+                self.logger.info("フォルダ監視を停止しました")
+                # ボタンの表示は_poll_folder_statusがTkスレッドで戻す
+                self._watching = False
+
+        self._watching = True
+        job_executor.submit(run_watch, key="folder_watch", name="フォルダ監視")
+        self.watch_button_text.set("フォルダ監視を停止")
+
+    def _log_incremental_cycle(self, progress, unsettled, log_idle=True):
+        """差分処理1回分の結果をログに出力（監視中は変更のない回は出力しない）"""
+        if unsettled:
+            self.logger.info(f"書き込み中のため {unsettled} ファイルを次回に回します")
+        if progress is None:
+            if log_idle and not unsettled:
+                self.logger.info("変更されたファイルはありません")
+            return
+        self._update_folder_progress(progress)
+        self.logger.success(
+            f"差分処理が完了しました: {progress.summary()} ({progress.elapsed:.1f}秒)"
+        )
+
+    def _log_file_result(self, result, progress):
+        """1ファイル分の処理結果をログに出力"""
+        name = os.path.basename(result["path"])
+        if result["ok"]:
+            rows = f"{result['rows']} 行, " if result["rows"] is not None else ""
+            self.logger.debug(f"完了: {name} ({rows}{result['elapsed']:.2f}秒)")
+        else:
+            self.logger.error(f"失敗: {name}: {result['error']}")
+
+    def _update_folder_progress(self, progress):
+        """進捗表示を更新（ワーカースレッドから呼ばれるのでTkには触れず、文字列を置くだけ）"""
+        self._folder_status_text = progress.summary()
+
+    def _report_folder_error(self, title, error):
+        """フォルダ処理の失敗をログに出し、エラーダイアログを予約（ワーカースレッドから呼ぶ）"""
+        self.logger.error(f"{title}中にエラーが発生しました: {str(error)}")
+        self._folder_errors.append(f"{title}に失敗しました:\n{str(error)}")
+
+    def _poll_folder_status(self):
+        """Tkスレッドで定期的に呼ばれ、置かれた進捗・エラー・監視の停止を表示に反映する"""
+        text = self._folder_status_text
+        try:
+            if text != self._folder_status_shown:
+                self.folder_status_var.set(text)
+                self._folder_status_shown = text
+            if not self._watching and self.watch_button_text.get() != "フォルダ監視を開始":
+                self.watch_button_text.set("フォルダ監視を開始")
+            self.root.after(self.FOLDER_STATUS_MS, self._poll_folder_status)
+            while self._folder_errors:
+                messagebox.showerror("エラー", self._folder_errors.popleft())
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _cancel_folder_batch(self):
+        """実行中のフォルダ一括処理を中止"""
+        if job_executor.cancel("folder_batch"):
+            self.logger.warning("フォルダ一括処理の中止を要求しました")
+        else:
+            self.logger.info("実行中のフォルダ一括処理はありません")
+
     def _on_model_selected(self, event=None):
         """モデルが選択されたときの処理"""
         selected_model = self.model_var.get()
@@ -554,12 +1042,39 @@ class FileManagerApp:
 
         self.logger.info(f"パイプライン1の実行を開始します... (モデル: {selected_model})")
 
+        # Excelファイルが選択されていれば入力として渡す（結果はキャッシュされる）
+        input_path = self.selected_files[0] if self.selected_files else None
+        profile = self.profile_next_var.get()
+        self.profile_next_var.set(False)
+
         # 以下、既存の処理
         try:
 
-            def run_pipeline():
+            def run_pipeline(job):
+                # Window1用のwindow_idを指定
+                kwargs = {"window_id": "main", "input_path": input_path, "model": selected_model}
+                progress = self.progress_panel.new_channel()
                 try:
-                    process_data(window_id="main")  # Window1用のwindow_idを指定
+                    if worker_pool is not None and worker_pool.ready and not profile:
+                        # 準備済みのワーカープロセスで実行（プロファイル時はこのプロセスで実行）
+                        worker_pool.run(
+                            "pipeline1",
+                            kwargs,
+                            self.logger,
+                            progress=progress,
+                            cancel_event=job.cancel_event,
+                        )
+                    else:
+                        from src.logic.pipeline import process_data
+
+                        run_with_profile(
+                            profile,
+                            "main",
+                            self.logger,
+                            lambda: process_data(
+                                cancel_event=job.cancel_event, progress=progress, **kwargs
+                            ),
+                        )
                     self.logger.success("パイプライン1の実行が完了しました")
 
                     self.root.after(
@@ -568,6 +1083,9 @@ class FileManagerApp:
                             "完了", "パイプライン1の実行が完了しました"
                         ),
                     )
+                except PipelineCancelled:
+                    self.logger.warning("パイプライン1の実行を中止しました")
+                    raise
                 except Exception as e:
                     self.logger.error(
                         f"パイプライン1の実行中にエラーが発生しました: {str(e)}"
@@ -579,7 +1097,13 @@ class FileManagerApp:
                         ),
                     )
 
-            threading.Thread(target=run_pipeline, daemon=True).start()
+            # 実行中の場合は待機列に入る
+            if job_executor.active_jobs("pipeline1"):
+                self.logger.info(
+                    "パイプライン1は実行中のため、待機列に追加しました"
+                    f"（待機 {job_executor.queued_count('pipeline1') + 1} 件）"
+                )
+            job_executor.submit(run_pipeline, key="pipeline1", name="パイプライン1")
 
         except Exception as e:
             self.logger.error(f"パイプライン1の起動中にエラーが発生しました: {str(e)}")
@@ -587,6 +1111,13 @@ class FileManagerApp:
                 "エラー", f"パイプライン1の起動に失敗しました:\n{str(e)}"
             )
 
+    def _cancel_pipeline1(self):
+        """実行中・待機中のパイプライン1を中止"""
+        if job_executor.cancel("pipeline1"):
+            self.logger.warning("パイプライン1の中止を要求しました")
+        else:
+            self.logger.info("実行中のパイプライン1はありません")
+
     def _open_pipeline2_window(self):
         """パイプライン2のウィンドウを開く"""
         # 既にウィンドウが開いている場合はフォーカスを当てる
@@ -603,25 +1134,97 @@ class FileManagerApp:
         # 新しいウィンドウを作成
         self.pipeline2_window = Window2(parent=self.root)
 
+    def _open_diagnostics(self):
+        """イベントループの遅延などを表示する診断ウィンドウを開く"""
+        if self.diagnostics_window is not None:
+            try:
+                self.diagnostics_window.window.lift()
+                return
+            except tk.TclError:
+                self.diagnostics_window = None
+        self.diagnostics_window = DiagnosticsWindow(self.root, self.ui_monitor)
+
     def _clear_log(self):
         """ログ表示エリアをクリア"""
         self.result_text.delete(1.0, tk.END)
         self.logger.info("メインウィンドウのログ表示がクリアされました")
 
 
+def _preload_pipeline():
+    """パイプライン本体のモジュールを読み込む（最初の描画後にバックグラウンドで実行）"""
+    try:
+        import src.logic.folder_batch  # noqa: F401
+        import src.logic.pipeline  # noqa: F401
+    except Exception as e:
+        logger.bind(window_id="main").warning(f"パイプラインの事前読み込みに失敗しました: {e}")
+
+
+def _start_worker_pool():
+    """常駐ワーカープロセスをバックグラウンドで起動する"""
+    global worker_pool
+    from src.logic.worker_pool import WorkerPool, pool_size_from_env
+
+    size = pool_size_from_env()
+    if size:
+        worker_pool = WorkerPool(size=size, bound_logger=logger.bind(window_id="main"))
+        worker_pool.start_in_background()
+
+
 def gui_run():
     """GUIアプリケーションを起動"""
-    # 両方のログハンドラーを初期化
-    log_handler.setup_logger()
-    log_handler_window2.setup_logger()
+    from src.gui.startup import SLOW_RATIO, startup_timer
+
+    # 両方のログハンドラーを初期化（ファイル出力は最初の描画後に開始）
+    log_handler.setup_logger(defer_file=True)
+    log_handler_window2.setup_logger(defer_file=True)
 
     root = tk.Tk()
-    FileManagerApp(root)
+    # イベントループの遅延・ログの滞留を計測（metrics/ui_metrics.jsonに出力）
+    ui_monitor = UiMonitor(root, [log_handler, log_handler_window2])
+    FileManagerApp(root, ui_monitor=ui_monitor)
+    startup_timer.mark("window")
+
+    def after_first_paint():
+        """最初の描画が終わってから、起動時に不要な初期化を行う"""
+        startup_timer.mark("first_paint")
+        log_handler.start_file_output()
+        log_handler_window2.start_file_output()
+        ui_monitor.start()
+        # パイプライン本体は最初の実行を待たせないようバックグラウンドで読み込んでおく
+        threading.Thread(target=_preload_pipeline, name="preload", daemon=True).start()
+        _start_worker_pool()
+
+        main_logger = logger.bind(window_id="main")
+        for line in startup_timer.report_lines():
+            main_logger.debug(line)
+        try:
+            ratio = startup_timer.write()
+        except OSError as e:
+            main_logger.warning(f"起動時間を保存できませんでした: {e}")
+            return
+        main_logger.info(f"起動しました（{startup_timer.total_ms:.0f} ms）")
+        if ratio is not None and ratio > SLOW_RATIO:
+            main_logger.warning(
+                f"起動がいつもより遅くなっています（過去の中央値の{ratio:.1f}倍）"
+            )
+
+    # after(0)はウィンドウの最初の描画（アイドル処理）の後に実行される
+    root.after(0, lambda: root.after_idle(after_first_paint))
 
     # アプリケーション終了時の処理
     def on_closing():
         # メインウィンドウ用のロガーを使用
         logger.bind(window_id="main").info("アプリケーションを終了します")
+        # 実行中のパイプラインに中止を要求し、終了を待つ
+        job_executor.shutdown(wait=True, cancel_pending=True, timeout=10)
+        if worker_pool is not None:
+            worker_pool.shutdown()
+        try:
+            ui_monitor.stop()
+        except OSError:
+            pass
+        # 非同期ファイル出力のキューを書き切る
+        log_router.uninstall()
         root.quit()
         root.destroy()
 
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GUIログ用の上限付きキューと呼び出し箇所ごとのレート制限
+
+ログが大量に出てもメモリ使用量が上限を超えないようにし、
+破棄・抑制した件数はまとめてGUIに表示する。
+"""
+
+import collections
+import queue
+import threading
+import time
+
+from src.gui.log_record import LogRecord
+
+DEBUG_LEVEL_NO = 10
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_debug", "collapse")
+
+
+class BoundedLogQueue:
+    """LogRecordを保持する上限付きのログキュー（queue.Queueのget_nowait/emptyと互換）
+
+    溢れた時の動作:
+        drop_oldest: 最も古いメッセージを破棄
+        drop_debug:  DEBUGを優先して破棄（DEBUGがなければ最も古いもの）
+        collapse:    連続する同一メッセージを「N件抑制」にまとめ、溢れたら最も古いものを破棄
+    """
+
+    def __init__(self, maxsize=5000, policy="drop_oldest"):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"不明なオーバーフローポリシーです: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items = collections.deque()  # LogRecord
+        self._debug_count = 0
+        self._lock = threading.Lock()
+        self._pending_dropped = 0
+        self._last_key = None
+        self._repeat_count = 0
+        self.stats = {"dropped": 0, "collapsed": 0, "max_depth": 0}
+
+    def qsize(self):
+        return len(self._items)
+
+    def empty(self):
+        with self._lock:
+            return not self._items and not self._pending_dropped and not self._repeat_count
+
+    def put(self, record):
+        """レコードを追加（同じメッセージの連続はcollapseで畳み込む）"""
+        with self._lock:
+            if self.policy == "collapse":
+                key = (record.level_no, record.message)
+                if key == self._last_key:
+                    self._repeat_count += 1
+                    self.stats["collapsed"] += 1
+                    return
+                self._flush_repeats()
+                self._last_key = key
+            self._append(record)
+
+    def put_notice(self, text):
+        """キュー外部からの通知を追加"""
+        with self._lock:
+            self._append(LogRecord.notice(text))
+
+    def get_nowait(self):
+        """先頭のメッセージを取り出す（空ならqueue.Empty）"""
+        with self._lock:
+            if self._pending_dropped:
+                count, self._pending_dropped = self._pending_dropped, 0
+                return LogRecord.notice(
+                    f"ログが多すぎるため {count} 件のメッセージを破棄しました"
+                    f"（上限 {self.maxsize} 件）"
+                )
+            if self._items:
+                record = self._items.popleft()
+                if record.level_no <= DEBUG_LEVEL_NO:
+                    self._debug_count -= 1
+                return record
+            if self._repeat_count:
+                count, self._repeat_count = self._repeat_count, 0
+                self._last_key = None
+                return LogRecord.notice(f"同様のメッセージ {count} 件を抑制しました")
+        raise queue.Empty
+
+    def _flush_repeats(self):
+        """畳み込み中の件数を通知として追加"""
+        if self._repeat_count:
+            count, self._repeat_count = self._repeat_count, 0
+            self._append(LogRecord.notice(f"同様のメッセージ {count} 件を抑制しました"))
+
+    def _append(self, record):
+        is_debug = record.level_no <= DEBUG_LEVEL_NO
+        if len(self._items) >= self.maxsize:
+            if self.policy == "drop_debug":
+                if is_debug:
+                    # 新しいDEBUGは追加せずに破棄
+                    self._record_drop()
+                    return
+                self._drop_one_debug()
+            else:
+                self._drop_at(0)
+
+        self._items.append(record)
+        if is_debug:
+            self._debug_count += 1
+        if len(self._items) > self.stats["max_depth"]:
+            self.stats["max_depth"] = len(self._items)
+
+    def _drop_one_debug(self):
+        """最も古いDEBUGを破棄（なければ最も古いメッセージ）"""
+        if self._debug_count:
+            for index, record in enumerate(self._items):
+                if record.level_no <= DEBUG_LEVEL_NO:
+                    self._drop_at(index)
+                    return
+        self._drop_at(0)
+
+    def _drop_at(self, index):
+        if index == 0:
+            record = self._items.popleft()
+        else:
+            record = self._items[index]
+            del self._items[index]
+        if record.level_no <= DEBUG_LEVEL_NO:
+            self._debug_count -= 1
+        self._record_drop()
+
+    def _record_drop(self):
+        self._pending_dropped += 1
+        self.stats["dropped"] += 1
+
+
+class CallSiteRateLimiter:
+    """呼び出し箇所（モジュール名・行番号）ごとのDEBUGログのレート制限"""
+
+    def __init__(self, max_per_second=20, max_level_no=DEBUG_LEVEL_NO):
+        self.max_per_second = max_per_second
+        self.max_level_no = max_level_no
+        self._sites = {}  # {site: [window_start, count]}
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def allow(self, site, level_no):
+        """このレコードを通すかどうか"""
+        if level_no > self.max_level_no:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            window = self._sites.get(site)
+            if window is None or now - window[0] >= 1.0:
+                self._sites[site] = [now, 1]
+                return True
+            if window[1] < self.max_per_second:
+                window[1] += 1
+                return True
+            self._suppressed += 1
+            return False
+
+    def take_suppressed(self):
+        """未報告の抑制件数を取り出す"""
+        with self._lock:
+            count, self._suppressed = self._suppressed, 0
+        return count
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GUIに渡す構造化ログレコード
+
+シンクでは文字列を組み立てず、必要な値だけをスロットに保持する。
+表示用の文字列は実際に描画される行だけformat()で遅延生成する。
+"""
+
+import datetime
+
+WARNING_LEVEL_NO = 30
+
+
+class LogRecord:
+    """GUI表示用のログレコード"""
+
+    __slots__ = ("time", "level_no", "level_name", "window_id", "message", "site")
+
+    def __init__(self, time, level_no, level_name, window_id, message, site=None):
+        self.time = time  # datetime
+        self.level_no = level_no
+        self.level_name = level_name
+        self.window_id = window_id
+        self.message = message
+        self.site = site  # (モジュール名, 行番号)
+
+    @classmethod
+    def from_loguru(cls, record, window_id):
+        """loguruのレコードから作成（文字列の整形は行わない）"""
+        level = record["level"]
+        return cls(
+            record["time"],
+            level.no,
+            level.name,
+            window_id,
+            record["message"],
+            (record["name"], record["line"]),
+        )
+
+    @classmethod
+    def notice(cls, text, window_id=None):
+        """ログシステム自身が出す通知（WARNING扱い）"""
+        return cls(datetime.datetime.now(), WARNING_LEVEL_NO, "WARNING", window_id, text)
+
+    def format(self):
+        """表示用の1行（改行なし）"""
+        return f"{self.time:%H:%M:%S} | {self.level_name: <8} | {self.message}"
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+window_idごとにログを振り分ける中央ルーター
+
+loguruにはシンクを1つだけ登録し、レコードのwindow_idで辞書を引いて
+GUIキューとファイル出力に振り分ける。ウィンドウ数が増えても
+1レコードあたりのコストは一定。
+"""
+
+import glob
+import os
+import queue
+import threading
+import time
+import traceback
+from loguru import logger
+
+from src.gui.log_record import LogRecord
+
+DEFAULT_WINDOW_ID = "main"
+
+FILE_LEVEL_NO = 20  # INFO
+
+
+def format_file_line(record):
+    """ファイル出力用の1行を作成"""
+    line = (
+        f"{record['time']:%Y-%m-%d %H:%M:%S} | {record['level'].name: <8} | "
+        f"{record['name']}:{record['function']}:{record['line']} - "
+        f"{record['message']}\n"
+    )
+    exception = record["exception"]
+    if exception is not None:
+        line += "".join(
+            traceback.format_exception(
+                exception.type, exception.value, exception.traceback
+            )
+        )
+    return line
+
+
+class WindowFileWriter:
+    """ウィンドウ単位の日次ログファイル（日付が変わったらローテーション）"""
+
+    def __init__(
+        self,
+        window_id,
+        log_dir="logs",
+        retention_days=30,
+        compression="zip",
+        level_no=FILE_LEVEL_NO,
+    ):
+        self.window_id = window_id
+        self.log_dir = log_dir
+        self.retention_days = retention_days
+        self.compression = compression
+        self.level_no = level_no
+        self._lock = threading.Lock()
+        self._file = None
+        self._date = None
+
+    def _path_for(self, date):
+        return os.path.join(self.log_dir, f"app_{self.window_id}_{date:%Y-%m-%d}.log")
+
+    def _open(self, date):
+        """指定日のファイルを開く（前日分があればローテーション）"""
+        previous = self._file
+        if previous is not None:
+            previous.close()
+            self._rotate(previous.name)
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._file = open(self._path_for(date), "a", encoding="utf-8")
+        self._date = date
+
+    def _rotate(self, path):
+        """ローテーション済みファイルの圧縮と保持期間切れファイルの削除"""
+        try:
+            if self.compression == "zip" and os.path.exists(path):
+                import zipfile  # 起動時には不要なので使うときに読み込む
+
+                with zipfile.ZipFile(
+                    path + ".zip", "w", compression=zipfile.ZIP_DEFLATED
+                ) as archive:
+                    archive.write(path, arcname=os.path.basename(path))
+                os.remove(path)
+            self._apply_retention()
+        except OSError as e:
+            print(f"Log rotation error ({self.window_id}): {e}")
+
+    def _apply_retention(self):
+        """保持期間を過ぎたログファイルを削除"""
+        if not self.retention_days:
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        pattern = os.path.join(self.log_dir, f"app_{self.window_id}_*.log*")
+        for path in glob.glob(pattern):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def write(self, record):
+        """レコードを書き込む（レベル未満は無視）"""
+        if record["level"].no < self.level_no:
+            return
+        line = format_file_line(record)
+        date = record["time"].date()
+        with self._lock:
+            if self._date != date:
+                self._open(date)
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._date = None
+
+
+class LogRouter:
+    """loguruのシンクを1つだけ登録し、window_idで振り分けるルーター"""
+
+    def __init__(self):
+        # {window_id: (gui_sink, file_writer)}
+        # 書き換え時は辞書ごと差し替える（ディスパッチ側はロック不要）
+        self._routes = {}
+        self._lock = threading.Lock()
+        self.sink_id = None
+
+    def install(self):
+        """loguruにルーター用シンクを登録（複数回呼んでも1つだけ）"""
+        with self._lock:
+            if self.sink_id is None:
+                self.sink_id = logger.add(
+                    self._dispatch, level="DEBUG", format="{message}", catch=True
+                )
+        return self.sink_id
+
+    def uninstall(self):
+        """ルーター用シンクを削除してファイルを閉じる"""
+        with self._lock:
+            if self.sink_id is not None:
+                logger.remove(self.sink_id)
+                self.sink_id = None
+            routes, self._routes = self._routes, {}
+        for _, file_writer in routes.values():
+            if file_writer is not None:
+                file_writer.close()
+
+    def register(self, window_id, gui_sink=None, file_writer=None):
+        """ウィンドウの出力先を登録（既存の登録は置き換え）"""
+        with self._lock:
+            routes = dict(self._routes)
+            old = routes.get(window_id)
+            routes[window_id] = (gui_sink, file_writer)
+            self._routes = routes
+        if old is not None and old[1] is not None and old[1] is not file_writer:
+            old[1].close()
+
+    def unregister(self, window_id):
+        """ウィンドウの出力先を登録解除"""
+        with self._lock:
+            routes = dict(self._routes)
+            old = routes.pop(window_id, None)
+            self._routes = routes
+        if old is not None and old[1] is not None:
+            old[1].close()
+
+    def is_registered(self, window_id):
+        return window_id in self._routes
+
+    def _dispatch(self, message):
+        """loguruシンク本体: window_idで1回だけ辞書を引いて振り分ける"""
+        record = message.record
+        window_id = record["extra"].get("window_id", DEFAULT_WINDOW_ID)
+        route = self._routes.get(window_id)
+        if route is None:
+            return
+        gui_sink, file_writer = route
+        if gui_sink is not None:
+            # GUIには整形前の構造化レコードを渡す（整形は表示時に行う）
+            gui_sink(LogRecord.from_loguru(record, window_id))
+        if file_writer is not None:
+            file_writer.write(record)
+
+
+class AsyncWindowFileWriter(WindowFileWriter):
+    """バックグラウンドスレッドでまとめて書き込む非同期版のファイル出力
+
+    呼び出し側はキューに積むだけで戻る。キューが満杯の場合はレコードを破棄して
+    件数を記録する（パイプラインやGUIスレッドをファイルI/Oで止めないため）。
+    圧縮・保持期間の処理は別のメンテナンススレッドで行う。
+    """
+
+    _STOP = object()
+    _maintenance_executor = None
+    _maintenance_lock = threading.Lock()
+
+    def __init__(self, window_id, max_queue=10000, batch_size=512, **kwargs):
+        super().__init__(window_id, **kwargs)
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        # ログを出すスレッドと書き込みスレッドの両方が更新するのでロックで守る
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            "written": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "max_queue_depth": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+        }
+
+    def get_metrics(self):
+        """現在のキュー深さを含むメトリクスのコピーを返す"""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        metrics["queue_depth"] = self._queue.qsize()
+        return metrics
+
+    def write(self, record):
+        """レコードをキューに積む（レベル未満は無視、満杯なら破棄）"""
+        if record["level"].no < self.level_no:
+            return
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._metrics_lock:
+                self.metrics["dropped"] += 1
+
+    def _start(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f"log-writer-{self.window_id}",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _run(self):
+        """キューからまとめて取り出して書き込むワーカー"""
+        while True:
+            item = self._queue.get()
+            stop = item is self._STOP
+            batch = [] if stop else [item]
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                self._flush(batch)
+            if stop:
+                break
+
+    def _flush(self, batch):
+        """バッチを日付ごとにまとめて1回のwriteで書き込む"""
+        start = time.perf_counter()
+        depth = self._queue.qsize() + len(batch)
+        try:
+            with self._lock:
+                lines = []
+                for record in batch:
+                    date = record["time"].date()
+                    if self._date != date:
+                        if lines:
+                            self._file.write("".join(lines))
+                            lines = []
+                        self._open(date)
+                    lines.append(format_file_line(record))
+                if lines:
+                    self._file.write("".join(lines))
+                self._file.flush()
+        except OSError as e:
+            with self._metrics_lock:
+                self.metrics["dropped"] += len(batch)
+            print(f"Async log write error ({self.window_id}): {e}")
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._metrics_lock:
+            metrics = self.metrics
+            metrics["written"] += len(batch)
+            metrics["flushes"] += 1
+            metrics["last_flush_ms"] = elapsed_ms
+            metrics["max_flush_ms"] = max(metrics["max_flush_ms"], elapsed_ms)
+            metrics["max_queue_depth"] = max(metrics["max_queue_depth"], depth)
+
+    def _rotate(self, path):
+        """圧縮・保持期間の処理をメンテナンススレッドに回す"""
+        cls = AsyncWindowFileWriter
+        with cls._maintenance_lock:
+            if cls._maintenance_executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                cls._maintenance_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="log-maintenance"
+                )
+            executor = cls._maintenance_executor
+        executor.submit(super()._rotate, path)
+
+    def close(self, timeout=5.0):
+        """キューを書き切ってからファイルを閉じる"""
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            try:
+                self._queue.put(self._STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            thread.join(timeout)
+        super().close()
+
+
+class DeferredFileWriter:
+    """start()が呼ばれるまでレコードをメモリにためておくファイル出力
+
+    起動直後（最初のウィンドウが表示されるまで）は書き込みスレッドの起動や
+    ファイルのオープンを行わず、start()で実際の出力先を作ってためた分を流す。
+    ためられる件数を超えた分は破棄して件数を記録する。
+    """
+
+    def __init__(self, factory, max_buffer=1000):
+        self.factory = factory
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer = []
+        self._writer = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self):
+        return self._writer is not None
+
+    def write(self, record):
+        writer = self._writer
+        if writer is not None:
+            writer.write(record)
+            return
+        with self._lock:
+            if self._writer is None:
+                if len(self._buffer) < self.max_buffer:
+                    self._buffer.append(record)
+                else:
+                    self.dropped += 1
+                return
+        self._writer.write(record)
+
+    def start(self):
+        """実際の出力先を作り、ためていたレコードを書き込む（2回目以降は何もしない）"""
+        with self._lock:
+            if self._writer is not None:
+                return self._writer
+            writer = self.factory()
+            for record in self._buffer:
+                writer.write(record)
+            self._buffer = []
+            self._writer = writer
+        if self.dropped:
+            print(f"Deferred log buffer overflow: {self.dropped} records dropped")
+        return writer
+
+    def get_metrics(self):
+        writer = self._writer
+        if writer is not None and hasattr(writer, "get_metrics"):
+            return writer.get_metrics()
+        return {"buffered": len(self._buffer), "dropped": self.dropped}
+
+    def close(self, *args, **kwargs):
+        """ためていた分を書き出してから閉じる"""
+        self.start().close(*args, **kwargs)
+
+
+# アプリ全体で共有するルーター
+log_router = LogRouter()
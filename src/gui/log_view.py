@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+リングバッファを使った仮想化ログビュー
+
+全行をtk.Textに保持せず、リングバッファに格納して表示範囲の行だけを描画する。
+保持行数が1千行でも100万行でも、追加・スクロールのコストは同じ。
+行は時刻・レベル・メッセージだけを詰めて保持し、描画する行だけ整形する。
+"""
+
+import tkinter as tk
+from array import array
+from collections import deque
+from tkinter import ttk
+import tkinter.font as tkfont
+
+
+# レベルごとの表示色（レベル名 → 文字色）
+LEVEL_COLORS = {
+    "DEBUG": "gray50",
+    "SUCCESS": "green4",
+    "WARNING": "dark orange",
+    "ERROR": "red",
+    "CRITICAL": "red3",
+}
+
+
+class _Block:
+    """埋まった行をまとめて詰め直したブロック（1行ごとのオブジェクトを持たない）"""
+
+    __slots__ = ("data", "offsets", "seconds", "levels", "start")
+
+    def __init__(self, messages, seconds, levels):
+        encoded = [message.encode("utf-8") for message in messages]
+        self.data = b"".join(encoded)
+        self.offsets = array("I", [0])
+        position = 0
+        for item in encoded:
+            position += len(item)
+            self.offsets.append(position)
+        self.seconds = seconds
+        self.levels = levels
+        self.start = 0  # 容量超過で切り捨てた先頭の行数
+
+    def __len__(self):
+        return len(self.seconds) - self.start
+
+    def message(self, index):
+        return self.data[self.offsets[index] : self.offsets[index + 1]].decode("utf-8")
+
+
+class LogRingBuffer:
+    """固定容量のリングバッファ（容量を超えたら最も古い行から捨てる）
+
+    行はBLOCK_LINES行ごとのブロックに格納し、埋まったブロックはメッセージを
+    UTF-8で連結したbytesと、オフセット・時刻・レベルのarrayに詰め直す。
+    100万行を保持してもPythonオブジェクトはブロック数（数百個）程度で済む。
+    LogRecordは表示に使う時刻（時分秒）・レベル名・メッセージだけを保持する。
+    """
+
+    BLOCK_LINES = 4096
+    NO_TIME = -1  # 文字列として追加した行（時刻・レベルなし）
+
+    def __init__(self, capacity=1_000_000):
+        self.capacity = capacity
+        self._block_lines = max(1, min(self.BLOCK_LINES, capacity))
+        self._level_names = [""]  # レベル名の表（0は文字列の行）
+        self._level_index = {"": 0}
+        self.clear()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def first_index(self):
+        """最も古い行の通し番号（追加された順の0始まり）"""
+        return self.total_appended - self._size
+
+    def append(self, item):
+        if isinstance(item, str):
+            seconds, level, message = self.NO_TIME, 0, item
+        else:
+            moment = item.time
+            seconds = moment.hour * 3600 + moment.minute * 60 + moment.second
+            level = self._level_index.get(item.level_name)
+            if level is None:
+                level = self._register_level(item.level_name)
+            message = item.message
+
+        self._messages.append(message)
+        self._seconds.append(seconds)
+        self._levels.append(level)
+        self._size += 1
+        self.total_appended += 1
+        if len(self._messages) >= self._block_lines:
+            self._blocks.append(_Block(self._messages, self._seconds, self._levels))
+            self._messages = []
+            self._seconds = array("i")
+            self._levels = array("B")
+        if self._size > self.capacity:
+            self._trim()
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def _register_level(self, name):
+        if len(self._level_names) >= 256:
+            return 0  # レベルが多すぎる場合は色なしで表示
+        self._level_index[name] = len(self._level_names)
+        self._level_names.append(name)
+        return self._level_index[name]
+
+    def _trim(self):
+        """容量を超えた分を最も古いブロックの先頭から捨てる"""
+        excess = self._size - self.capacity
+        while excess > 0 and self._blocks:
+            block = self._blocks[0]
+            removed = min(excess, len(block))
+            block.start += removed
+            excess -= removed
+            self._size -= removed
+            if not len(block):
+                self._blocks.popleft()
+
+    def get_range(self, first, count):
+        """先頭からfirst番目の行からcount行を (表示用の文字列, レベル名) で取り出す"""
+        first = max(0, min(first, self._size))
+        count = max(0, min(count, self._size - first))
+        lines = []
+        for seconds, levels, get_message, begin, length in self._segments():
+            if not count:
+                break
+            if first >= length:
+                first -= length
+                continue
+            take = min(count, length - first)
+            for index in range(begin + first, begin + first + take):
+                lines.append(self._format(seconds[index], levels[index], get_message(index)))
+            count -= take
+            first = 0
+        return lines
+
+    def _segments(self):
+        for block in self._blocks:
+            yield block.seconds, block.levels, block.message, block.start, len(block)
+        yield self._seconds, self._levels, self._messages.__getitem__, 0, len(self._messages)
+
+    def _format(self, seconds, level, message):
+        """LogRecord.format()と同じ形式の1行"""
+        if seconds == self.NO_TIME:
+            return message, None
+        name = self._level_names[level]
+        hours, rest = divmod(seconds, 3600)
+        return f"{hours:02}:{rest // 60:02}:{rest % 60:02} | {name: <8} | {message}", name
+
+    def clear(self):
+        self._blocks = deque()
+        self._messages = []
+        self._seconds = array("i")
+        self._levels = array("B")
+        self._size = 0
+        self.total_appended = 0
+
+
+class VirtualLogView(ttk.Frame):
+    """表示範囲だけを描画するログビュー（tk.Textの代わりに使用）
+
+    LogHandlerや既存コードから使えるように、tk.Textのinsert/see/deleteの
+    最小限の互換メソッドを持つ。
+    """
+
+    def __init__(self, parent, capacity=1_000_000, height=10, font=("Consolas", 9)):
+        super().__init__(parent)
+        self.buffer = LogRingBuffer(capacity)
+        self._top = 0  # 表示中の先頭行（通し番号。古い行が捨てられても表示位置がずれない）
+        self._follow = True  # 末尾に追従するか
+        self._partial = ""  # 改行で終わっていない行
+        self._render_pending = False
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.text = tk.Text(self, height=height, wrap=tk.NONE, font=font)
+        self.text.grid(row=0, column=0, sticky=tk.W + tk.E + tk.N + tk.S)
+        for level_name, color in LEVEL_COLORS.items():
+            self.text.tag_configure(level_name, foreground=color)
+        self._linespace = tkfont.Font(font=self.text.cget("font")).metrics("linespace")
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._yview)
+        self.scrollbar.grid(row=0, column=1, sticky=tk.N + tk.S)
+
+        self.text.bind("<Configure>", lambda event: self._schedule_render())
+        self.text.bind("<MouseWheel>", self._on_mousewheel)
+        self.text.bind("<Button-4>", lambda event: self._scroll_lines(-3))
+        self.text.bind("<Button-5>", lambda event: self._scroll_lines(3))
+
+    # ---- 追加・クリア ----
+
+    def append_records(self, records):
+        """LogRecordをまとめて追加（整形は描画時）"""
+        if records:
+            self.buffer.extend(records)
+            self._schedule_render()
+
+    def append_text(self, text):
+        """改行区切りのテキストを追加（複数行まとめて可）"""
+        if not text:
+            return
+        parts = (self._partial + text).split("\n")
+        self._partial = parts.pop()
+        if parts:
+            self.buffer.extend(parts)
+            self._schedule_render()
+
+    def clear(self):
+        self.buffer.clear()
+        self._partial = ""
+        self._top = 0
+        self._follow = True
+        self._schedule_render()
+
+    # tk.Text互換（末尾への追加と全削除のみ対応）
+    def insert(self, index, text):
+        self.append_text(text)
+
+    def see(self, index):
+        if index == tk.END:
+            self._follow = True
+            self._schedule_render()
+
+    def delete(self, first, last=None):
+        self.clear()
+
+    # ---- スクロール ----
+
+    def _visible_rows(self):
+        height = self.text.winfo_height()
+        if height <= 1:
+            return int(self.text.cget("height"))
+        return max(1, height // self._linespace)
+
+    def _max_top(self):
+        return max(0, len(self.buffer) - self._visible_rows())
+
+    def _relative_top(self):
+        """表示中の先頭行のバッファ内の位置"""
+        return max(0, self._top - self.buffer.first_index)
+
+    def _yview(self, *args):
+        """スクロールバーからの操作"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._set_top(int(float(args[1]) * len(self.buffer)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self._visible_rows()
+            self._scroll_lines(amount)
+
+    def _on_mousewheel(self, event):
+        self._scroll_lines(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _scroll_lines(self, amount):
+        self._set_top(self._relative_top() + amount)
+        return "break"
+
+    def _set_top(self, top):
+        """バッファ内の位置topを先頭行にする"""
+        max_top = self._max_top()
+        top = max(0, min(top, max_top))
+        self._top = self.buffer.first_index + top
+        self._follow = top >= max_top
+        self._schedule_render()
+
+    # ---- 描画 ----
+
+    def _schedule_render(self):
+        """描画はアイドル時に1回だけ行う"""
+        if self._render_pending:
+            return
+        self._render_pending = True
+        try:
+            self.after_idle(self._render)
+        except tk.TclError:
+            self._render_pending = False
+
+    def _render(self):
+        """表示範囲の行だけをテキストウィジェットに描画"""
+        self._render_pending = False
+        rows = self._visible_rows()
+        size = len(self.buffer)
+        if self._follow:
+            top = max(0, size - rows)
+        else:
+            top = min(self._relative_top(), max(0, size - rows))
+        self._top = self.buffer.first_index + top
+
+        items = self.buffer.get_range(top, rows)
+        try:
+            self.text.delete("1.0", tk.END)
+            # insert(index, 文字列, タグ, 文字列, タグ, ...) で1回にまとめて描画
+            args = []
+            for index, (line, level_name) in enumerate(items):
+                newline = "\n" if index < len(items) - 1 else ""
+                tag = level_name if level_name in LEVEL_COLORS else ()
+                args.extend((line + newline, tag))
+            if args:
+                self.text.insert("1.0", *args)
+            if size:
+                self.scrollbar.set(top / size, (top + len(items)) / size)
+            else:
+                self.scrollbar.set(0.0, 1.0)
+        except tk.TclError:
+            # ウィジェットが削除されている場合
+            pass
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パイプラインの進捗バーと残り時間の表示
+
+new_channel()で作ったProgressChannelをパイプラインに渡すと、Tkスレッドの定期処理が
+まとめた進捗を取り出して、進捗バーと「ステップ・件数・スループット・残り時間」の
+1行表示を更新する。送り手のスレッドからはTkを呼ばないので、更新がいくら多くても
+描画は一定間隔に1回だけになる。
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+from src.logic.progress import ProgressChannel
+
+
+class ProgressPanel(ttk.Frame):
+    """進捗バーと状態表示"""
+
+    RENDER_MS = 50  # 進捗を確認する間隔
+
+    def __init__(self, parent, length=200):
+        super().__init__(parent)
+        self.columnconfigure(0, weight=1)
+        self.bar = ttk.Progressbar(self, mode="determinate", maximum=1000, length=length)
+        self.bar.grid(row=0, column=0, sticky=tk.W + tk.E)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(self, textvariable=self.status_var, foreground="gray").grid(
+            row=1, column=0, sticky=tk.W
+        )
+        self._channel = None
+        self.after(self.RENDER_MS, self._poll)
+
+    def new_channel(self):
+        """新しい実行用のチャネルを作る（以後、前の実行の更新は表示しない）
+
+        ウィジェットには触れないので、ジョブのスレッドから呼んでよい。
+        """
+        channel = ProgressChannel()
+        self._channel = channel
+        return channel
+
+    def _poll(self):
+        """Tkスレッドで定期的に呼ばれ、前回から更新があれば描画する"""
+        try:
+            if not self.winfo_exists():
+                return
+            self._render(self._channel)
+            self.after(self.RENDER_MS, self._poll)
+        except (tk.TclError, RuntimeError):
+            # ウィンドウ破棄済み、またはメインループ終了後
+            pass
+
+    def _render(self, channel):
+        if channel is None:
+            return
+        state = channel.take()
+        if state is None:
+            return
+        try:
+            self.bar["value"] = int(state.fraction * 1000)
+            self.status_var.set(state.describe())
+        except tk.TclError:
+            pass
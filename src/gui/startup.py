@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+起動時間の計測
+
+プロセス開始から各段階（インポート完了・ウィンドウ作成・最初の描画など）までの
+時間と、その段階で新たに読み込まれたモジュールをパッケージ単位で記録する。
+結果はログに出力し、metrics/startup.json に直近の起動分を履歴として残す。
+起動を遅くしないよう、このモジュール自体は標準ライブラリだけを使う。
+"""
+
+import json
+import os
+import sys
+import time
+
+DEFAULT_PATH = os.path.join("metrics", "startup.json")
+HISTORY = 50  # 保持する起動回数
+SLOW_RATIO = 1.5  # 過去の中央値のこの倍率を超えたら遅いとみなす
+
+
+def _top_level(name):
+    return name.split(".", 1)[0]
+
+
+class StartupTimer:
+    """起動の段階ごとの経過時間と読み込まれたモジュールを記録する"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases = []  # [{"phase", "ms", "at_ms", "modules", "packages"}]
+        self._last = self.started_at
+        self._known = set(sys.modules)
+
+    def mark(self, phase):
+        """前回のmark()からここまでを1つの段階として記録"""
+        now = time.perf_counter()
+        loaded = set(sys.modules) - self._known
+        self._known.update(loaded)
+        packages = {}
+        for name in loaded:
+            top = _top_level(name)
+            packages[top] = packages.get(top, 0) + 1
+        self.phases.append(
+            {
+                "phase": phase,
+                "ms": round((now - self._last) * 1000, 1),
+                "at_ms": round((now - self.started_at) * 1000, 1),
+                "modules": len(loaded),
+                "packages": dict(sorted(packages.items(), key=lambda item: -item[1])),
+            }
+        )
+        self._last = now
+
+    @property
+    def total_ms(self):
+        return self.phases[-1]["at_ms"] if self.phases else 0.0
+
+    def report_lines(self, top_packages=5):
+        """ログに出力する起動時間の内訳"""
+        lines = [f"起動時間: {self.total_ms:.0f} ms"]
+        for phase in self.phases:
+            packages = ", ".join(
+                f"{name}({count})" for name, count in list(phase["packages"].items())[:top_packages]
+            )
+            lines.append(
+                f"  {phase['phase']:<14} {phase['ms']:7.1f} ms  "
+                f"モジュール {phase['modules']:>4}  {packages}"
+            )
+        return lines
+
+    def write(self, path=DEFAULT_PATH):
+        """履歴に今回の起動を追加して保存し、過去の中央値との比（なければNone）を返す"""
+        from src.logic.cache import atomic_write_bytes
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                history = json.load(f).get("history", [])
+        except (OSError, ValueError):
+            history = []
+
+        previous = sorted(entry["total_ms"] for entry in history if entry.get("total_ms"))
+        ratio = None
+        if previous:
+            median = previous[len(previous) // 2]
+            ratio = self.total_ms / median if median else None
+
+        history.append(
+            {
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "total_ms": self.total_ms,
+                "phases": self.phases,
+            }
+        )
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        document = {"latest": history[-1], "history": history[-HISTORY:]}
+        atomic_write_bytes(path, json.dumps(document, ensure_ascii=False, indent=1).encode("utf-8"))
+        return ratio
+
+
+# プロセス全体で共有するタイマー（最初にインポートした時点を起点にする）
+startup_timer = StartupTimer()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tkイベントループの応答性モニター
+
+after()で一定間隔のハートビートを予約し、予定より何ms遅れて実行されたか
+（イベントループの遅延）を記録する。あわせてログキューの滞留数、1秒あたりの
+表示件数、プロセスのメモリ使用量（RSS）とCPU使用率を1秒ごとに集計し、
+診断ウィンドウに表示するとともに metrics/ui_metrics.json に書き出す。
+psutilがあればRSS・CPUはpsutilで取得し、なければOSの情報から取得する。
+"""
+
+import json
+import os
+import time
+import tkinter as tk
+from collections import deque
+from tkinter import ttk
+
+from src.logic.cache import atomic_write_bytes
+from src.logic.metrics import percentile
+
+try:
+    import psutil
+except ImportError:  # psutilは任意
+    psutil = None
+
+DEFAULT_METRICS_PATH = os.path.join("metrics", "ui_metrics.json")
+
+
+def _read_rss_bytes():
+    """psutilがない場合のRSS（Linuxのみ。取得できなければNone）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class UiMonitor:
+    """イベントループの遅延・ログ表示の状況・プロセスの使用量を計測する"""
+
+    def __init__(
+        self,
+        root,
+        log_handlers=(),
+        interval_ms=100,
+        sample_seconds=1.0,
+        history=300,
+        metrics_path=DEFAULT_METRICS_PATH,
+        write_seconds=10.0,
+    ):
+        self.root = root
+        self.log_handlers = list(log_handlers)
+        self.interval_ms = interval_ms
+        self.sample_seconds = sample_seconds
+        self.metrics_path = metrics_path
+        self.write_seconds = write_seconds
+        self.lags_ms = deque(maxlen=max(1, int(history * 1000 / interval_ms)))
+        self.samples = deque(maxlen=history)  # 1秒ごとの集計
+        self.max_lag_ms = 0.0
+        self.started_at = None
+        self._after_id = None
+        self._expected = None
+        self._last_sample = None
+        self._last_write = None
+        self._process = psutil.Process() if psutil is not None else None
+
+    def start(self):
+        now = time.perf_counter()
+        self.started_at = now
+        self._last_sample = (now, time.process_time(), self._rendered_total())
+        self._last_write = now
+        if self._process is not None:
+            self._process.cpu_percent(None)  # 初回の呼び出しは基準値の記録のみ
+        self._schedule()
+
+    def stop(self):
+        """ハートビートを止めて最後の集計を書き出す"""
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+        self.write_metrics()
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._beat)
+
+    def _beat(self):
+        now = time.perf_counter()
+        lag_ms = max(0.0, (now - self._expected) * 1000)
+        self.lags_ms.append(lag_ms)
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+        if now - self._last_sample[0] >= self.sample_seconds:
+            self._sample(now)
+        if self.metrics_path and now - self._last_write >= self.write_seconds:
+            self._last_write = now
+            try:
+                self.write_metrics()
+            except OSError:
+                pass
+        self._schedule()
+
+    # ---- 集計 ----
+
+    def _rendered_total(self):
+        return sum(handler.drain_stats["messages"] for handler in self.log_handlers)
+
+    def _queue_depth(self):
+        return sum(handler.log_queue.qsize() for handler in self.log_handlers)
+
+    def _sample(self, now):
+        last_time, last_cpu, last_rendered = self._last_sample
+        cpu_time = time.process_time()
+        rendered = self._rendered_total()
+        elapsed = now - last_time
+
+        if self._process is not None:
+            rss = self._process.memory_info().rss
+            cpu_percent = self._process.cpu_percent(None)
+        else:
+            rss = _read_rss_bytes()
+            cpu_percent = (cpu_time - last_cpu) / elapsed * 100 if elapsed > 0 else 0.0
+
+        beats = max(1, int(self.sample_seconds * 1000 / self.interval_ms))
+        recent = list(self.lags_ms)[-beats:]
+        self.samples.append(
+            {
+                "time": time.strftime("%H:%M:%S"),
+                "lag_max_ms": round(max(recent), 1) if recent else 0.0,
+                "queue_depth": self._queue_depth(),
+                "rendered_per_sec": round((rendered - last_rendered) / elapsed, 1),
+                "rss_mb": round(rss / 1024 / 1024, 1) if rss is not None else None,
+                "cpu_percent": round(cpu_percent, 1),
+            }
+        )
+        self._last_sample = (now, cpu_time, rendered)
+
+    def snapshot(self):
+        """現在の指標（診断ウィンドウ・ファイル出力用）"""
+        ordered = sorted(self.lags_ms)
+        latest = self.samples[-1] if self.samples else {}
+        dropped = sum(handler.log_queue.stats["dropped"] for handler in self.log_handlers)
+        max_depth = max(
+            (handler.log_queue.stats["max_depth"] for handler in self.log_handlers), default=0
+        )
+        return {
+            "uptime_sec": round(time.perf_counter() - self.started_at, 1) if self.started_at else 0.0,
+            "heartbeat_ms": self.interval_ms,
+            "lag_ms": {
+                "last": round(self.lags_ms[-1], 1) if self.lags_ms else 0.0,
+                "p50": round(percentile(ordered, 0.5) or 0.0, 1),
+                "p95": round(percentile(ordered, 0.95) or 0.0, 1),
+                "p99": round(percentile(ordered, 0.99) or 0.0, 1),
+                "max": round(self.max_lag_ms, 1),
+            },
+            "queue_depth": self._queue_depth(),
+            "queue_max_depth": max_depth,
+            "dropped": dropped,
+            "rendered_per_sec": latest.get("rendered_per_sec", 0.0),
+            "rss_mb": latest.get("rss_mb"),
+            "cpu_percent": latest.get("cpu_percent"),
+            "psutil": self._process is not None,
+        }
+
+    def write_metrics(self):
+        if not self.metrics_path:
+            return
+        os.makedirs(os.path.dirname(self.metrics_path) or ".", exist_ok=True)
+        document = dict(self.snapshot(), updated_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+        document["samples"] = list(self.samples)
+        atomic_write_bytes(
+            self.metrics_path,
+            json.dumps(document, ensure_ascii=False, indent=1).encode("utf-8"),
+        )
+
+
+class DiagnosticsWindow:
+    """UiMonitorの指標を1秒ごとに表示する診断ウィンドウ"""
+
+    ROWS = (
+        ("lag", "イベントループ遅延"),
+        ("lag_pct", "遅延 p50 / p95 / p99"),
+        ("queue", "ログキュー滞留（最大）"),
+        ("dropped", "破棄したログ"),
+        ("rendered", "表示件数/秒"),
+        ("rss", "メモリ（RSS）"),
+        ("cpu", "CPU使用率"),
+    )
+
+    def __init__(self, parent, monitor):
+        self.monitor = monitor
+        self.window = tk.Toplevel(parent)
+        self.window.title("診断")
+        self.window.resizable(False, False)
+        frame = ttk.Frame(self.window, padding="10")
+        frame.grid(row=0, column=0)
+
+        self.vars = {}
+        for row, (key, label) in enumerate(self.ROWS):
+            ttk.Label(frame, text=label).grid(row=row, column=0, sticky=tk.W, padx=(0, 15))
+            self.vars[key] = tk.StringVar(value="-")
+            ttk.Label(frame, textvariable=self.vars[key], font=("Consolas", 9)).grid(
+                row=row, column=1, sticky=tk.E
+            )
+        self._after_id = None
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self._refresh()
+
+    def _refresh(self):
+        data = self.monitor.snapshot()
+        lag = data["lag_ms"]
+        self.vars["lag"].set(f"{lag['last']:.1f} ms（最大 {lag['max']:.1f} ms）")
+        self.vars["lag_pct"].set(f"{lag['p50']:.1f} / {lag['p95']:.1f} / {lag['p99']:.1f} ms")
+        self.vars["queue"].set(f"{data['queue_depth']}（{data['queue_max_depth']}）")
+        self.vars["dropped"].set(str(data["dropped"]))
+        self.vars["rendered"].set(f"{data['rendered_per_sec']:.0f}")
+        rss = data["rss_mb"]
+        self.vars["rss"].set(f"{rss:.1f} MB" if rss is not None else "取得できません")
+        cpu = data["cpu_percent"]
+        self.vars["cpu"].set(f"{cpu:.1f} %" if cpu is not None else "-")
+        self._after_id = self.window.after(1000, self._refresh)
+
+    def close(self):
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+        self.window.destroy()
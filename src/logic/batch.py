@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+バッチ処理の実行モード（逐次 / スレッド / プロセスプール）
+
+CPUを使うバッチ処理はGILの影響を受けないようにプロセスプールで分散できる。
+ワーカープロセス内のログは収集して結果と一緒に返し、呼び出し元のロガー
+（window_id付き）にバッチ順で転送する。
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.logic.engine import PipelineCancelled
+
+BATCH_MODES = ("serial", "thread", "process")
+
+
+class CollectedLogger:
+    """ワーカー内でログを記録して後で転送するためのロガー（loguruと同じメソッド名）"""
+
+    def __init__(self):
+        self.records = []  # [(レベル名, メッセージ)]
+
+    def log(self, level, message):
+        self.records.append((level, message))
+
+    def debug(self, message):
+        self.log("DEBUG", message)
+
+    def info(self, message):
+        self.log("INFO", message)
+
+    def success(self, message):
+        self.log("SUCCESS", message)
+
+    def warning(self, message):
+        self.log("WARNING", message)
+
+    def error(self, message):
+        self.log("ERROR", message)
+
+
+def _run_collected(func, batch):
+    """ワーカーで1バッチを実行し、(結果, ログ) を返す（pickle可能なトップレベル関数）"""
+    collected = CollectedLogger()
+    result = func(batch, collected)
+    return result, collected.records
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def run_batches(
+    func,
+    batches,
+    bound_logger,
+    mode="serial",
+    max_workers=None,
+    chunksize=1,
+    executor=None,
+    cancel_event=None,
+    on_progress=None,
+):
+    """バッチを実行して結果をバッチ順のリストで返す
+
+    funcは func(batch, log) の形で呼ばれる。processモードではfuncとbatchは
+    pickle可能である必要がある（モジュールのトップレベル関数）。
+    executorを渡した場合はそれを使い回す（終了はしない）。
+    cancel_eventがセットされると未開始のバッチを取り消してPipelineCancelledを送出する。
+    on_progress(完了したバッチ数) はバッチの結果を受け取るたびに呼ばれる。
+    """
+    if mode not in BATCH_MODES:
+        raise ValueError(f"不明なバッチ実行モードです: {mode}")
+
+    batches = list(batches)
+    if mode == "serial":
+        results = []
+        for batch in batches:
+            _check_cancelled(cancel_event)
+            results.append(func(batch, bound_logger))
+            if on_progress is not None:
+                on_progress(len(results))
+        return results
+
+    if executor is not None:
+        return _map_and_forward(
+            executor, func, batches, bound_logger, chunksize, cancel_event, on_progress
+        )
+
+    workers = min(max_workers or default_workers(), max(1, len(batches)))
+    if mode == "thread":
+        # 同じプロセス内なのでログは収集せず、呼び出し元のロガーにそのまま出す
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return _map_and_forward(
+                pool, func, batches, bound_logger, chunksize, cancel_event, on_progress, live=True
+            )
+
+    # GUIのスレッドを抱えたままforkしないよう、全OSでspawnを使う
+    # （実行のたびにプロセスを起動するので、起動コストより重いバッチ向け）
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    with pool:
+        return _map_and_forward(
+            pool, func, batches, bound_logger, chunksize, cancel_event, on_progress
+        )
+
+
+def _check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise PipelineCancelled()
+
+
+def _run_live(func, batch, bound_logger):
+    """スレッドで1バッチを実行（ログは収集せずにそのまま出す）"""
+    return func(batch, bound_logger), ()
+
+
+def _map_and_forward(
+    executor, func, batches, bound_logger, chunksize, cancel_event, on_progress=None, live=False
+):
+    """バッチ順に結果を受け取り、ワーカーのログを呼び出し元のロガーへ転送"""
+    results = []
+    if live:
+        mapped = executor.map(
+            _run_live, [func] * len(batches), batches, [bound_logger] * len(batches)
+        )
+    else:
+        mapped = executor.map(
+            _run_collected, [func] * len(batches), batches, chunksize=chunksize
+        )
+    try:
+        for result, records in mapped:
+            for level, message in records:
+                bound_logger.log(level, message)
+            results.append(result)
+            if on_progress is not None:
+                on_progress(len(results))
+            _check_cancelled(cancel_event)
+    finally:
+        # 途中で抜けた場合は未開始のバッチを取り消す
+        mapped.close()
+    return results
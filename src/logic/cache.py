@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+入力ファイルの内容ハッシュをキーにしたパイプライン結果のディスクキャッシュ
+
+キーは「入力ファイルの内容ハッシュ + パイプライン名・バージョン + パラメーター」。
+同じファイルはサイズと更新時刻が変わっていなければ再ハッシュしない。
+容量と経過時間でLRU方式に削除する。
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """ファイル内容のSHA-256（チャンク単位で読むのでメモリは一定）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write_bytes(path, data):
+    """一時ファイルに書いてからリネーム（途中でクラッシュしても壊れたファイルを残さない）"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ResultCache:
+    """パイプライン結果のディスクキャッシュ"""
+
+    INDEX_FILE = "hash_index.json"
+
+    def __init__(self, cache_dir="cache", max_bytes=512 * 1024 * 1024, max_age_days=30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._hash_index = None  # {絶対パス: [サイズ, 更新時刻(ns), ハッシュ]}
+        self.stats = {"hits": 0, "misses": 0, "hash_reused": 0, "hashed": 0}
+
+    # ---- キー ----
+
+    def file_digest(self, path):
+        """ファイルの内容ハッシュ（サイズ・更新時刻が同じなら前回の値を使う）"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            index = self._load_hash_index()
+            entry = index.get(path)
+            if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                self.stats["hash_reused"] += 1
+                return entry[2]
+
+        digest = hash_file(path)
+        with self._lock:
+            index = self._load_hash_index()
+            index[path] = [stat.st_size, stat.st_mtime_ns, digest]
+            self.stats["hashed"] += 1
+            self._save_hash_index()
+        return digest
+
+    def make_key(self, pipeline_name, version, input_path, params=None):
+        """キャッシュキーを作成"""
+        payload = {
+            "pipeline": pipeline_name,
+            "version": version,
+            "input": self.file_digest(input_path),
+            "params": params or {},
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    # ---- 取得・保存 ----
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """キャッシュされた値を返す（なければNone）"""
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.stats["misses"] += 1
+            return None
+        # LRU用に最終アクセス時刻として更新時刻を進める
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key, value):
+        """値を保存し、上限を超えた古いエントリを削除"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        atomic_write_bytes(self._entry_path(key), data)
+        self.evict()
+
+    def evict(self):
+        """期限切れのエントリと、容量超過分を古い順に削除"""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        entries = []
+        for name in names:
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days else None
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            if (cutoff is None or mtime >= cutoff) and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    # ---- ハッシュのインデックス ----
+
+    def _load_hash_index(self):
+        if self._hash_index is None:
+            try:
+                with open(os.path.join(self.cache_dir, self.INDEX_FILE), encoding="utf-8") as f:
+                    self._hash_index = json.load(f)
+            except (OSError, ValueError):
+                self._hash_index = {}
+        return self._hash_index
+
+    def _save_hash_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            data = json.dumps(self._hash_index, ensure_ascii=False).encode("utf-8")
+            atomic_write_bytes(os.path.join(self.cache_dir, self.INDEX_FILE), data)
+        except OSError as e:
+            print(f"Cache index write error: {e}")
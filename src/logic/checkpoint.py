@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ステップ単位のチェックポイント保存
+
+ステップの出力をローカルに保存しておき、失敗・中止したパイプラインを
+最初の未完了ステップから再開できるようにする。キーには上流ステップのキーと
+入力のフィンガープリントが含まれるため、上流の入力が変われば自動的に無効になる。
+"""
+
+import hashlib
+import os
+import pickle
+
+from src.logic.cache import atomic_write_bytes
+
+
+def fingerprint(value):
+    """値のフィンガープリント（pickleできない値はreprで代用）"""
+    try:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        data = repr(value).encode("utf-8", "replace")
+    return hashlib.sha256(data).hexdigest()
+
+
+def step_key(graph_name, salt, step_name, parts):
+    """ステップのチェックポイントキー"""
+    digest = hashlib.sha256()
+    for part in (graph_name, salt, step_name, *parts):
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CheckpointStore:
+    """ステップ出力のチェックポイントを保存するディスクストア"""
+
+    def __init__(self, base_dir="checkpoints"):
+        self.base_dir = base_dir
+
+    def _path(self, graph_name, key):
+        return os.path.join(self.base_dir, graph_name, f"{key}.pkl")
+
+    def load(self, graph_name, key):
+        """保存済みの出力を返す（なければ (False, None)）"""
+        try:
+            with open(self._path(graph_name, key), "rb") as f:
+                return True, pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False, None
+
+    def save(self, graph_name, key, outputs):
+        path = self._path(graph_name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write_bytes(path, pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def discard(self, graph_name, keys):
+        """完了したパイプラインのチェックポイントを削除"""
+        for key in keys:
+            try:
+                os.remove(self._path(graph_name, key))
+            except OSError:
+                pass
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パイプラインのコマンドライン実行（GUIなし）
+
+複数の入力ファイル（フォルダ指定も可）をプロセスプールで並列に処理し、
+進捗とログを1行1イベントのJSON（JSONL）として標準出力に書き出す。
+Tkを読み込まないので、ディスプレイのないサーバーでもそのまま実行できる。
+
+    python -m src.logic.cli pipeline1 data/*.xlsx --workers 4
+    python -m src.logic.cli pipeline2 config1.json config2.json
+
+パイプライン1の結果は入力ごとに <--output-dir（既定: results）>/<相対パス> に保存する。
+相対パスはフォルダ指定ならそのフォルダから、ファイル指定ならファイル名から拡張子を
+除いたもの。2つの入力の保存先が重なる場合は何も処理せず引数エラーにする。
+
+終了コード: 0=すべて成功 / 1=失敗した入力あり / 2=引数エラー / 130=中断
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from loguru import logger
+
+from src.logic.batch import default_workers
+from src.logic.folder_batch import (
+    DEFAULT_PATTERNS,
+    RESULTS_DIR,
+    parse_patterns,
+    plan_outputs,
+    scan_folder,
+)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+PIPELINES = ("pipeline1", "pipeline2")
+
+# ワーカープロセス側の状態（_init_workerで設定）
+_worker_events = None
+_worker_cancel = None
+_current_input = None  # 処理中の入力（ワーカーは同時に1入力だけを処理する）
+
+
+class EventWriter:
+    """イベントをJSONLで書き出す（複数スレッドから呼ばれても行が混ざらない）"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        fields = {"event": event, "time": round(time.time(), 3), **fields}
+        line = json.dumps(fields, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def _log_event(record):
+    """loguruのレコードをlogイベントの辞書に変換"""
+    return {
+        "input": record["extra"].get("input", _current_input),
+        "level": record["level"].name,
+        "message": record["message"],
+    }
+
+
+def _init_worker(events, cancel_event):
+    """ワーカープロセスの初期化（ログはキュー経由で親プロセスへ送る）"""
+    global _worker_events, _worker_cancel
+    _worker_events = events
+    _worker_cancel = cancel_event
+    # Ctrl+Cは親プロセスが受けてcancel_eventで止める
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logger.remove()
+    logger.add(lambda message: events.put(_log_event(message.record)), level="DEBUG")
+
+
+def run_input(pipeline, path, params, cancel_event=None):
+    """1入力を処理して結果の辞書を返す（pickle可能なトップレベル関数）"""
+    from src.logic.engine import PipelineCancelled
+    from src.logic.pipeline import process_data, process_data2
+
+    global _current_input
+    if cancel_event is None:
+        cancel_event = _worker_cancel
+    start = time.perf_counter()
+    # パイプライン内のステップは別スレッドで動くので、contextvarsではなく
+    # プロセス内の変数で入力を記録する
+    _current_input = path
+    try:
+        if pipeline == "pipeline1":
+            result = process_data(
+                window_id="cli", input_path=path, cancel_event=cancel_event, **params
+            )
+        else:
+            result = process_data2(
+                window_id="cli", input_path=path, cancel_event=cancel_event, **params
+            )
+    except PipelineCancelled:
+        return {"input": path, "ok": False, "cancelled": True, "elapsed": round(time.perf_counter() - start, 3)}
+    except Exception as e:
+        return {"input": path, "ok": False, "error": str(e), "elapsed": round(time.perf_counter() - start, 3)}
+    finally:
+        _current_input = None
+
+    outcome = {"input": path, "ok": True, "elapsed": round(time.perf_counter() - start, 3)}
+    saved = result.values.get("saved")
+    if isinstance(saved, dict):
+        outcome.update(rows=saved.get("rows"), output=saved.get("path"))
+    return outcome
+
+
+def collect_inputs(paths, patterns=DEFAULT_PATTERNS, recursive=False):
+    """入力の [(パス, 基準フォルダ)]（フォルダは中のファイルに展開）
+
+    基準フォルダは保存先の相対パスの起点で、フォルダ指定ならそのフォルダ、
+    ファイル指定ならファイルのあるフォルダ。
+    """
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            inputs.extend((file, path) for file, _ in scan_folder(path, patterns, recursive))
+        else:
+            inputs.append((path, os.path.dirname(path) or "."))
+    return inputs
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m src.logic.cli",
+        description="パイプラインをGUIなしで実行し、進捗をJSONLで標準出力に書き出します",
+    )
+    parser.add_argument("pipeline", choices=PIPELINES, help="実行するパイプライン")
+    parser.add_argument("inputs", nargs="+", help="入力ファイルまたはフォルダ")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="並列数（既定: CPU数-1）")
+    parser.add_argument("--pattern", default="; ".join(DEFAULT_PATTERNS), help="フォルダ指定時のファイルパターン")
+    parser.add_argument("-r", "--recursive", action="store_true", help="フォルダをサブフォルダまで走査する")
+    parser.add_argument("--level", default="INFO", help="出力するログの最低レベル（既定: INFO）")
+
+    group = parser.add_argument_group("パイプライン1")
+    group.add_argument("--model", default=None)
+    group.add_argument("--sheet", default=None)
+    group.add_argument("--columns", default=None, help="読み込む列（カンマ区切り）")
+    group.add_argument("--chunk-size", type=int, default=None)
+    group.add_argument(
+        "--output-dir",
+        default=RESULTS_DIR,
+        help="保存先フォルダ（入力ごとに相対パスのサブフォルダを作る。既定: results）",
+    )
+
+    group = parser.add_argument_group("パイプライン2")
+    group.add_argument(
+        "--batch-mode",
+        choices=("serial", "thread", "process"),
+        default="serial",
+        help="メイン処理のバッチ実行モード（入力単位で並列化するため既定はserial）",
+    )
+    return parser
+
+
+def pipeline_params(args):
+    """引数からパイプラインに渡すパラメーターを作る"""
+    if args.pipeline == "pipeline1":
+        params = {"model": args.model, "sheet": args.sheet, "output_dir": args.output_dir}
+        if args.columns:
+            params["columns"] = [name.strip() for name in args.columns.split(",") if name.strip()]
+        if args.chunk_size:
+            params["chunk_size"] = args.chunk_size
+        return params
+    return {"batch_mode": args.batch_mode}
+
+
+def _forward_events(events, writer, level_no):
+    """ワーカーからのログを標準出力へ転送（Noneを受け取ると終了）"""
+    while True:
+        item = events.get()
+        if item is None:
+            return
+        if logger.level(item["level"]).no >= level_no:
+            writer.emit("log", **item)
+
+
+def input_params(pipeline, inputs, params):
+    """入力ごとのパラメーター {パス: params}（保存先が重なる場合はValueError）"""
+    if pipeline != "pipeline1":
+        return {path: params for path, _ in inputs}
+    outputs, conflicts = plan_outputs(inputs, params.get("output_dir") or RESULTS_DIR)
+    if conflicts:
+        output_dir, paths = next(iter(conflicts.items()))
+        raise ValueError(f"保存先が重なる入力があります: {', '.join(paths)} → {output_dir}")
+    return {path: dict(params, output_dir=outputs[path]) for path, _ in inputs}
+
+
+def run(args, writer):
+    """入力を並列に処理し、終了コードを返す"""
+    collected = collect_inputs(args.inputs, parse_patterns(args.pattern), args.recursive)
+    if not collected:
+        writer.emit("error", message="処理対象のファイルがありません")
+        return EXIT_USAGE
+    if len({os.path.normcase(os.path.abspath(path)) for path, _ in collected}) != len(collected):
+        writer.emit("error", message="同じ入力ファイルが複数回指定されています")
+        return EXIT_USAGE
+    try:
+        per_input = input_params(args.pipeline, collected, pipeline_params(args))
+    except ValueError as e:
+        writer.emit("error", message=str(e))
+        return EXIT_USAGE
+
+    inputs = [path for path, _ in collected]
+    workers = max(1, min(args.workers or default_workers(), len(inputs)))
+    level_no = logger.level(args.level.upper()).no
+    writer.emit("start", pipeline=args.pipeline, inputs=len(inputs), workers=workers)
+
+    context = multiprocessing.get_context("spawn")
+    events = context.Queue()
+    cancel_event = context.Event()
+    forwarder = threading.Thread(
+        target=_forward_events, args=(events, writer, level_no), daemon=True
+    )
+    forwarder.start()
+
+    started = time.perf_counter()
+    done = failed = 0
+    interrupted = False
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(events, cancel_event),
+    )
+    pending = {}
+    remaining = iter(inputs)
+    try:
+        while True:
+            # 処理中の件数をワーカー数の2倍までに抑えて投入
+            while len(pending) < workers * 2 and not cancel_event.is_set():
+                path = next(remaining, None)
+                if path is None:
+                    break
+                pending[executor.submit(run_input, args.pipeline, path, per_input[path])] = path
+                writer.emit("queued", input=path)
+            if not pending:
+                break
+            try:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            except KeyboardInterrupt:
+                interrupted = True
+                cancel_event.set()
+                writer.emit("cancelling", running=len(pending))
+                continue
+            for future in finished:
+                path = pending.pop(future)
+                try:
+                    outcome = future.result()
+                except Exception as e:  # ワーカープロセスの異常終了など
+                    outcome = {"input": path, "ok": False, "error": str(e)}
+                done += 1
+                if not outcome["ok"]:
+                    failed += 1
+                writer.emit("result", done=done, total=len(inputs), **outcome)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+        events.put(None)
+        forwarder.join()
+        events.close()
+
+    elapsed = time.perf_counter() - started
+    writer.emit(
+        "summary",
+        total=len(inputs),
+        done=done,
+        failed=failed,
+        cancelled=interrupted,
+        elapsed=round(elapsed, 3),
+        files_per_second=round(done / elapsed, 3) if elapsed > 0 else 0.0,
+    )
+    if interrupted:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # 親プロセスのログ（ここではほとんど出ない）もJSONLで出す
+    writer = EventWriter()
+    logger.remove()
+    try:
+        logger.add(
+            lambda message: writer.emit("log", **_log_event(message.record)),
+            level=args.level.upper(),
+        )
+        return run(args, writer)
+    except ValueError as e:
+        writer.emit("error", message=str(e))
+        return EXIT_USAGE
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列指向のバイナリ形式による結果の保存と読み込み
+
+列ごとに固定長のバイナリファイル（数値列）または「UTF-8バイト列 + オフセット」
+（文字列列）として追記し、最後にmanifest.jsonを書く。保存は一時ディレクトリに行い、
+完了後にリネームするので、途中でクラッシュしても中途半端な結果は残らない。
+読み込みはnumpy.memmapでメモリマップするため、コピーなしで参照できる。
+"""
+
+import errno
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+REPLACE_ATTEMPTS = 3  # 保存先の置き換えを試みる回数
+WIDEN_SLICE = 65536  # 列の型を広げる際に読み直す行数の単位
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+_to_float = np.frompyfunc(lambda value: float(value) if _is_number(value) else np.nan, 1, 1)
+_is_number_or_null = np.frompyfunc(lambda value: value is None or _is_number(value), 1, 1)
+
+
+def _numeric_dtype(array):
+    """数値列として保存できる配列ならそのdtype（オブジェクト配列は数値とNoneだけならfloat64）"""
+    if array.dtype.kind in "biuf":
+        return array.dtype
+    if array.dtype.kind == "O" and _is_number_or_null(array).astype(bool).all():
+        return np.dtype(np.float64)
+    return None
+
+
+def _safe_name(name):
+    """列名からファイル名を作る（パス区切りなどを除く）"""
+    cleaned = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(name))
+    return cleaned or "column"
+
+
+class _NumericColumnWriter:
+    def __init__(self, directory, file_stem, dtype):
+        self.directory = directory
+        self.file_stem = file_stem
+        self.dtype = np.dtype(dtype)
+        self.file = f"{file_stem}.bin"
+        self._f = open(os.path.join(directory, self.file), "wb")
+        self.length = 0
+
+    def accepts(self, array):
+        """型を変えずに追記できるか（intの列にfloat、数値の列に文字列などはFalse）"""
+        dtype = _numeric_dtype(array)
+        return dtype is not None and np.can_cast(dtype, self.dtype, casting="same_kind")
+
+    def append(self, array):
+        if array.dtype.kind == "O":
+            # 数値とNoneだけのオブジェクト配列（NoneはNaN）
+            array = _to_float(array).astype(np.float64)
+        data = np.ascontiguousarray(array, dtype=self.dtype)
+        data.tofile(self._f)
+        self.length += len(data)
+
+    def detach(self):
+        """書き込みを終えてファイルを退避し、退避先のパスを返す（型を広げる時用）"""
+        self._f.close()
+        path = os.path.join(self.directory, self.file)
+        moved = f"{path}.widen"
+        os.replace(path, moved)
+        return moved
+
+    def close(self):
+        self._f.close()
+
+    def describe(self):
+        return {
+            "kind": "numeric",
+            "dtype": self.dtype.str,
+            "file": self.file,
+            "length": self.length,
+        }
+
+
+class _StringColumnWriter:
+    def __init__(self, directory, file_stem):
+        self.file = f"{file_stem}.str.bin"
+        self.offsets_file = f"{file_stem}.offsets.bin"
+        self.nulls_file = f"{file_stem}.nulls.bin"
+        self._data = open(os.path.join(directory, self.file), "wb")
+        self._offsets = open(os.path.join(directory, self.offsets_file), "wb")
+        self._nulls = open(os.path.join(directory, self.nulls_file), "wb")
+        self._position = 0
+        np.zeros(1, dtype=np.int64).tofile(self._offsets)
+        self.length = 0
+
+    def append(self, array):
+        if array.dtype.kind == "f":
+            nulls = np.isnan(array)
+        else:
+            nulls = np.equal(array, None)
+        encoded = [
+            b"" if null else str(value).encode("utf-8")
+            for value, null in zip(array.tolist(), nulls.tolist())
+        ]
+        lengths = np.fromiter((len(value) for value in encoded), dtype=np.int64, count=len(encoded))
+        (np.cumsum(lengths) + self._position).tofile(self._offsets)
+        self._data.write(b"".join(encoded))
+        self._position += int(lengths.sum())
+        nulls.astype(np.bool_).tofile(self._nulls)
+        self.length += len(array)
+
+    def close(self):
+        for f in (self._data, self._offsets, self._nulls):
+            f.close()
+
+    def describe(self):
+        return {
+            "kind": "string",
+            "file": self.file,
+            "offsets": self.offsets_file,
+            "nulls": self.nulls_file,
+            "length": self.length,
+        }
+
+
+class ColumnarWriter:
+    """列指向形式でバッチを追記し、close()で確定する
+
+    列の型は最初のバッチで決まる。後のバッチで型が変わった場合（数値の列に文字列、
+    intの列にfloatなど）は、それまでの値を書き直して列の型を広げる（文字列列か
+    float64列）。値をNaNに置き換えることはない。広げた列はwidenedに記録する。
+    with文で使うと、例外時は一時ディレクトリを削除して既存の結果を残す。
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = os.path.abspath(path)
+        self.metadata = metadata or {}
+        self._tmp = f"{self.path}.tmp-{os.getpid()}-{int(time.time() * 1000)}"
+        os.makedirs(self._tmp)
+        self._columns = {}  # {列名: writer}
+        self.row_count = 0
+        self.widened = {}  # {列名: 変更後の型}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _writer_for(self, name, array):
+        writer = self._columns.get(name)
+        if writer is None:
+            stem = f"{len(self._columns):03d}_{_safe_name(name)}"
+            if array.dtype.kind in "biuf":
+                writer = _NumericColumnWriter(self._tmp, stem, array.dtype)
+            else:
+                writer = _StringColumnWriter(self._tmp, stem)
+            self._columns[name] = writer
+        elif isinstance(writer, _NumericColumnWriter) and not writer.accepts(array):
+            writer = self._widen(name, writer, array)
+        return writer
+
+    def _widen(self, name, writer, array):
+        """列の型を広げ、それまでに書いた値を新しい型で書き直す"""
+        moved = writer.detach()
+        if _numeric_dtype(array) is not None:
+            widened = _NumericColumnWriter(
+                self._tmp, writer.file_stem, np.promote_types(writer.dtype, np.float64)
+            )
+            self.widened[name] = widened.dtype.str
+        else:
+            widened = _StringColumnWriter(self._tmp, writer.file_stem)
+            self.widened[name] = "string"
+        self._columns[name] = widened
+        data = _memmap(moved, writer.dtype, writer.length)
+        for start in range(0, writer.length, WIDEN_SLICE):
+            widened.append(np.array(data[start : start + WIDEN_SLICE]))
+        del data
+        os.remove(moved)
+        return widened
+
+    def write_batch(self, batch):
+        """{列名: 配列} のバッチを追記（全列同じ行数であること）"""
+        lengths = {len(array) for array in batch.values()}
+        if len(lengths) > 1:
+            raise ValueError("バッチ内の列の行数が揃っていません")
+        if self._columns and set(batch) != set(self._columns):
+            raise ValueError("バッチの列構成が前のバッチと異なります")
+        for name, array in batch.items():
+            self._writer_for(name, np.asarray(array)).append(np.asarray(array))
+        self.row_count += lengths.pop() if lengths else 0
+
+    def close(self):
+        """manifestを書いて一時ディレクトリを本来のパスにリネーム"""
+        for writer in self._columns.values():
+            writer.close()
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "row_count": self.row_count,
+            "columns": {name: writer.describe() for name, writer in self._columns.items()},
+            "widened": self.widened,
+            "metadata": self.metadata,
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with open(os.path.join(self._tmp, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # 既存の結果は退避してから置き換える（Windowsでは既存ディレクトリへのreplaceが失敗するため）。
+        # 退避から置き換えまでの間に他のプロセスが同じ保存先に書いた場合（ENOTEMPTY）は
+        # その結果も退避してやり直す
+        backups = []
+        try:
+            for attempt in range(REPLACE_ATTEMPTS):
+                if os.path.exists(self.path):
+                    backup = f"{self.path}.old-{os.getpid()}-{int(time.time() * 1000)}-{attempt}"
+                    try:
+                        os.replace(self.path, backup)
+                        backups.append(backup)
+                    except FileNotFoundError:
+                        pass  # 他のプロセスが先に退避した
+                try:
+                    os.replace(self._tmp, self.path)
+                    break
+                except OSError as e:
+                    if e.errno not in (errno.ENOTEMPTY, errno.EEXIST) or attempt == REPLACE_ATTEMPTS - 1:
+                        raise
+        except OSError:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+            raise
+        finally:
+            for backup in backups:
+                shutil.rmtree(backup, ignore_errors=True)
+        return self.path
+
+    def abort(self):
+        for writer in self._columns.values():
+            try:
+                writer.close()
+            except OSError:
+                pass
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+class StringColumn:
+    """メモリマップした文字列列（要素にアクセスした時だけデコード）"""
+
+    def __init__(self, data, offsets, nulls):
+        self._data = data
+        self._offsets = offsets
+        self.nulls = nulls
+
+    def __len__(self):
+        return len(self.nulls)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if self.nulls[index]:
+            return None
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return bytes(self._data[start:end]).decode("utf-8")
+
+    def to_array(self):
+        """オブジェクト配列として取り出す（コピーが発生する）"""
+        return np.array([self[i] for i in range(len(self))], dtype=object)
+
+
+def _memmap(path, dtype, length):
+    if length == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(length,))
+
+
+class ColumnarResult:
+    """保存済みの結果（列はメモリマップで参照）"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.row_count = self.manifest["row_count"]
+        self.metadata = self.manifest.get("metadata", {})
+        self.columns = {}
+        for name, info in self.manifest["columns"].items():
+            if info["kind"] == "numeric":
+                self.columns[name] = _memmap(
+                    os.path.join(path, info["file"]), np.dtype(info["dtype"]), info["length"]
+                )
+            else:
+                data_size = os.path.getsize(os.path.join(path, info["file"]))
+                self.columns[name] = StringColumn(
+                    _memmap(os.path.join(path, info["file"]), np.uint8, data_size),
+                    _memmap(os.path.join(path, info["offsets"]), np.int64, info["length"] + 1),
+                    _memmap(os.path.join(path, info["nulls"]), np.bool_, info["length"]),
+                )
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+
+def open_result(path):
+    """保存済みの結果を開く"""
+    return ColumnarResult(path)
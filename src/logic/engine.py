@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ステップグラフ型のパイプライン実行エンジン
+
+各ステップは入力名・出力名を宣言した関数として登録する。
+依存関係が満たされたステップから順にワーカープールで実行するため、
+互いに独立したステップは並行に動き、全体の所要時間はクリティカルパスになる。
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from loguru import logger
+
+from src.logic.checkpoint import fingerprint, step_key
+from src.logic.metrics import span_recorder
+from src.logic.progress import (
+    RUN_FINISHED,
+    RUN_STARTED,
+    STEP_FINISHED,
+    STEP_STARTED,
+    ProgressEvent,
+    StepProgress,
+)
+
+
+class PipelineCancelled(Exception):
+    """キャンセル要求によりパイプラインを中断した場合の例外"""
+
+
+class StepError(Exception):
+    """ステップの実行に失敗した場合の例外（元の例外は__cause__に入る）"""
+
+    def __init__(self, step_name, error):
+        super().__init__(f"{step_name}: {error}")
+        self.step_name = step_name
+        self.error = error
+
+    def __reduce__(self):
+        # 既定のpickleはself.args（整形済みの1引数）で復元しようとして失敗するため
+        return (type(self), (self.step_name, self.error))
+
+
+class Step:
+    """パイプラインの1ステップ
+
+    funcは func(ctx, **inputs) の形で呼ばれる。
+    出力が1つの場合は戻り値をそのまま、複数の場合はタプルで返す。
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), after=(), label=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.after = tuple(after)  # データの受け渡しがない順序依存
+        self.label = label or name
+
+
+class StepContext:
+    """ステップ関数に渡す実行コンテキスト"""
+
+    def __init__(self, window_id, bound_logger, params=None, cancel_event=None, progress=None):
+        self.window_id = window_id
+        self.logger = bound_logger
+        self.params = params or {}
+        self.cancel_event = cancel_event
+        self.progress = progress  # StepProgress（進捗の通知先がない場合はNone）
+
+    def for_step(self, channel, pipeline, step):
+        """ステップ専用のコンテキスト（件数の報告先をステップごとに分ける）"""
+        progress = StepProgress(channel, pipeline, step.name) if channel is not None else None
+        return StepContext(self.window_id, self.logger, self.params, self.cancel_event, progress)
+
+    def report_progress(self, done, total=None, unit="件"):
+        """処理件数を報告（間引かれるので件数が変わるたびに呼んでよい）"""
+        if self.progress is not None:
+            self.progress.update(done, total, unit)
+
+    @property
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        """キャンセル要求があればPipelineCancelledを送出（長いステップ内で呼ぶ）"""
+        if self.cancelled:
+            raise PipelineCancelled()
+
+
+class StepTiming:
+    """ステップの実行時間（パイプライン開始からの相対秒）"""
+
+    __slots__ = ("name", "label", "start", "end")
+
+    def __init__(self, name, label, start, end):
+        self.name = name
+        self.label = label
+        self.start = start
+        self.end = end
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class RunResult:
+    """パイプラインの実行結果"""
+
+    def __init__(self, values, timings, elapsed):
+        self.values = values  # {出力名: 値}
+        self.timings = timings  # {ステップ名: StepTiming}
+        self.elapsed = elapsed  # 全体の経過時間（秒）
+
+    @property
+    def total_step_time(self):
+        """全ステップの所要時間の合計（逐次実行した場合の目安）"""
+        return sum(timing.duration for timing in self.timings.values())
+
+
+class StepGraph:
+    """ステップの依存グラフ"""
+
+    def __init__(self, name):
+        self.name = name
+        self.steps = {}
+
+    def add_step(self, step):
+        if step.name in self.steps:
+            raise ValueError(f"ステップ名が重複しています: {step.name}")
+        self.steps[step.name] = step
+        return step
+
+    def step(self, name=None, inputs=(), outputs=(), after=(), label=None):
+        """関数をステップとして登録するデコレーター"""
+
+        def decorator(func):
+            self.add_step(
+                Step(name or func.__name__, func, inputs, outputs, after, label)
+            )
+            return func
+
+        return decorator
+
+    def dependencies(self, initial_names=()):
+        """各ステップが依存するステップ名の集合を返す（不足・循環があれば例外）"""
+        producers = {}
+        for step in self.steps.values():
+            for output in step.outputs:
+                if output in producers:
+                    raise ValueError(f"出力名が重複しています: {output}")
+                producers[output] = step.name
+
+        deps = {}
+        for step in self.steps.values():
+            required = set()
+            for name in step.inputs:
+                if name in producers:
+                    required.add(producers[name])
+                elif name not in initial_names:
+                    raise ValueError(f"{step.name}の入力 '{name}' を出力するステップがありません")
+            for name in step.after:
+                if name not in self.steps:
+                    raise ValueError(f"{step.name}が依存する '{name}' は未登録のステップです")
+                required.add(name)
+            deps[step.name] = required
+
+        # 循環チェック（トポロジカルソート）
+        remaining = {name: set(required) for name, required in deps.items()}
+        while remaining:
+            ready = [name for name, required in remaining.items() if not required]
+            if not ready:
+                raise ValueError(f"ステップの依存関係が循環しています: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for required in remaining.values():
+                required.difference_update(ready)
+        return deps
+
+    def run(
+        self,
+        window_id="main",
+        initial=None,
+        params=None,
+        max_workers=4,
+        cancel_event=None,
+        checkpoints=None,
+        checkpoint_salt="",
+        fingerprints=None,
+        progress=None,
+    ):
+        """依存関係に従ってステップを実行し、RunResultを返す
+
+        cancel_eventがセットされると新しいステップを開始せず、実行中のステップの
+        終了を待ってPipelineCancelledを送出する。
+        checkpoints（CheckpointStore）を渡すと各ステップの出力を保存し、前回失敗・
+        中止した実行の完了済みステップはチェックポイントから復元する。
+        fingerprintsで初期値のフィンガープリント（ファイルの内容ハッシュなど）を指定できる。
+        progress（ProgressChannel）を渡すとステップの開始・完了と処理件数を通知する。
+        """
+        if progress is not None:
+            progress.publish(ProgressEvent(RUN_STARTED, self.name, total=len(self.steps)))
+        status = "failed"
+        try:
+            with span_recorder.span("pipeline_run", pipeline=self.name):
+                result = self._run(
+                    window_id,
+                    initial,
+                    params,
+                    max_workers,
+                    cancel_event,
+                    checkpoints,
+                    checkpoint_salt,
+                    fingerprints,
+                    progress,
+                )
+            status = "success"
+            return result
+        except PipelineCancelled:
+            status = "cancelled"
+            raise
+        finally:
+            if progress is not None:
+                progress.publish(ProgressEvent(RUN_FINISHED, self.name, status=status))
+
+    def _run(
+        self,
+        window_id,
+        initial,
+        params,
+        max_workers,
+        cancel_event,
+        checkpoints,
+        checkpoint_salt,
+        fingerprints,
+        progress,
+    ):
+        values = dict(initial or {})
+        deps = self.dependencies(values.keys())
+        bound_logger = logger.bind(window_id=window_id)
+        ctx = StepContext(window_id, bound_logger, params, cancel_event)
+
+        timings = {}
+        done = set()
+        pending = {}  # Future -> Step
+        step_keys = {}  # {ステップ名: チェックポイントキー}
+        if checkpoints is not None:
+            initial_fingerprints = {name: fingerprint(value) for name, value in values.items()}
+            initial_fingerprints.update(fingerprints or {})
+        run_start = time.perf_counter()
+
+        def publish(kind, step, duration=None):
+            if progress is not None:
+                progress.publish(
+                    ProgressEvent(kind, self.name, step=step.name, label=step.label, duration=duration)
+                )
+
+        def run_step(step, kwargs):
+            start = time.perf_counter()
+            bound_logger.info(f"{step.label}を開始")
+            publish(STEP_STARTED, step)
+            with span_recorder.span("pipeline_step", pipeline=self.name, step=step.name):
+                result = step.func(ctx.for_step(progress, self.name, step), **kwargs)
+            end = time.perf_counter()
+            bound_logger.success(f"{step.label}完了 ({end - start:.2f}秒)")
+            publish(STEP_FINISHED, step, end - start)
+            return result, start - run_start, end - run_start
+
+        def make_step_key(step):
+            parts = [step_keys[name] for name in sorted(deps[step.name])]
+            parts += [
+                f"{name}={initial_fingerprints[name]}"
+                for name in step.inputs
+                if name in initial_fingerprints
+            ]
+            return step_key(self.name, checkpoint_salt, step.name, parts)
+
+        def restore(step):
+            """チェックポイントがあれば出力を復元してTrueを返す"""
+            found, result = checkpoints.load(self.name, step_keys[step.name])
+            if not found:
+                return False
+            self._store_outputs(step, result, values)
+            now = time.perf_counter() - run_start
+            timings[step.name] = StepTiming(step.name, step.label, now, now)
+            done.add(step.name)
+            bound_logger.info(f"{step.label}: チェックポイントから復元しました")
+            publish(STEP_FINISHED, step, 0.0)
+            return True
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"pipeline-{self.name}"
+        ) as executor:
+
+            def submit_ready():
+                restored = True
+                while restored and not ctx.cancelled:
+                    restored = False
+                    submitted = {step.name for step in pending.values()}
+                    for name, step in self.steps.items():
+                        if name in done or name in submitted or not deps[name] <= done:
+                            continue
+                        if checkpoints is not None:
+                            step_keys[name] = make_step_key(step)
+                            if restore(step):
+                                restored = True
+                                continue
+                        kwargs = {key: values[key] for key in step.inputs}
+                        pending[executor.submit(run_step, step, kwargs)] = step
+
+            submit_ready()
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = pending.pop(future)
+                    try:
+                        result, start, end = future.result()
+                    except PipelineCancelled:
+                        for other in pending:
+                            other.cancel()
+                        raise
+                    except Exception as e:
+                        for other in pending:
+                            other.cancel()
+                        raise StepError(step.label, e) from e
+                    self._store_outputs(step, result, values)
+                    timings[step.name] = StepTiming(step.name, step.label, start, end)
+                    done.add(step.name)
+                    if checkpoints is not None:
+                        try:
+                            checkpoints.save(self.name, step_keys[step.name], result)
+                        except Exception as e:
+                            bound_logger.warning(
+                                f"{step.label}: チェックポイントの保存に失敗しました: {str(e)}"
+                            )
+                submit_ready()
+
+            if ctx.cancelled and len(done) < len(self.steps):
+                raise PipelineCancelled()
+
+        if checkpoints is not None:
+            # 全ステップが完了したのでチェックポイントは不要
+            checkpoints.discard(self.name, step_keys.values())
+
+        return RunResult(values, timings, time.perf_counter() - run_start)
+
+    @staticmethod
+    def _store_outputs(step, result, values):
+        if not step.outputs:
+            return
+        if len(step.outputs) == 1:
+            values[step.outputs[0]] = result
+            return
+        if len(result) != len(step.outputs):
+            raise ValueError(
+                f"{step.name}の戻り値の数が出力の宣言と一致しません: {len(result)}"
+            )
+        values.update(zip(step.outputs, result))
+
+
+def log_timing_summary(bound_logger, result):
+    """ステップごとの所要時間をログに出力"""
+    for timing in sorted(result.timings.values(), key=lambda t: t.start):
+        bound_logger.debug(
+            f"  {timing.label}: {timing.duration:.2f}秒 "
+            f"(開始 +{timing.start:.2f}秒)"
+        )
+    bound_logger.info(
+        f"所要時間: {result.elapsed:.2f}秒 "
+        f"(ステップ合計 {result.total_step_time:.2f}秒)"
+    )
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Excelファイルのストリーミング読み込み
+
+openpyxlの読み取り専用モードで行を順に読み、固定行数ごとの列指向チャンク
+（{列名: 値のリスト}）として返す。シート・列を指定すると不要な列は保持しないため、
+シートの大きさに関係なくメモリ使用量はチャンクサイズ分で一定になる。
+"""
+
+import os
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def is_excel_file(path):
+    return bool(path) and os.path.splitext(path)[1].lower() in EXCEL_EXTENSIONS
+
+
+def _load_workbook(path):
+    """読み取り専用でワークブックを開く（openpyxlは必要な時だけ読み込む）"""
+    if os.path.splitext(path)[1].lower() == ".xls":
+        raise ValueError("旧形式の.xlsファイルには対応していません。.xlsxで保存し直してください")
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ImportError("Excelファイルの読み込みにはopenpyxlが必要です") from e
+    return load_workbook(path, read_only=True, data_only=True)
+
+
+class ExcelChunkSource:
+    """Excelシートを列指向チャンクで読み出すソース
+
+    読み込み条件だけを保持し、chunks()を呼ぶたびにファイルを先頭から読む
+    （pickle可能なのでキャッシュやチェックポイントにもそのまま保存できる）。
+    """
+
+    def __init__(self, path, sheet=None, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, header_row=1):
+        self.path = path
+        self.sheet = sheet
+        self.columns = list(columns) if columns else None
+        self.chunk_size = chunk_size
+        self.header_row = header_row
+        # scan()・inspect()で設定される情報（シート名はchunks()でも設定）
+        self.sheet_name = None
+        self.column_names = None
+        self.row_count = None
+        self.estimated_rows = None
+
+    def _open_sheet(self, workbook):
+        if self.sheet is None:
+            return workbook.worksheets[0]
+        if isinstance(self.sheet, int):
+            return workbook.worksheets[self.sheet]
+        if self.sheet not in workbook.sheetnames:
+            raise ValueError(f"シートが見つかりません: {self.sheet}")
+        return workbook[self.sheet]
+
+    def _projection(self, header):
+        """読み込む列の (列名, ヘッダー内の位置) リスト"""
+        names = [
+            str(value) if value is not None else f"列{index + 1}"
+            for index, value in enumerate(header)
+        ]
+        if self.columns is None:
+            return list(zip(names, range(len(names))))
+        positions = {name: index for index, name in enumerate(names)}
+        missing = [name for name in self.columns if name not in positions]
+        if missing:
+            raise ValueError(f"列が見つかりません: {', '.join(missing)}")
+        return [(name, positions[name]) for name in self.columns]
+
+    def _header(self, worksheet):
+        return next(
+            worksheet.iter_rows(
+                min_row=self.header_row, max_row=self.header_row, values_only=True
+            ),
+            (),
+        )
+
+    def inspect(self):
+        """ヘッダー行とシートの範囲情報だけを読み、シート名・列名・推定行数を記録
+
+        シート全体は読まない。推定行数（estimated_rows）はファイルに記録された範囲
+        （dimension）から求めるので、記録がない・不正確なファイルではNoneや実際と違う値になる。
+        """
+        workbook = _load_workbook(self.path)
+        try:
+            worksheet = self._open_sheet(workbook)
+            self.sheet_name = worksheet.title
+            self.column_names = [name for name, _ in self._projection(self._header(worksheet))]
+            max_row = worksheet.max_row
+        finally:
+            workbook.close()
+        rows = (max_row or 0) - self.header_row
+        self.estimated_rows = rows if rows > 0 else None
+        return self
+
+    def chunks(self):
+        """{列名: 値のリスト} のチャンクを順に返すジェネレーター"""
+        workbook = _load_workbook(self.path)
+        try:
+            worksheet = self._open_sheet(workbook)
+            self.sheet_name = worksheet.title
+            projection = self._projection(self._header(worksheet))
+            if not projection:
+                return
+
+            # 指定列を含む最小の範囲だけを読む（範囲外の列はセルを作らない）
+            min_col = min(index for _, index in projection) + 1
+            max_col = max(index for _, index in projection) + 1
+            offsets = [(name, index + 1 - min_col) for name, index in projection]
+
+            chunk = {name: [] for name, _ in offsets}
+            size = 0
+            for row in worksheet.iter_rows(
+                min_row=self.header_row + 1,
+                min_col=min_col,
+                max_col=max_col,
+                values_only=True,
+            ):
+                for name, offset in offsets:
+                    chunk[name].append(row[offset] if offset < len(row) else None)
+                size += 1
+                if size >= self.chunk_size:
+                    yield chunk
+                    chunk = {name: [] for name, _ in offsets}
+                    size = 0
+            if size:
+                yield chunk
+        finally:
+            workbook.close()
+
+    def scan(self, progress=None):
+        """シート全体を一度ストリーミングで読み、シート名・列名・行数を記録
+
+        大きなシートでは読み込みと同じだけ時間がかかるので、行数の目安だけでよければinspect()を使う。
+        """
+        rows = 0
+        for chunk in self.chunks():
+            if self.column_names is None:
+                self.column_names = list(chunk)
+            rows += len(next(iter(chunk.values())))
+            if progress is not None:
+                progress(rows)
+        self.row_count = rows
+        if self.column_names is None:
+            self.column_names = list(self.columns or [])
+        return self
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フォルダ内のファイルを一括でパイプライン処理する
+
+os.scandirでフォルダを走査し（サブフォルダも可、globパターンで絞り込み）、
+該当ファイルをプロセスプールで並列に処理する。処理中のファイル数は
+ワーカー数の2倍までに抑え、完了ごとに件数・スループットを通知する。
+"""
+
+import fnmatch
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from src.logic.batch import default_workers
+from src.logic.engine import PipelineCancelled
+
+DEFAULT_PATTERNS = ("*.xlsx", "*.xlsm")
+RESULTS_DIR = "results"
+
+
+def scan_folder(folder, patterns=DEFAULT_PATTERNS, recursive=False):
+    """パターンに一致するファイルの (パス, サイズ) を返すジェネレーター"""
+    patterns = [pattern.lower() for pattern in patterns or ("*",)]
+    stack = [folder]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in sorted(entries, key=lambda e: e.name):
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                        name = entry.name.lower()
+                        if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+                            yield entry.path, entry.stat().st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def output_subpath(path, root):
+    """rootからの相対パスから拡張子を除いた保存先のサブパス（root/a/x.xlsx → a/x）"""
+    return os.path.splitext(os.path.relpath(path, root))[0]
+
+
+def plan_outputs(inputs, base_dir):
+    """入力 [(パス, 走査したフォルダ)] ごとの保存先を決める
+
+    ({パス: 保存先}, {保存先: [パス, ...]}) を返す。後者は保存先が重なる入力
+    （同じ名前で拡張子だけが違うファイルなど）で、空でなければ上書きになる。
+    """
+    outputs = {}
+    owners = {}
+    for path, root in inputs:
+        output_dir = os.path.join(base_dir, output_subpath(path, root))
+        outputs[path] = output_dir
+        owners.setdefault(os.path.normcase(os.path.abspath(output_dir)), []).append(path)
+    conflicts = {
+        outputs[paths[0]]: paths for paths in owners.values() if len(paths) > 1
+    }
+    return outputs, conflicts
+
+
+def parse_patterns(text):
+    """「*.xlsx; *.csv」のような文字列をパターンのリストに変換"""
+    return [part.strip() for part in text.replace(",", ";").split(";") if part.strip()]
+
+
+class FolderProgress:
+    """フォルダ一括処理の進捗"""
+
+    def __init__(self, total_files, total_bytes):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.done_files = 0
+        self.done_bytes = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def files_per_second(self):
+        return self.done_files / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_second(self):
+        return self.done_bytes / 1024 / 1024 / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (
+            f"{self.done_files}/{self.total_files} ファイル"
+            f"（失敗 {self.failed}）| {self.files_per_second:.1f} files/s | "
+            f"{self.mb_per_second:.2f} MB/s"
+        )
+
+
+def _init_worker():
+    """ワーカープロセスの初期化（ログは親プロセスに結果として返すので標準エラーには出さない）"""
+    from loguru import logger
+
+    logger.remove()
+
+
+def process_file(path, params, output_dir=None):
+    """ワーカープロセスで1ファイルを処理（pickle可能なトップレベル関数）"""
+    from src.logic.pipeline import process_data
+
+    start = time.perf_counter()
+    if output_dir is not None:
+        params = dict(params, output_dir=output_dir)
+    try:
+        result = process_data(window_id="folder_batch", input_path=path, **params)
+        saved = result.values.get("saved")
+        rows = saved.get("rows") if isinstance(saved, dict) else None
+        return {"path": path, "ok": True, "rows": rows, "elapsed": time.perf_counter() - start}
+    except Exception as e:
+        return {
+            "path": path,
+            "ok": False,
+            "error": str(e),
+            "elapsed": time.perf_counter() - start,
+        }
+
+
+def run_folder_batch(
+    files,
+    params=None,
+    max_workers=None,
+    cancel_event=None,
+    on_result=None,
+    on_progress=None,
+    executor=None,
+    root=None,
+):
+    """ファイルのリスト [(パス, サイズ)] を並列に処理し、FolderProgressを返す
+
+    rootを渡すと、保存先を results/<rootのフォルダ名>/<rootからの相対パス>
+    （params["output_dir"]があればその下）にする。サブフォルダに同じ名前の
+    ファイルがあっても結果が上書きされない。保存先が重なるファイルは処理せず失敗とする。
+    on_result(結果の辞書, progress) はファイルごとに、on_progress(progress) は
+    完了ごとに呼ばれる（呼び出し元のスレッドで実行される）。
+    executorを渡した場合はそれを使い回す（終了はしない）。
+    """
+    files = list(files)
+    params = params or {}
+    progress = FolderProgress(len(files), sum(size for _, size in files))
+    if not files:
+        return progress
+
+    outputs = {}
+    if root is not None:
+        base_dir = params.get("output_dir") or os.path.join(
+            RESULTS_DIR, os.path.basename(os.path.abspath(root))
+        )
+        outputs, conflicts = plan_outputs([(path, root) for path, _ in files], base_dir)
+        skipped = {path for paths in conflicts.values() for path in paths}
+        for path, size in files:
+            if path in skipped:
+                progress.done_files += 1
+                progress.done_bytes += size
+                progress.failed += 1
+                if on_result is not None:
+                    error = f"保存先が他のファイルと重なります: {outputs[path]}"
+                    on_result({"path": path, "ok": False, "error": error, "elapsed": 0.0}, progress)
+        files = [(path, size) for path, size in files if path not in skipped]
+        if not files:
+            return progress
+
+    workers = min(max_workers or default_workers(), len(files))
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    pending = {}  # Future -> (サイズ, パス)
+    remaining = iter(files)
+    try:
+        while True:
+            # 処理中の件数をワーカー数の2倍までに抑えて投入
+            while len(pending) < workers * 2 and not (
+                cancel_event is not None and cancel_event.is_set()
+            ):
+                item = next(remaining, None)
+                if item is None:
+                    break
+                path, size = item
+                future = executor.submit(process_file, path, params, outputs.get(path))
+                pending[future] = (size, path)
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                size, path = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:  # ワーカープロセスの異常終了など
+                    error = str(e) or type(e).__name__
+                    result = {"path": path, "ok": False, "error": error, "elapsed": 0.0}
+                progress.done_files += 1
+                progress.done_bytes += size
+                if not result["ok"]:
+                    progress.failed += 1
+                if on_result is not None:
+                    on_result(result, progress)
+            if on_progress is not None:
+                on_progress(progress)
+
+        if cancel_event is not None and cancel_event.is_set():
+            raise PipelineCancelled()
+        return progress
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パイプライン実行用のジョブ管理
+
+ボタンを押すたびにスレッドを起動する代わりに、上限付きのワーカープールと
+優先度付きの待機列でジョブを実行する。キー（パイプライン名）ごとの同時実行数の
+上限、協調的なキャンセル、終了時の待機をサポートする。
+"""
+
+import itertools
+import threading
+import time
+
+from src.logic.engine import PipelineCancelled
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class Job:
+    """1回分のジョブ
+
+    funcは func(job) の形で呼ばれる。長い処理は job.cancel_event を確認して
+    途中で終了すること（PipelineCancelledを送出するとキャンセル扱いになる）。
+    """
+
+    def __init__(self, job_id, func, key, name, priority, on_done):
+        self.id = job_id
+        self.func = func
+        self.key = key
+        self.name = name or key
+        self.priority = priority
+        self.on_done = on_done
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self._finished = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def cancel(self):
+        """キャンセルを要求（待機中ならそのまま取り消し、実行中なら協調的に停止）"""
+        self.cancel_event.set()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+
+class JobExecutor:
+    """上限付きワーカープールでジョブを実行する
+
+    max_workers: 同時に実行するジョブの総数
+    limits: {キー: 同時実行数} キーごとの上限（未指定のキーは無制限）
+    待機列は優先度（小さいほど先）→ 投入順で処理する。
+    """
+
+    def __init__(self, max_workers=2, limits=None):
+        self.max_workers = max_workers
+        self.limits = dict(limits or {})
+        self._queue = []  # 待機中のJob
+        self._running = {}  # {キー: 実行中の件数}
+        self._jobs = {}  # {ジョブID: Job}（待機中・実行中のみ）
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._workers = []
+        self._shutdown = False
+
+    def submit(self, func, key, name=None, priority=0, on_done=None):
+        """ジョブを待機列に追加してJobを返す"""
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("JobExecutorは終了済みです")
+            job = Job(next(self._ids), func, key, name, priority, on_done)
+            self._queue.append(job)
+            self._queue.sort(key=lambda j: (j.priority, j.id))
+            self._jobs[job.id] = job
+            self._ensure_workers()
+            self._condition.notify()
+        return job
+
+    def active_jobs(self, key=None):
+        """待機中・実行中のジョブ（keyを指定するとそのキーのみ）"""
+        with self._condition:
+            return [
+                job for job in self._jobs.values() if key is None or job.key == key
+            ]
+
+    def queued_count(self, key=None):
+        with self._condition:
+            return sum(1 for job in self._queue if key is None or job.key == key)
+
+    def cancel(self, key=None):
+        """待機中・実行中のジョブをキャンセル（keyを指定するとそのキーのみ）"""
+        jobs = self.active_jobs(key)
+        for job in jobs:
+            job.cancel()
+        with self._condition:
+            self._condition.notify_all()
+        return len(jobs)
+
+    def shutdown(self, wait=True, cancel_pending=True, timeout=None):
+        """新規受付を止め、待機中のジョブを取り消して実行中のジョブの終了を待つ"""
+        with self._condition:
+            self._shutdown = True
+            if cancel_pending:
+                for job in self._queue:
+                    job.cancel()
+                for job in self._jobs.values():
+                    job.cancel()
+            self._condition.notify_all()
+            workers = list(self._workers)
+
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for worker in workers:
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                worker.join(remaining)
+
+    # ---- 内部処理 ----
+
+    def _ensure_workers(self):
+        """ワーカースレッドを必要数まで起動（_condition保持中に呼ぶ）"""
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < min(self.max_workers, len(self._jobs)):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"job-worker-{len(self._workers) + 1}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self):
+        """実行可能な次のジョブを取り出す（_condition保持中に呼ぶ）"""
+        for index, job in enumerate(self._queue):
+            if job.cancel_event.is_set():
+                # 待機中にキャンセルされたジョブは実行せずに終了扱い
+                del self._queue[index]
+                return job
+            limit = self.limits.get(job.key)
+            if limit is None or self._running.get(job.key, 0) < limit:
+                del self._queue[index]
+                return job
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    if self._shutdown and not self._queue:
+                        return
+                    self._condition.wait()
+                    job = self._next_job()
+                if not job.cancel_event.is_set():
+                    job.status = RUNNING
+                    self._running[job.key] = self._running.get(job.key, 0) + 1
+
+            if job.status == RUNNING:
+                self._run_job(job)
+            else:
+                self._finish(job, CANCELLED)
+
+    def _run_job(self, job):
+        job.started_at = time.monotonic()
+        try:
+            job.result = job.func(job)
+            status = DONE
+        except PipelineCancelled:
+            status = CANCELLED
+        except Exception as e:
+            job.error = e
+            status = FAILED
+
+        with self._condition:
+            self._running[job.key] -= 1
+        self._finish(job, status)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.monotonic()
+        with self._condition:
+            self._jobs.pop(job.id, None)
+            self._condition.notify_all()
+        job._finished.set()
+        if job.on_done is not None:
+            try:
+                job.on_done(job)
+            except Exception as e:
+                print(f"Job callback error ({job.name}): {e}")
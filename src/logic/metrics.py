@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ステップ単位の計測（スパン）と指標の出力
+
+span()（コンテキストマネージャー）またはtimed()（デコレーター）で囲んだ区間の
+経過時間・CPU時間・メモリのピークを記録し、系列（名前 + ラベル）ごとに直近の
+一定件数を保持してp50/p95/p99を計算する。記録はmetrics/にJSONとPrometheusの
+テキスト形式で書き出し、次回以降の実行でも履歴として引き継ぐ。
+
+無効にするとspan()は何もしない共有オブジェクトを返すだけなので、計測のコストは
+ほぼゼロになる。CPU時間は区間を実行したスレッドの分だけを数える
+（プロセスプールに出した処理は含まない）。メモリのピークはtracemallocが
+有効な場合だけ記録する（tracemallocは処理が遅くなるので既定では無効）。
+"""
+
+import json
+import math
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from functools import wraps
+
+from src.logic.cache import atomic_write_bytes
+
+METRICS_DIR = "metrics"
+JSON_FILE = "step_metrics.json"
+PROMETHEUS_FILE = "step_metrics.prom"
+DEFAULT_WINDOW = 500  # 系列ごとに保持する直近の件数
+QUANTILES = (0.5, 0.95, 0.99)
+FIELDS = ("wall", "cpu", "peak")
+
+# Prometheusの指標名と単位（フィールド → (接尾辞, 説明)）
+_PROMETHEUS_FIELDS = {
+    "wall": ("wall_seconds", "経過時間"),
+    "cpu": ("cpu_seconds", "CPU時間"),
+    "peak": ("peak_bytes", "メモリのピーク"),
+}
+
+
+def percentile(values, q):
+    """最近傍順位法によるパーセンタイル（valuesはソート済み）"""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, math.ceil(q * len(values)) - 1))
+    return values[index]
+
+
+def series_key(name, labels):
+    return name + "|" + ",".join(f"{key}={labels[key]}" for key in sorted(labels))
+
+
+class Series:
+    """1系列分の直近の計測値"""
+
+    def __init__(self, name, labels, window=DEFAULT_WINDOW):
+        self.name = name
+        self.labels = dict(labels)
+        self.values = {field: deque(maxlen=window) for field in FIELDS}
+        self.last = {}
+
+    def add(self, wall, cpu, peak):
+        self.last = {"wall": wall, "cpu": cpu, "peak": peak}
+        for field, value in self.last.items():
+            if value is not None:
+                self.values[field].append(value)
+
+    def quantiles(self, field):
+        ordered = sorted(self.values[field])
+        return {q: percentile(ordered, q) for q in QUANTILES}
+
+    @classmethod
+    def from_json(cls, data, window=DEFAULT_WINDOW):
+        series = cls(data["name"], data["labels"], window)
+        for field in FIELDS:
+            series.values[field].extend(data.get("values", {}).get(field, []))
+        series.last = data.get("last", {})
+        return series
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "labels": self.labels,
+            "last": self.last,
+            "quantiles": {
+                field: {str(q): value for q, value in self.quantiles(field).items()}
+                for field in FIELDS
+                if self.values[field]
+            },
+            "values": {field: list(values) for field, values in self.values.items()},
+        }
+
+
+class _NullSpan:
+    """計測が無効な場合のspan()（何もしない）"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """1区間の計測（正常終了した場合だけ記録する）"""
+
+    __slots__ = ("recorder", "name", "labels", "_wall", "_cpu", "_memory")
+
+    def __init__(self, recorder, name, labels):
+        self.recorder = recorder
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self._memory = None
+        if tracemalloc.is_tracing():
+            # 同時に動く区間があるとピークは区間をまたいだ値になる（目安として扱う）
+            self._memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        peak = None
+        if self._memory is not None and tracemalloc.is_tracing():
+            peak = max(0, tracemalloc.get_traced_memory()[1] - self._memory)
+        if exc_type is None:
+            self.recorder.observe(self.name, self.labels, wall, cpu, peak)
+        return False
+
+
+class SpanRecorder:
+    """スパンの計測値を系列ごとに集計し、ファイルに書き出す"""
+
+    def __init__(self, enabled=True, window=DEFAULT_WINDOW, directory=METRICS_DIR):
+        self.enabled = enabled
+        self.window = window
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._series = {}  # {系列キー: Series}
+        self._unsaved = {}  # {系列キー: [(wall, cpu, peak)]} 前回の書き出し以降の計測値
+        self._loaded = False
+
+    def enable(self, track_memory=False):
+        self.enabled = True
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, **labels):
+        """区間を計測するコンテキストマネージャー"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, labels)
+
+    def timed(self, name, **labels):
+        """関数の実行を計測するデコレーター"""
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, name, labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def observe(self, name, labels, wall, cpu=None, peak=None):
+        key = series_key(name, labels)
+        with self._lock:
+            self._load()
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = Series(name, labels, self.window)
+            series.add(wall, cpu, peak)
+            self._unsaved.setdefault(key, []).append((wall, cpu, peak))
+
+    def get(self, name, **labels):
+        with self._lock:
+            self._load()
+            return self._series.get(series_key(name, labels))
+
+    def regressions(self, name, threshold=1.5, min_samples=5, **labels):
+        """直近の値がp50のthreshold倍を超えた系列の [(ラベル, 直近の値, p50)]
+
+        labelsで指定したラベルが一致する系列だけを見る。
+        """
+        found = []
+        with self._lock:
+            self._load()
+            for series in self._series.values():
+                if series.name != name or not series.last:
+                    continue
+                if any(series.labels.get(key) != value for key, value in labels.items()):
+                    continue
+                history = series.values["wall"]
+                if len(history) < min_samples:
+                    continue
+                p50 = percentile(sorted(history), 0.5)
+                last = series.last["wall"]
+                if p50 and last > p50 * threshold:
+                    found.append((series.labels, last, p50))
+        return found
+
+    # ---- 書き出し ----
+
+    def _path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def _load(self):
+        """前回までの履歴を読み込む（初回だけ）"""
+        if self._loaded:
+            return
+        self._loaded = True
+        for key, data in self._read_json().items():
+            self._series[key] = Series.from_json(data, self.window)
+
+    def _read_json(self):
+        try:
+            with open(self._path(JSON_FILE), encoding="utf-8") as f:
+                return json.load(f).get("series", {})
+        except (OSError, ValueError):
+            return {}
+
+    def export(self):
+        """JSONとPrometheusテキスト形式で書き出す
+
+        他のプロセスが書いた計測値を失わないよう、ファイル上の履歴に
+        前回の書き出し以降の計測値を追加する形で保存する。
+        """
+        with self._lock:
+            self._load()
+            os.makedirs(self.directory, exist_ok=True)
+            merged = {
+                key: Series.from_json(data, self.window)
+                for key, data in self._read_json().items()
+            }
+            for key, samples in self._unsaved.items():
+                series = merged.get(key)
+                if series is None:
+                    current = self._series[key]
+                    series = merged[key] = Series(current.name, current.labels, self.window)
+                for sample in samples:
+                    series.add(*sample)
+            self._unsaved.clear()
+            self._series = merged
+
+            document = {
+                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "series": {key: series.describe() for key, series in merged.items()},
+            }
+            atomic_write_bytes(
+                self._path(JSON_FILE),
+                json.dumps(document, ensure_ascii=False, indent=1).encode("utf-8"),
+            )
+            atomic_write_bytes(
+                self._path(PROMETHEUS_FILE), self._prometheus_text(merged).encode("utf-8")
+            )
+
+    @staticmethod
+    def _prometheus_text(series_map):
+        """Prometheusのテキスト形式（summary型）"""
+        grouped = {}
+        for series in series_map.values():
+            grouped.setdefault(series.name, []).append(series)
+
+        lines = []
+        for name in sorted(grouped):
+            for field, (suffix, help_text) in _PROMETHEUS_FIELDS.items():
+                metric = f"{name}_{suffix}"
+                body = []
+                for series in grouped[name]:
+                    values = series.values[field]
+                    if not values:
+                        continue
+                    labels = ",".join(
+                        f'{key}="{value}"' for key, value in sorted(series.labels.items())
+                    )
+                    for q, value in series.quantiles(field).items():
+                        quantile = f'quantile="{q}"'
+                        body.append(
+                            f"{metric}{{{labels + ',' if labels else ''}{quantile}}} {value:.6g}"
+                        )
+                    suffix_labels = f"{{{labels}}}" if labels else ""
+                    body.append(f"{metric}_sum{suffix_labels} {sum(values):.6g}")
+                    body.append(f"{metric}_count{suffix_labels} {len(values)}")
+                if body:
+                    lines.append(f"# HELP {metric} {name}の{help_text}（直近の計測値）")
+                    lines.append(f"# TYPE {metric} summary")
+                    lines.extend(body)
+        return "\n".join(lines) + "\n"
+
+
+# パイプライン全体で共有する記録先（PIPELINE_METRICS=0で無効、
+# PIPELINE_METRICS_MEMORY=1でtracemallocによるメモリ計測も行う）
+span_recorder = SpanRecorder(enabled=os.environ.get("PIPELINE_METRICS", "1") != "0")
+if span_recorder.enabled and os.environ.get("PIPELINE_METRICS_MEMORY") == "1":
+    span_recorder.enable(track_memory=True)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パイプライン1回分のプロファイル取得（cProfile + tracemalloc）
+
+with RunProfiler("main") as profiler: で囲んだ区間の関数ごとの実行時間と
+メモリ確保の多い行を記録し、logs/ に .pstats とメモリ確保の上位N件のテキストを
+保存する。ステップはワーカースレッドで動くので、区間中に開始したスレッドも計測する
+（同時に動いている別のジョブのスレッドも含まれる点に注意）。Python 3.11以前では
+スレッドごとのプロファイラーはそのスレッドの処理（target）が終わった時点で止まり、
+区間の終了時にまだ動いているスレッドの計測結果は含めない。
+プロセスプールで実行した処理は計測できない。使わない場合のコストはゼロ。
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+DEFAULT_TOP_N = 30
+
+# 他のスレッドの終了を待っているだけの時間（要約からは除く）
+_WAIT_FUNCTIONS = {
+    "<method 'acquire' of '_thread.lock' objects>",
+    "<method 'acquire' of '_thread.RLock' objects>",
+    "<method 'get' of '_queue.SimpleQueue' objects>",
+}
+
+
+class RunProfiler:
+    """区間のcProfileとtracemallocのスナップショットを取得して保存する"""
+
+    def __init__(self, name, log_dir="logs", top_n=DEFAULT_TOP_N):
+        self.name = name
+        self.log_dir = log_dir
+        self.top_n = top_n
+        self.stats = None  # pstats.Stats（終了後に設定）
+        self.allocations = []  # tracemallocの統計（上位N件）
+        self.elapsed = 0.0
+        self.unfinished_threads = 0  # 区間の終了時にまだ動いていた計測対象のスレッド数
+        self.pstats_path = None
+        self.alloc_path = None
+        self._profiles = []  # 処理を終えたスレッド（先頭は区間を囲んだスレッド）のプロファイラー
+        self._running = 0  # 計測中のスレッド数（3.11以前）
+        self._active = False
+        self._lock = threading.Lock()
+        self._own_tracemalloc = False
+        self._start = None
+
+    # ---- 計測 ----
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        main = cProfile.Profile()
+        self._profiles.append(main)
+        self._active = True
+        if sys.version_info < (3, 12):
+            # 3.11以前のcProfileは呼び出したスレッドしか計測しないので、
+            # 区間中に開始したスレッドにもそれぞれプロファイラーを付ける
+            threading.setprofile(self._start_thread_profile)
+        main.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def _start_thread_profile(self, frame, event, arg):
+        """区間中に開始したスレッドのrun()の呼び出し時に、そのスレッドで呼ばれる"""
+        sys.setprofile(None)
+        thread = threading.current_thread()
+        target = getattr(thread, "_target", None)
+        if target is None or not self._active:
+            # run()を上書きしたスレッドは止めるタイミングがないので計測しない
+            return
+
+        # cProfileは有効にしたスレッドでしか止められないので、targetを包んでその中で止める
+        def profiled_target(*args, **kwargs):
+            profile = None
+            with self._lock:
+                if self._active:
+                    profile = cProfile.Profile()
+                    self._running += 1
+            if profile is None:
+                return target(*args, **kwargs)
+            profile.enable()
+            try:
+                return target(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._running -= 1
+                    if self._active:
+                        self._profiles.append(profile)
+
+        thread._target = profiled_target
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._start
+        self._profiles[0].disable()
+        if sys.version_info < (3, 12):
+            threading.setprofile(None)
+        with self._lock:
+            # これ以降に終わったスレッドの計測結果は使わない
+            self._active = False
+            self.unfinished_threads = self._running
+
+        snapshot = tracemalloc.take_snapshot()
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+        snapshot = snapshot.filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+        self.allocations = snapshot.statistics("lineno")[: self.top_n]
+
+        with self._lock:
+            profiles = list(self._profiles)
+        self.stats = pstats.Stats(profiles[0], stream=io.StringIO())
+        for profile in profiles[1:]:
+            try:
+                self.stats.add(profile)
+            except TypeError:
+                # 一度も関数を呼ばなかったスレッドのプロファイラー
+                continue
+        self.save()
+        return False
+
+    # ---- 保存・要約 ----
+
+    def save(self):
+        """logs/ に .pstats とメモリ確保の上位N件を保存"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        stem = os.path.join(self.log_dir, f"profile_{self.name}_{time.strftime('%Y%m%d-%H%M%S')}")
+        self.pstats_path = f"{stem}.pstats"
+        self.alloc_path = f"{stem}_alloc.txt"
+        self.stats.dump_stats(self.pstats_path)
+        with open(self.alloc_path, "w", encoding="utf-8") as f:
+            f.write(f"# メモリ確保の多い行 上位{self.top_n}件（{self.name}, {self.elapsed:.2f}秒）\n")
+            for stat in self.allocations:
+                f.write(f"{stat}\n")
+
+    def hot_functions(self, limit=10):
+        """自身の実行時間（tottime）が長い関数の [(秒, 呼び出し回数, 関数名)]"""
+        rows = []
+        for (filename, line, function), (_, calls, tottime, _, _) in self.stats.stats.items():
+            if filename == "~":
+                if function in _WAIT_FUNCTIONS:
+                    continue
+                name = function  # 組み込み関数
+            else:
+                name = f"{os.path.basename(filename)}:{line}({function})"
+            rows.append((tottime, calls, name))
+        rows.sort(reverse=True)
+        return rows[:limit]
+
+    def summary_lines(self, limit=8, alloc_limit=5):
+        """ログに出力する要約"""
+        lines = [f"プロファイル結果（{self.elapsed:.2f}秒）: {self.pstats_path}"]
+        if self.unfinished_threads:
+            lines.append(f"  （終了時に動いていた {self.unfinished_threads} スレッドは含みません）")
+        for tottime, calls, name in self.hot_functions(limit):
+            share = tottime / self.elapsed * 100 if self.elapsed > 0 else 0.0
+            lines.append(f"  {tottime:7.3f}秒 {share:5.1f}% {calls:>8}回  {name}")
+        if self.allocations:
+            lines.append(f"メモリ確保の多い行: {self.alloc_path}")
+            for stat in self.allocations[:alloc_limit]:
+                frame = stat.traceback[0]
+                lines.append(
+                    f"  {stat.size / 1024:10.1f} KiB {stat.count:>8}個  "
+                    f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                )
+        return lines
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パイプラインの進捗イベントと、GUIへ届けるための間引きチャネル
+
+パイプラインはステップの開始・完了や処理件数をProgressEventとして発行する。
+ProgressChannelはイベントを受け取るたびに進捗状態（ProgressState）へ畳み込み、
+受け手（GUIのメインスレッドの定期処理）がtake()で取り出すまでの途中のイベントは
+最新の状態に上書きされる。
+件数の更新は送り手側のStepProgressでも一定間隔に間引くので、大量の行を処理しても
+UIに届く更新の数は一定以下になる。
+"""
+
+import threading
+import time
+
+RUN_STARTED = "run_started"
+STEP_STARTED = "step_started"
+STEP_PROGRESS = "step_progress"
+STEP_FINISHED = "step_finished"
+RUN_FINISHED = "run_finished"
+
+DEFAULT_MIN_INTERVAL = 0.1  # 件数更新を送る最小間隔（秒）
+
+
+class ProgressEvent:
+    """パイプラインの進捗イベント"""
+
+    __slots__ = ("kind", "pipeline", "step", "label", "done", "total", "unit", "duration", "status", "time")
+
+    def __init__(
+        self,
+        kind,
+        pipeline,
+        step=None,
+        label=None,
+        done=None,
+        total=None,
+        unit=None,
+        duration=None,
+        status=None,
+    ):
+        self.kind = kind
+        self.pipeline = pipeline
+        self.step = step
+        self.label = label
+        self.done = done  # 処理済み件数
+        self.total = total  # 全件数（不明ならNone）、run_startedではステップ数
+        self.unit = unit  # 件数の単位（"行" など）
+        self.duration = duration  # step_finishedの所要時間（秒）
+        self.status = status  # run_finishedの結果（"success" / "cancelled" / "failed" / "cached"）
+        self.time = time.monotonic()
+
+
+class _StepState:
+    __slots__ = ("label", "started", "done", "total", "unit")
+
+    def __init__(self, label, started):
+        self.label = label
+        self.started = started
+        self.done = 0
+        self.total = None
+        self.unit = None
+
+    @property
+    def fraction(self):
+        if not self.total:
+            return 0.0
+        return min(1.0, self.done / self.total)
+
+
+class ProgressState:
+    """ある時点の進捗のスナップショット（表示用）"""
+
+    def __init__(self):
+        self.pipeline = None
+        self.steps_total = 0
+        self.steps_done = 0
+        self.label = None  # 実行中のステップ名
+        self.done = None  # 実行中ステップの処理済み件数
+        self.total = None
+        self.unit = None
+        self.throughput = None  # 実行中ステップの件数/秒
+        self.elapsed = 0.0
+        self.status = None  # 終了時のみ設定
+        self.fraction = 0.0  # 全体の進捗（0〜1）
+
+    @property
+    def finished(self):
+        return self.status is not None
+
+    @property
+    def eta(self):
+        """残り時間の見込み（秒）。見積もれない場合はNone"""
+        if self.finished or self.fraction <= 0.0:
+            return None
+        return self.elapsed * (1.0 - self.fraction) / self.fraction
+
+    def describe(self):
+        """進捗を1行の文字列にする"""
+        if self.status == "cached":
+            return "キャッシュの結果を使用しました"
+        if self.finished:
+            names = {"success": "完了", "cancelled": "中止", "failed": "失敗"}
+            return f"{names.get(self.status, self.status)} ({self.elapsed:.1f}秒)"
+        parts = [f"{self.steps_done}/{self.steps_total} ステップ"]
+        if self.label:
+            parts.append(self.label)
+        if self.done is not None:
+            unit = self.unit or "件"
+            count = f"{self.done:,}/{self.total:,} {unit}" if self.total else f"{self.done:,} {unit}"
+            if self.throughput:
+                count += f" ({self.throughput:,.0f} {unit}/秒)"
+            parts.append(count)
+        eta = self.eta
+        if eta is not None:
+            parts.append(f"残り約 {format_seconds(eta)}")
+        return " | ".join(parts)
+
+
+def format_seconds(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}秒"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}分{seconds:02d}秒"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}時間{minutes:02d}分"
+
+
+class ProgressChannel:
+    """進捗イベントを状態に畳み込むチャネル
+
+    送り手（パイプラインのスレッド）はpublish()するだけで、受け手には通知しない。
+    GUIはメインスレッドの定期処理（after()のループ）からtake()を呼び、前回から
+    更新があった時だけ最新の状態を受け取る。送り手のスレッドからTkを呼んではいけない。
+    """
+
+    def __init__(self, min_interval=DEFAULT_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._started = None
+        self._pipeline = None
+        self._steps_total = 0
+        self._finished_steps = set()
+        self._running = {}  # {ステップ名: _StepState}
+        self._status = None
+        self._ended = None
+
+    def publish(self, event):
+        with self._lock:
+            self._apply(event)
+            self._dirty = True
+
+    def _apply(self, event):
+        if event.kind == RUN_STARTED:
+            self._started = event.time
+            self._pipeline = event.pipeline
+            self._steps_total = event.total or 0
+            self._finished_steps.clear()
+            self._running.clear()
+            self._status = None
+            self._ended = None
+        elif event.kind == STEP_STARTED:
+            self._running[event.step] = _StepState(event.label, event.time)
+        elif event.kind == STEP_PROGRESS:
+            state = self._running.get(event.step)
+            if state is not None:
+                state.done = event.done
+                state.total = event.total
+                state.unit = event.unit
+        elif event.kind == STEP_FINISHED:
+            self._running.pop(event.step, None)
+            self._finished_steps.add(event.step)
+        elif event.kind == RUN_FINISHED:
+            if self._started is None:
+                self._started = event.time
+                self._pipeline = event.pipeline
+            self._running.clear()
+            self._status = event.status
+            self._ended = event.time
+
+    def take(self):
+        """最新の状態を取り出す（前回から更新がなければNone）"""
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return self._snapshot()
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        state = ProgressState()
+        state.pipeline = self._pipeline
+        state.steps_total = self._steps_total
+        state.steps_done = len(self._finished_steps)
+        state.status = self._status
+        now = self._ended if self._ended is not None else time.monotonic()
+        state.elapsed = now - self._started if self._started is not None else 0.0
+
+        if self._running:
+            # 表示するのは最後に開始したステップ
+            current = max(self._running.values(), key=lambda s: s.started)
+            state.label = current.label
+            if current.unit is not None:
+                state.done = current.done
+                state.total = current.total
+                state.unit = current.unit
+                step_elapsed = now - current.started
+                if step_elapsed > 0 and current.done:
+                    state.throughput = current.done / step_elapsed
+
+        if state.finished:
+            state.fraction = 1.0
+        elif self._steps_total:
+            running = sum(s.fraction for s in self._running.values())
+            state.fraction = min(1.0, (state.steps_done + running) / self._steps_total)
+        return state
+
+
+class StepProgress:
+    """1ステップ分の件数の報告（送り手側で一定間隔に間引く）"""
+
+    def __init__(self, channel, pipeline, step, min_interval=None):
+        self.channel = channel
+        self.pipeline = pipeline
+        self.step = step
+        self.min_interval = channel.min_interval if min_interval is None else min_interval
+        self._last = 0.0
+
+    def update(self, done, total=None, unit="件", force=False):
+        now = time.monotonic()
+        finished = total is not None and done >= total
+        if not (force or finished) and now - self._last < self.min_interval:
+            return
+        self._last = now
+        self.channel.publish(
+            ProgressEvent(STEP_PROGRESS, self.pipeline, step=self.step, done=done, total=total, unit=unit)
+        )
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列指向バッチに対するベクトル化した検証・変換ルール
+
+各ルールは {列名: NumPy配列} のバッチを受け取り、検証ルールは行ごとの真偽マスク
+（Trueが正常）を、変換ルールは変換後の配列を返す。行ごとのPythonループは使わない。
+ルールは名前で登録し、{"rule": 名前, ...引数} の辞書で指定する。
+"""
+
+import numbers
+import time
+
+import numpy as np
+
+VALIDATION_RULES = {}
+TRANSFORM_RULES = {}
+
+DEFAULT_VALIDATION_RULES = [{"rule": "not_all_null"}]
+
+
+def validation_rule(name):
+    """検証ルールを登録するデコレーター（func(batch, **引数) -> 真偽マスク）"""
+
+    def decorator(func):
+        VALIDATION_RULES[name] = func
+        return func
+
+    return decorator
+
+
+def transform_rule(name):
+    """変換ルールを登録するデコレーター（func(batch, **引数) -> {列名: 配列}）"""
+
+    def decorator(func):
+        TRANSFORM_RULES[name] = func
+        return func
+
+    return decorator
+
+
+# ---- 配列への変換 ----
+
+
+def _is_float_type(value_type):
+    return value_type is type(None) or (
+        issubclass(value_type, numbers.Real) and not issubclass(value_type, bool)
+    )
+
+
+def to_array(values):
+    """値のリストを配列に変換
+
+    数値（boolを除く）とNoneだけならfloat64（Noneは欠損値NaN）、それ以外は
+    オブジェクト配列にする。"00123"のような数字の文字列やTrue/Falseは変換しない。
+    """
+    if all(_is_float_type(value_type) for value_type in set(map(type, values))):
+        return np.asarray(values, dtype=np.float64)
+    return np.asarray(values, dtype=object)
+
+
+def to_batch(chunk):
+    """{列名: リスト} のチャンクを {列名: 配列} のバッチに変換"""
+    return {name: to_array(values) for name, values in chunk.items()}
+
+
+def batch_length(batch):
+    return len(next(iter(batch.values()))) if batch else 0
+
+
+def is_null(array):
+    """欠損値のマスク（数値配列はNaN、オブジェクト配列はNoneと空文字）"""
+    if array.dtype.kind == "f":
+        return np.isnan(array)
+    return np.equal(array, None) | np.equal(array, "")
+
+
+_is_number = np.frompyfunc(
+    lambda value: isinstance(value, numbers.Number) and not isinstance(value, bool), 1, 1
+)
+
+
+def _numeric(array):
+    """数値として扱える配列（オブジェクト配列の数値以外はNaN）"""
+    if array.dtype.kind == "f":
+        return array
+    result = np.full(len(array), np.nan)
+    numeric = _is_number(array).astype(bool)
+    result[numeric] = array[numeric].astype(np.float64)
+    return result
+
+
+def _columns(batch, columns, column):
+    if column is not None:
+        return [column]
+    return list(columns) if columns else list(batch)
+
+
+# ---- 検証ルール ----
+
+
+@validation_rule("not_null")
+def check_not_null(batch, columns=None, column=None):
+    mask = np.ones(batch_length(batch), dtype=bool)
+    for name in _columns(batch, columns, column):
+        mask &= ~is_null(batch[name])
+    return mask
+
+
+@validation_rule("not_all_null")
+def check_not_all_null(batch):
+    mask = np.zeros(batch_length(batch), dtype=bool)
+    for array in batch.values():
+        mask |= ~is_null(array)
+    return mask
+
+
+@validation_rule("numeric")
+def check_numeric(batch, columns=None, column=None, allow_null=True):
+    mask = np.ones(batch_length(batch), dtype=bool)
+    for name in _columns(batch, columns, column):
+        array = batch[name]
+        null = is_null(array)
+        if array.dtype.kind == "f":
+            valid = np.ones(len(array), dtype=bool) if allow_null else ~null
+        else:
+            valid = _is_number(array).astype(bool)
+            if allow_null:
+                valid |= null
+        mask &= valid
+    return mask
+
+
+@validation_rule("range")
+def check_range(batch, column, min=None, max=None):
+    values = _numeric(batch[column])
+    mask = ~np.isnan(values)
+    if min is not None:
+        mask &= values >= min
+    if max is not None:
+        mask &= values <= max
+    return mask
+
+
+# ---- 変換ルール ----
+
+
+@transform_rule("fill_null")
+def fill_null(batch, value, columns=None, column=None):
+    result = dict(batch)
+    for name in _columns(batch, columns, column):
+        array = batch[name]
+        result[name] = np.where(is_null(array), value, array)
+    return result
+
+
+@transform_rule("scale")
+def scale(batch, column, factor=1.0, offset=0.0, output=None):
+    result = dict(batch)
+    result[output or column] = _numeric(batch[column]) * factor + offset
+    return result
+
+
+@transform_rule("clip")
+def clip(batch, column, min=None, max=None):
+    result = dict(batch)
+    result[column] = np.clip(_numeric(batch[column]), min, max)
+    return result
+
+
+@transform_rule("round")
+def round_values(batch, column, decimals=0):
+    result = dict(batch)
+    result[column] = np.round(_numeric(batch[column]), decimals)
+    return result
+
+
+@transform_rule("log1p")
+def log1p(batch, column, output=None):
+    result = dict(batch)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result[output or column] = np.log1p(_numeric(batch[column]))
+    return result
+
+
+@transform_rule("select")
+def select(batch, columns):
+    return {name: batch[name] for name in columns}
+
+
+# ---- 実行 ----
+
+
+def _split_spec(spec, registry, kind):
+    spec = dict(spec)
+    name = spec.pop("rule", None)
+    if name not in registry:
+        raise ValueError(f"不明な{kind}ルールです: {name}")
+    return name, registry[name], spec
+
+
+def check_rules(validation_specs=(), transform_specs=()):
+    """ルール指定の名前が登録済みか確認（実行前のチェック用）"""
+    for spec in validation_specs:
+        _split_spec(spec, VALIDATION_RULES, "検証")
+    for spec in transform_specs:
+        _split_spec(spec, TRANSFORM_RULES, "変換")
+
+
+def validate_batch(batch, specs):
+    """検証ルールを適用し、(正常行のマスク, {ルール名: 不正行数}) を返す"""
+    mask = np.ones(batch_length(batch), dtype=bool)
+    failures = {}
+    for spec in specs:
+        name, func, kwargs = _split_spec(spec, VALIDATION_RULES, "検証")
+        rule_mask = func(batch, **kwargs)
+        label = name if "column" not in kwargs else f"{name}({kwargs['column']})"
+        failures[label] = failures.get(label, 0) + int(np.count_nonzero(~rule_mask))
+        mask &= rule_mask
+    return mask, failures
+
+
+def filter_batch(batch, mask):
+    """マスクがTrueの行だけを残す"""
+    return {name: array[mask] for name, array in batch.items()}
+
+
+def transform_batch(batch, specs):
+    """変換ルールを順に適用"""
+    for spec in specs:
+        _, func, kwargs = _split_spec(spec, TRANSFORM_RULES, "変換")
+        batch = func(batch, **kwargs)
+    return batch
+
+
+class TransformedBatches:
+    """ソースのチャンクを検証・変換したバッチを順に返す（遅延評価）
+
+    保持するのは読み込み条件とルールだけなので、何度でも先頭から読み直せる。
+    読み進めた行数・有効行数・ルールごとの不正行数は total_rows / valid_rows /
+    failures に、読み込み・検証・変換にかかった時間は seconds に集計する
+    （読み直すたびに0から数え直す）。
+    """
+
+    def __init__(self, source, validation_specs, transform_specs):
+        self.source = source
+        self.validation_specs = list(validation_specs)
+        self.transform_specs = list(transform_specs)
+        self.total_rows = 0
+        self.valid_rows = 0
+        self.failures = {}
+        self.seconds = {"read": 0.0, "validate": 0.0, "transform": 0.0}
+
+    def __iter__(self):
+        self.total_rows = self.valid_rows = 0
+        self.failures = {}
+        self.seconds = dict.fromkeys(self.seconds, 0.0)
+        chunks = iter(self.source.chunks())
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            read = time.perf_counter()
+            self.seconds["read"] += read - start
+            if chunk is None:
+                return
+            batch = to_batch(chunk)
+            mask, failures = validate_batch(batch, self.validation_specs)
+            validated = time.perf_counter()
+            self.seconds["validate"] += validated - read
+            self.total_rows += len(mask)
+            self.valid_rows += int(np.count_nonzero(mask))
+            for name, count in failures.items():
+                self.failures[name] = self.failures.get(name, 0) + count
+            transformed = transform_batch(filter_batch(batch, mask), self.transform_specs)
+            self.seconds["transform"] += time.perf_counter() - validated
+            yield transformed
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フォルダの監視と差分処理
+
+処理済みファイルを「パス → (サイズ, 更新時刻, 内容ハッシュ)」のマニフェストに記録し、
+追加・変更されたファイルだけを再処理する。サイズと更新時刻が同じファイルはハッシュを
+計算しない。書き込み途中のファイルを拾わないよう、連続する2回の走査でサイズと
+更新時刻が変わらず、更新から一定時間経ったファイルだけを処理対象にする（デバウンス）。
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from src.logic.cache import atomic_write_bytes, hash_file
+from src.logic.engine import PipelineCancelled
+from src.logic.folder_batch import DEFAULT_PATTERNS, run_folder_batch, scan_folder
+
+MANIFEST_DIR = "manifests"
+
+
+def manifest_path_for(folder, patterns=DEFAULT_PATTERNS, recursive=False):
+    """フォルダ・条件ごとのマニフェストファイルのパス"""
+    key = json.dumps(
+        [os.path.abspath(folder), sorted(patterns), recursive], ensure_ascii=False
+    )
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(MANIFEST_DIR, f"{digest}.json")
+
+
+class FolderManifest:
+    """処理済みファイルのマニフェスト"""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}  # {パス: {"size", "mtime_ns", "hash", "processed_at"}}
+
+    def record(self, path, size, mtime_ns, digest):
+        self.entries[path] = {
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "hash": digest,
+            "processed_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def forget_missing(self, existing_paths):
+        """フォルダから消えたファイルを削除し、その件数を返す"""
+        removed = [path for path in self.entries if path not in existing_paths]
+        for path in removed:
+            del self.entries[path]
+        return len(removed)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = json.dumps(self.entries, ensure_ascii=False, indent=1).encode("utf-8")
+        atomic_write_bytes(self.path, data)
+
+
+class FolderWatcher:
+    """ポーリングでフォルダを走査し、処理が必要なファイルを返す"""
+
+    def __init__(
+        self,
+        folder,
+        patterns=DEFAULT_PATTERNS,
+        recursive=False,
+        settle_seconds=2.0,
+        manifest_path=None,
+    ):
+        self.folder = folder
+        self.patterns = list(patterns)
+        self.recursive = recursive
+        self.settle_seconds = settle_seconds
+        self.manifest = FolderManifest(
+            manifest_path or manifest_path_for(folder, self.patterns, recursive)
+        )
+        self._observed = {}  # {パス: (サイズ, 更新時刻)} 前回の走査で見た状態
+        self._pending_hashes = {}  # {パス: ハッシュ} 処理待ちファイルの内容ハッシュ
+
+    def _scan(self):
+        """対象ファイルの (パス, stat) を返すジェネレーター"""
+        for path, _ in scan_folder(self.folder, self.patterns, self.recursive):
+            try:
+                yield path, os.stat(path)
+            except OSError:
+                continue
+
+    def observe(self):
+        """現在の状態を記録するだけの走査（次のpoll()で変化していないファイルが処理対象になる）
+
+        マニフェストと比べて追加・変更されているファイルの数を返す。
+        """
+        self._observed = {
+            path: (stat.st_size, stat.st_mtime_ns) for path, stat in self._scan()
+        }
+        changed = 0
+        for path, state in self._observed.items():
+            entry = self.manifest.entries.get(path)
+            if not entry or (entry["size"], entry["mtime_ns"]) != state:
+                changed += 1
+        return changed
+
+    def poll(self):
+        """1回走査して (処理対象 [(パス, サイズ)], 書き込み中でスキップした件数) を返す
+
+        前回の走査（poll()かobserve()）で見ていないファイルは、今回は書き込み中として扱う。
+        """
+        now = time.time()
+        ready = []
+        unsettled = 0
+        observed = {}
+        for path, stat in self._scan():
+            state = (stat.st_size, stat.st_mtime_ns)
+            observed[path] = state
+
+            entry = self.manifest.entries.get(path)
+            if entry and (entry["size"], entry["mtime_ns"]) == state:
+                continue  # 前回処理時から変わっていない
+
+            # 前回の走査から変化しておらず、更新から一定時間経ったものだけを対象にする
+            settled = self._observed.get(path) == state
+            if not settled or now - stat.st_mtime_ns / 1e9 < self.settle_seconds:
+                unsettled += 1
+                continue
+
+            digest = hash_file(path)
+            if entry and entry["hash"] == digest:
+                # 内容は同じ（更新時刻だけ変わった）ので記録だけ更新
+                self.manifest.record(path, stat.st_size, stat.st_mtime_ns, digest)
+                continue
+            self._pending_hashes[path] = (stat.st_size, stat.st_mtime_ns, digest)
+            ready.append((path, stat.st_size))
+
+        self._observed = observed
+        if self.manifest.forget_missing(observed):
+            self.manifest.save()
+        return ready, unsettled
+
+    def mark_processed(self, path):
+        """処理に成功したファイルをマニフェストに記録"""
+        state = self._pending_hashes.pop(path, None)
+        if state is not None:
+            self.manifest.record(path, *state)
+
+    def run_once(self, params=None, max_workers=None, cancel_event=None, on_result=None, on_progress=None):
+        """変更分を1回処理して (FolderProgress, スキップ件数) を返す
+
+        最初の呼び出しの前にobserve()しておかないと、すべてのファイルが書き込み中の扱いになる。
+        """
+        files, unsettled = self.poll()
+        if not files:
+            self.manifest.save()
+            return None, unsettled
+
+        def handle_result(result, progress):
+            if result["ok"]:
+                self.mark_processed(result["path"])
+            if on_result is not None:
+                on_result(result, progress)
+
+        try:
+            progress = run_folder_batch(
+                files,
+                params=params,
+                max_workers=max_workers,
+                cancel_event=cancel_event,
+                on_result=handle_result,
+                on_progress=on_progress,
+                root=self.folder,
+            )
+        finally:
+            # 中止・失敗した場合も成功分は記録しておく
+            self.manifest.save()
+        return progress, unsettled
+
+    def run_settled(self, cancel_event=None, **kwargs):
+        """差分処理を1回だけ行う（走査してsettle_seconds待ち、変化していないファイルを処理）"""
+        if self.observe():
+            _wait(self.settle_seconds, cancel_event)
+        return self.run_once(cancel_event=cancel_event, **kwargs)
+
+    def watch(self, interval=5.0, cancel_event=None, on_cycle=None, **kwargs):
+        """cancel_eventがセットされるまで定期的に変更分を処理する"""
+        self.observe()
+        while True:
+            _wait(interval, cancel_event)
+            progress, unsettled = self.run_once(cancel_event=cancel_event, **kwargs)
+            if on_cycle is not None:
+                on_cycle(progress, unsettled)
+
+
+def _wait(seconds, cancel_event):
+    """seconds秒待つ（cancel_eventがセットされたらPipelineCancelled）"""
+    if cancel_event is None:
+        time.sleep(seconds)
+    elif cancel_event.wait(seconds):
+        raise PipelineCancelled()
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+起動時に準備しておく常駐ワーカープロセスのプール
+
+アプリの起動時（最初の描画後）にバックグラウンドでワーカープロセスを起動し、
+src.logic.pipelineと重い依存ライブラリを読み込んだ状態で待機させておく。
+パイプラインの実行はこのプロセスに送るので、プロセスの起動やインポートの
+コストは最初のクリックでも発生しない。
+
+- ワーカー内のログと進捗イベントはキュー経由で呼び出し元のロガー・
+  ProgressChannelに転送する
+- 中止は実行ごとの共有メモリ上のフラグで伝える
+- 実行がプロセス1つあたりrecycle_after件に達したらプールごと入れ替え（メモリの増加を
+  抑える）。新しいプロセスの読み込みが済んでから切り替えるので、入れ替え中も待たされない。
+  ヘルスチェックや起動待ちの空のタスクは件数に含めない
+- 一定間隔でヘルスチェックを行い、プロセスが異常終了していればプールを作り直す
+
+PIPELINE_WORKERS=0 で無効（既定は1プロセス）。
+"""
+
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+
+from loguru import logger
+
+from src.logic.engine import PipelineCancelled
+
+DEFAULT_SIZE = 1
+DEFAULT_RECYCLE_AFTER = 50  # ワーカー1つあたりの実行件数の上限
+HEALTH_INTERVAL = 30.0  # ヘルスチェックの間隔（秒）
+PING_TIMEOUT = 10.0
+MAX_RUNS = 64  # 同時に受け付ける実行の数（中止フラグの数）
+
+# 読み込んでおくモジュール（なければ無視する）
+PRELOAD_MODULES = ("src.logic.pipeline", "src.logic.folder_batch", "numpy", "openpyxl")
+
+# ワーカープロセス側の状態（_init_workerで設定）
+_worker_events = None
+_worker_flags = None
+_current_run = None  # 処理中の実行ID（ワーカーは同時に1件だけを処理する）
+
+
+def pool_size_from_env():
+    """PIPELINE_WORKERSからプロセス数を決める（0で無効）"""
+    try:
+        return max(0, int(os.environ.get("PIPELINE_WORKERS", DEFAULT_SIZE)))
+    except ValueError:
+        return DEFAULT_SIZE
+
+
+class WorkerCrashed(RuntimeError):
+    """実行中にワーカープロセスが異常終了した"""
+
+
+# ---- ワーカープロセス側 ----
+
+
+class _SlotEvent:
+    """共有メモリ上の中止フラグをthreading.Eventのように見せる"""
+
+    def __init__(self, flags, slot):
+        self.flags = flags
+        self.slot = slot
+
+    def is_set(self):
+        return bool(self.flags[self.slot])
+
+
+class _QueueProgress:
+    """進捗イベントを親プロセスに送るProgressChannelの代わり"""
+
+    def __init__(self, run_id, min_interval):
+        self.run_id = run_id
+        self.min_interval = min_interval
+
+    def publish(self, event):
+        _worker_events.put(("progress", self.run_id, event, None))
+
+
+def _forward_log(message):
+    run_id = _current_run
+    if run_id is not None:
+        record = message.record
+        _worker_events.put(("log", run_id, record["level"].name, record["message"]))
+
+
+def _init_worker(events, flags):
+    """ワーカープロセスの初期化（ログの転送先の設定と事前読み込み）"""
+    global _worker_events, _worker_flags
+    _worker_events = events
+    _worker_flags = flags
+    # Ctrl+Cは親プロセスが受けて中止フラグで止める
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logger.remove()
+    logger.add(_forward_log, level="DEBUG", format="{message}")
+    for name in PRELOAD_MODULES:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+
+
+def _ping():
+    """ヘルスチェック・起動待ち用（プロセスIDを返す）"""
+    return os.getpid()
+
+
+def _execute(run_id, slot, pipeline, kwargs, min_interval):
+    """1回分のパイプラインを実行して結果の要約を返す（pickle可能なトップレベル関数）"""
+    from src.logic.pipeline import process_data, process_data2
+
+    global _current_run
+    _current_run = run_id
+    start = time.perf_counter()
+    try:
+        kwargs = dict(kwargs, cancel_event=_SlotEvent(_worker_flags, slot))
+        if min_interval is not None:
+            kwargs["progress"] = _QueueProgress(run_id, min_interval)
+        func = process_data if pipeline == "pipeline1" else process_data2
+        try:
+            result = func(**kwargs)
+        except Exception as e:
+            # 親プロセスで復元できない例外はBrokenProcessPoolになり、プールごと作り直されるので
+            # メッセージだけを持つRuntimeErrorに置き換える
+            try:
+                pickle.loads(pickle.dumps(e))
+            except Exception:
+                raise RuntimeError(str(e)) from None
+            raise
+        summary = {"elapsed": time.perf_counter() - start, "pid": os.getpid()}
+        saved = result.values.get("saved")
+        if isinstance(saved, dict):
+            summary.update(rows=saved.get("rows"), output=saved.get("path"))
+        return summary
+    finally:
+        _current_run = None
+        # このマーカーより前のログ・進捗は親プロセスに届いている
+        _worker_events.put(("done", run_id, None, None))
+
+
+# ---- 親プロセス側 ----
+
+
+class _Run:
+    """実行1回分の転送先"""
+
+    def __init__(self, bound_logger, progress):
+        self.bound_logger = bound_logger
+        self.progress = progress
+        self.done = threading.Event()
+
+
+class WorkerPool:
+    """パイプラインを実行する常駐ワーカープロセスのプール"""
+
+    def __init__(
+        self,
+        size=DEFAULT_SIZE,
+        recycle_after=DEFAULT_RECYCLE_AFTER,
+        health_interval=HEALTH_INTERVAL,
+        bound_logger=None,
+    ):
+        self.size = size
+        self.recycle_after = recycle_after
+        self.health_interval = health_interval
+        self.logger = bound_logger or logger
+        self.stats = {"runs": 0, "rebuilds": 0, "recycles": 0, "warm_ms": None}
+        self._context = multiprocessing.get_context("spawn")
+        self._events = None
+        self._flags = None
+        self._executor = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._runs = {}  # {実行ID: _Run}
+        self._slots = list(range(MAX_RUNS))  # 空いている中止フラグ
+        self._next_id = 0
+        self._executor_runs = 0  # 今のプールで実行した件数
+        self._recycling = False
+        self._closed = threading.Event()
+        self._threads = []
+
+    @property
+    def ready(self):
+        """ワーカーの起動と読み込みが済んでいるか"""
+        return self._ready.is_set() and not self._closed.is_set()
+
+    def start(self):
+        """ワーカーを起動して読み込みを待つ（バックグラウンドのスレッドから呼ぶ）"""
+        self._events = self._context.Queue()
+        self._flags = self._context.RawArray("b", MAX_RUNS)
+        for target, name in ((self._forward, "worker-events"), (self._health_loop, "worker-health")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._build()
+
+    def start_in_background(self):
+        """start()を別スレッドで実行（失敗した場合は警告を出し、プールなしで動く）"""
+
+        def start():
+            try:
+                self.start()
+            except Exception as e:
+                self.logger.warning(f"ワーカープロセスを起動できませんでした: {e}")
+                self.shutdown(wait=False)
+
+        threading.Thread(target=start, name="worker-start", daemon=True).start()
+
+    def _new_executor(self):
+        # max_tasks_per_childはヘルスチェックの空のタスクも数えるので使わず、
+        # 実行件数は自分で数えて_recycle()で入れ替える
+        return ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._events, self._flags),
+        )
+
+    def _warm(self, executor):
+        # ワーカーは投入時に起動されるので、プロセス数分の空のタスクで起動させる
+        # （読み込み中にプロセスが終了していればBrokenProcessPoolが送出される）
+        for future in [executor.submit(_ping) for _ in range(self.size)]:
+            future.result()
+
+    def _build(self):
+        """プールを作り、全ワーカーの起動と読み込みを待つ"""
+        start = time.perf_counter()
+        executor = self._new_executor()
+        with self._lock:
+            self._executor = executor
+            self._executor_runs = 0
+        try:
+            self._warm(executor)
+        except Exception:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        self.stats["warm_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self._ready.set()
+        self.logger.debug(
+            f"ワーカープロセスの準備ができました（{self.size}個, {self.stats['warm_ms']:.0f} ms）"
+        )
+
+    def _recycle(self):
+        """新しいプールの準備ができてから切り替え、古いプールは実行中の処理の完了後に終了する"""
+        try:
+            executor = self._new_executor()
+            try:
+                self._warm(executor)
+            except Exception:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            with self._lock:
+                old = self._executor
+                if self._closed.is_set():
+                    old, executor = executor, None
+                else:
+                    self._executor = executor
+                    self._executor_runs = 0
+            if executor is not None:
+                self.stats["recycles"] += 1
+                self.logger.debug("ワーカープロセスを入れ替えました")
+            if old is not None:
+                old.shutdown(wait=True)
+        except Exception as e:
+            self.logger.warning(f"ワーカープロセスを入れ替えられませんでした: {e}")
+        finally:
+            with self._lock:
+                self._recycling = False
+
+    def _count_run(self, executor):
+        """実行1件を数え、上限に達したらプールの入れ替えを始める"""
+        with self._lock:
+            if executor is not self._executor:
+                return  # 入れ替え前のプールで実行した
+            self._executor_runs += 1
+            if (
+                not self.recycle_after
+                or self._recycling
+                or self._executor_runs < self.recycle_after * self.size
+            ):
+                return
+            self._recycling = True
+        threading.Thread(target=self._recycle, name="worker-recycle", daemon=True).start()
+
+    def _rebuild(self, reason):
+        self._ready.clear()
+        self.stats["rebuilds"] += 1
+        self.logger.warning(f"ワーカープロセスを再起動します: {reason}")
+        with self._lock:
+            old = self._executor
+        if old is not None:
+            old.shutdown(wait=False, cancel_futures=True)
+        if self._closed.is_set():
+            return
+        try:
+            self._build()
+        except Exception as e:
+            # 準備できていない状態のまま（呼び出し元はプールなしで実行する）
+            self.logger.warning(f"ワーカープロセスを起動できませんでした: {e}")
+
+    def run(self, pipeline, kwargs, bound_logger, progress=None, cancel_event=None):
+        """ワーカーでパイプラインを実行し、結果の要約（経過時間・行数など）を返す
+
+        呼び出し元のスレッドは終了まで待つ。ワーカーのログはbound_loggerに、
+        進捗はprogress（ProgressChannel）に転送する。cancel_eventがセットされると
+        ワーカーに中止を伝え、PipelineCancelledが送出される。
+        """
+        if not self.ready:
+            raise RuntimeError("ワーカープロセスの準備ができていません")
+        with self._lock:
+            if not self._slots:
+                raise RuntimeError("同時に実行できる数の上限を超えました")
+            self._next_id += 1
+            run_id = self._next_id
+            slot = self._slots.pop()
+            run = self._runs[run_id] = _Run(bound_logger, progress)
+            executor = self._executor
+        self._flags[slot] = 0
+        min_interval = progress.min_interval if progress is not None else None
+        args = (_execute, run_id, slot, pipeline, kwargs, min_interval)
+        try:
+            try:
+                future = executor.submit(*args)
+            except BrokenProcessPool:
+                # ヘルスチェック前に落ちていた（まだ何も実行していないので作り直して投入）
+                self._rebuild("プロセスが異常終了していました")
+                if not self.ready:
+                    raise WorkerCrashed("ワーカープロセスを再起動できませんでした")
+                executor = self._executor
+                future = executor.submit(*args)
+
+            while not wait([future], timeout=0.1).done:
+                if cancel_event is not None and cancel_event.is_set():
+                    self._flags[slot] = 1
+                    future.cancel()  # 開始前なら取り消し
+            if future.cancelled():
+                raise PipelineCancelled()
+            try:
+                summary = future.result()
+            except BrokenProcessPool as e:
+                threading.Thread(
+                    target=self._rebuild, args=("実行中にプロセスが終了しました",), daemon=True
+                ).start()
+                raise WorkerCrashed("ワーカープロセスが異常終了しました") from e
+            finally:
+                # ワーカーのログを転送し終えてから戻る（異常終了時は届かない）
+                if not isinstance(future.exception(), BrokenProcessPool):
+                    run.done.wait(5.0)
+                    self._count_run(executor)
+            self.stats["runs"] += 1
+            return summary
+        finally:
+            with self._lock:
+                self._runs.pop(run_id, None)
+                self._slots.append(slot)
+
+    def _forward(self):
+        """ワーカーからのログ・進捗を転送（Noneを受け取ると終了）"""
+        while True:
+            item = self._events.get()
+            if item is None:
+                return
+            kind, run_id, first, second = item
+            run = self._runs.get(run_id)
+            if run is None:
+                continue
+            try:
+                if kind == "log":
+                    run.bound_logger.log(first, second)
+                elif kind == "progress":
+                    if run.progress is not None:
+                        run.progress.publish(first)
+                elif kind == "done":
+                    run.done.set()
+            except Exception as e:
+                print(f"Worker event forward error: {e}")
+
+    def _health_loop(self):
+        """一定間隔でワーカーの応答を確認する（実行中は確認しない）"""
+        while not self._closed.wait(self.health_interval):
+            with self._lock:
+                executor = self._executor
+                busy = bool(self._runs)
+            if executor is None or busy or not self._ready.is_set():
+                continue
+            try:
+                executor.submit(_ping).result(timeout=PING_TIMEOUT)
+            except BrokenProcessPool:
+                self._rebuild("ヘルスチェックで異常終了を検出しました")
+            except FutureTimeoutError:
+                self.logger.warning(f"ワーカープロセスが{PING_TIMEOUT:.0f}秒以内に応答しません")
+            except RuntimeError:
+                # 終了処理中
+                return
+
+    def shutdown(self, wait=True):
+        """ワーカーを終了する"""
+        self._closed.set()
+        self._ready.clear()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        if self._events is not None:
+            self._events.put(None)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""テスト共通の設定（プロジェクトルートをパスに追加）と共通のフィクスチャ"""
+
+import os
+import sys
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """cache/・results/などの出力先を一時フォルダにする"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def fast_pipeline(workdir, monkeypatch):
+    """待ち時間のシミュレーションと計測の書き出しを止めたパイプラインモジュール"""
+    from src.logic import pipeline
+    from src.logic.metrics import span_recorder
+
+    monkeypatch.setattr(pipeline, "_workload", lambda seconds: None)
+    monkeypatch.setattr(span_recorder, "enabled", False)
+    return pipeline
+
+
+def write_workbook(path, rows, header=("id", "value")):
+    """テスト用のExcelファイルを作成"""
+    import openpyxl
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append(list(row))
+    workbook.save(path)
+    return str(path)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""run_batches の実行モード"""
+
+import threading
+
+import pytest
+
+from src.logic.batch import run_batches
+from src.logic.engine import PipelineCancelled
+
+
+class ListLogger:
+    def __init__(self):
+        self.records = []
+
+    def log(self, level, message):
+        self.records.append((level, message))
+
+    def info(self, message):
+        self.log("INFO", message)
+
+
+def square(batch, log):
+    log.info(f"batch {batch}")
+    return batch * batch
+
+
+@pytest.mark.parametrize("mode", ["serial", "thread"])
+def test_results_keep_batch_order(mode):
+    log = ListLogger()
+    done = []
+    results = run_batches(square, range(6), log, mode=mode, max_workers=3, on_progress=done.append)
+    assert results == [0, 1, 4, 9, 16, 25]
+    assert done == [1, 2, 3, 4, 5, 6]
+    assert sorted(message for _, message in log.records) == [f"batch {i}" for i in range(6)]
+
+
+def test_thread_mode_logs_while_batch_is_running():
+    log = ListLogger()
+    seen_before_finish = []
+
+    def slow(batch, batch_log):
+        batch_log.info("started")
+        # 呼び出し元のロガーに直接出ているので、バッチの終了前に見える
+        seen_before_finish.append(("INFO", "started") in log.records)
+        return batch
+
+    run_batches(slow, [1], log, mode="thread")
+    assert seen_before_finish == [True]
+
+
+def test_cancelled_before_start_raises():
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(PipelineCancelled):
+        run_batches(square, [1, 2], ListLogger(), mode="serial", cancel_event=cancel)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        run_batches(square, [1], ListLogger(), mode="fork")
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""ResultCacheとパイプラインのキャッシュ"""
+
+import os
+import shutil
+
+from conftest import write_workbook
+from src.logic.cache import ResultCache
+
+
+def test_cache_hit_and_key_changes_with_content(workdir):
+    cache = ResultCache(cache_dir="cache")
+    path = workdir / "input.txt"
+    path.write_text("v1")
+
+    key = cache.make_key("p", "1", str(path), {"model": "a"})
+    assert cache.get(key) is None
+    cache.put(key, {"answer": 42})
+    assert cache.get(key) == {"answer": 42}
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+    # パラメーター・内容が変われば別のキー
+    assert cache.make_key("p", "1", str(path), {"model": "b"}) != key
+    path.write_text("v2 (changed)")
+    assert cache.make_key("p", "1", str(path), {"model": "a"}) != key
+
+
+def test_cache_hit_recreates_deleted_results(fast_pipeline, workdir):
+    path = write_workbook(workdir / "data.xlsx", [(i, i * 1.5) for i in range(20)])
+
+    first = fast_pipeline.process_data(input_path=path, model="m")
+    output = first.values["saved"]["path"]
+    assert os.path.isfile(os.path.join(output, "manifest.json"))
+
+    # 結果を削除してから同じ入力で実行すると、キャッシュヒットではなく作り直す
+    shutil.rmtree(output)
+    second = fast_pipeline.process_data(input_path=path, model="m")
+    assert second.timings
+    assert os.path.isfile(os.path.join(output, "manifest.json"))
+
+    # 結果が残っていればキャッシュを使う（ステップは実行しない）
+    third = fast_pipeline.process_data(input_path=path, model="m")
+    assert third.timings == {}
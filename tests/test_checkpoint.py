@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""CheckpointStoreとStepGraphの途中からの再開"""
+
+import os
+
+import pytest
+
+from src.logic.checkpoint import CheckpointStore
+from src.logic.engine import StepError, StepGraph
+
+
+def test_checkpoint_store_round_trip(workdir):
+    store = CheckpointStore(base_dir="checkpoints")
+    assert store.load("graph", "k") == (False, None)
+    store.save("graph", "k", {"rows": [1, 2]})
+    assert store.load("graph", "k") == (True, {"rows": [1, 2]})
+    store.discard("graph", ["k"])
+    assert store.load("graph", "k") == (False, None)
+
+
+def test_failed_run_resumes_from_checkpoint(workdir):
+    calls = {"first": 0, "second": 0}
+    fail = {"second": True}
+    graph = StepGraph("resume_test")
+
+    @graph.step(inputs=("start",), outputs=("a",))
+    def first(ctx, start):
+        calls["first"] += 1
+        return start + 1
+
+    @graph.step(inputs=("a",), outputs=("b",))
+    def second(ctx, a):
+        calls["second"] += 1
+        if fail["second"]:
+            raise RuntimeError("boom")
+        return a * 10
+
+    store = CheckpointStore(base_dir="checkpoints")
+    with pytest.raises(StepError):
+        graph.run(window_id="test", initial={"start": 1}, checkpoints=store)
+
+    fail["second"] = False
+    result = graph.run(window_id="test", initial={"start": 1}, checkpoints=store)
+    assert result.values["b"] == 20
+    # 1つ目のステップはチェックポイントから復元され、再実行されない
+    assert calls == {"first": 1, "second": 2}
+    # 完了後はチェックポイントを削除する
+    assert not os.listdir(workdir / "checkpoints" / "resume_test")
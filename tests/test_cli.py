@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""CLIの終了コードと保存先"""
+
+import io
+import json
+import os
+
+import pytest
+
+from conftest import write_workbook
+from src.logic import cli
+
+
+def _run(argv):
+    stream = io.StringIO()
+    code = cli.run(cli.build_parser().parse_args(argv), cli.EventWriter(stream))
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    return code, events
+
+
+def test_usage_errors(workdir):
+    (workdir / "empty").mkdir()
+    code, events = _run(["pipeline1", "empty"])
+    assert code == cli.EXIT_USAGE
+    assert events[-1]["event"] == "error"
+
+    with pytest.raises(SystemExit) as e:
+        cli.build_parser().parse_args(["unknown", "x.xlsx"])
+    assert e.value.code == cli.EXIT_USAGE
+
+
+def test_conflicting_outputs_fail_before_processing(workdir):
+    write_workbook(workdir / "data" / "x.xlsx", [(1, 1.0)])
+    write_workbook(workdir / "data" / "x.xlsm", [(1, 1.0)])
+    code, events = _run(["pipeline1", "data"])
+    assert code == cli.EXIT_USAGE
+    assert [event["event"] for event in events] == ["error"]
+    assert "x.xlsm" in events[0]["message"]
+
+    # 同じファイルを2回指定した場合も同様
+    code, _ = _run(["pipeline1", "data/x.xlsx", "data/x.xlsx"])
+    assert code == cli.EXIT_USAGE
+
+
+def test_output_paths_follow_relative_path(workdir):
+    folder = workdir / "data"
+    write_workbook(folder / "a" / "x.xlsx", [(1, 1.0)])
+    write_workbook(folder / "b" / "x.xlsx", [(1, 1.0), (2, 2.0)])
+
+    code, events = _run(["pipeline1", "data", "-r", "-w", "1", "--output-dir", "out"])
+    assert code == cli.EXIT_OK
+    outputs = sorted(
+        (os.path.relpath(event["output"], workdir), event["rows"])
+        for event in events
+        if event["event"] == "result"
+    )
+    assert outputs == [
+        (os.path.join("out", "a", "x"), 1),
+        (os.path.join("out", "b", "x"), 2),
+    ]
+
+
+def test_failed_input_sets_exit_code(workdir):
+    write_workbook(workdir / "ok.xlsx", [(1, 1.0)])
+    code, events = _run(["pipeline1", "ok.xlsx", "missing.xlsx", "-w", "1"])
+    assert code == cli.EXIT_FAILED
+    results = {event["input"]: event for event in events if event["event"] == "result"}
+    assert results["ok.xlsx"]["ok"] is True
+    assert results["ok.xlsx"]["output"] == str(workdir / "results" / "ok")
+    assert results["missing.xlsx"]["ok"] is False
+    assert events[-1]["event"] == "summary" and events[-1]["failed"] == 1
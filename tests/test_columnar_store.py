@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""ColumnarWriterの保存・読み込みと列の型の変化"""
+
+import json
+import os
+
+import numpy as np
+
+from src.logic.columnar_store import MANIFEST_FILE, ColumnarWriter, open_result
+
+
+def _write(path, batches):
+    with ColumnarWriter(str(path), metadata={"source": "test"}) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    return writer
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "result"
+    _write(
+        path,
+        [
+            {"value": np.array([1.5, np.nan]), "name": np.array(["a", None], dtype=object)},
+            {"value": np.array([3.0]), "name": np.array(["日本語"], dtype=object)},
+        ],
+    )
+    result = open_result(str(path))
+    assert result.row_count == 3
+    assert result.metadata == {"source": "test"}
+    assert np.array_equal(result["value"], [1.5, np.nan, 3.0], equal_nan=True)
+    assert list(result["name"].to_array()) == ["a", None, "日本語"]
+    # 一時ディレクトリは残らない
+    assert os.listdir(tmp_path) == ["result"]
+
+
+def test_text_after_numbers_widens_to_string(tmp_path):
+    path = tmp_path / "result"
+    writer = _write(
+        path,
+        [
+            {"code": np.array([1.0, np.nan, 3.0])},
+            {"code": np.array(["A-4", None], dtype=object)},
+        ],
+    )
+    assert writer.widened == {"code": "string"}
+    result = open_result(str(path))
+    # 文字列がNaNになったりせず、前の数値も残る（欠損はNone）
+    assert list(result["code"].to_array()) == ["1.0", None, "3.0", "A-4", None]
+    with open(path / MANIFEST_FILE, encoding="utf-8") as f:
+        assert json.load(f)["widened"] == {"code": "string"}
+
+
+def test_float_after_int_widens_to_float(tmp_path):
+    path = tmp_path / "result"
+    writer = _write(
+        path,
+        [
+            {"count": np.array([1, 2], dtype=np.int64)},
+            {"count": np.array([2.5, np.nan])},
+            {"count": np.array([None, 4], dtype=object)},
+        ],
+    )
+    assert writer.widened == {"count": "<f8"}
+    result = open_result(str(path))
+    assert np.array_equal(result["count"], [1.0, 2.0, 2.5, np.nan, np.nan, 4.0], equal_nan=True)
+
+
+def test_close_retries_when_another_writer_finished_first(tmp_path, monkeypatch):
+    from src.logic import columnar_store
+
+    path = tmp_path / "result"
+    real_replace = os.replace
+    raced = []
+
+    def racing_replace(src, dst):
+        # 退避の直後に他のプロセスが同じ保存先へ書き終えた状況を再現
+        if ".tmp-" in src and not raced:
+            raced.append(dst)
+            os.makedirs(os.path.join(dst, "other"))
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(columnar_store.os, "replace", racing_replace)
+    _write(path, [{"value": np.array([1.0])}])
+    assert raced
+    assert open_result(str(path))["value"].tolist() == [1.0]
+    assert sorted(os.listdir(tmp_path)) == ["result"]
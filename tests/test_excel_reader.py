@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""ExcelChunkSourceの読み込み"""
+
+import pytest
+
+from conftest import write_workbook
+from src.logic.excel_reader import ExcelChunkSource
+
+
+def test_inspect_reads_header_and_estimates_rows(tmp_path):
+    path = write_workbook(tmp_path / "data.xlsx", [(i, i * 2) for i in range(25)])
+    source = ExcelChunkSource(path, columns=["value"], chunk_size=10).inspect()
+    assert source.sheet_name == "Sheet"
+    assert source.column_names == ["value"]
+    assert source.estimated_rows == 25
+    assert source.row_count is None  # シート全体は読まない
+
+    chunks = list(source.chunks())
+    assert [len(chunk["value"]) for chunk in chunks] == [10, 10, 5]
+    assert chunks[0]["value"][:3] == [0, 2, 4]
+
+    with pytest.raises(ValueError):
+        ExcelChunkSource(path, columns=["missing"]).inspect()
+
+
+def test_pipeline_reads_sheet_once(fast_pipeline, workdir, monkeypatch):
+    from src.logic import excel_reader
+
+    path = write_workbook(workdir / "data.xlsx", [(i, i) for i in range(30)])
+    streams = []
+    original = excel_reader.ExcelChunkSource.chunks
+
+    def counting_chunks(self):
+        streams.append(1)
+        return original(self)
+
+    monkeypatch.setattr(excel_reader.ExcelChunkSource, "chunks", counting_chunks)
+    result = fast_pipeline.process_data(input_path=path)
+    assert result.values["saved"]["rows"] == 30
+    assert len(streams) == 1
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""フォルダ一括処理の保存先"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import write_workbook
+from src.logic.columnar_store import open_result
+from src.logic.folder_batch import plan_outputs, run_folder_batch, scan_folder
+
+
+def test_plan_outputs_uses_relative_path(tmp_path):
+    root = str(tmp_path / "data")
+    inputs = [
+        (os.path.join(root, "a", "x.xlsx"), root),
+        (os.path.join(root, "b", "x.xlsx"), root),
+        (os.path.join(root, "y.xlsx"), root),
+        (os.path.join(root, "y.xlsm"), root),
+    ]
+    outputs, conflicts = plan_outputs(inputs, "out")
+    assert outputs[inputs[0][0]] == os.path.join("out", "a", "x")
+    assert outputs[inputs[1][0]] == os.path.join("out", "b", "x")
+    assert conflicts == {os.path.join("out", "y"): [inputs[2][0], inputs[3][0]]}
+
+
+def test_same_name_in_subfolders_does_not_collide(fast_pipeline, workdir):
+    folder = workdir / "data"
+    write_workbook(folder / "a" / "x.xlsx", [(1, 1.0)])
+    write_workbook(folder / "b" / "x.xlsx", [(1, 1.0), (2, 2.0)])
+    write_workbook(folder / "c.xlsx", [(1, 1.0)])
+    write_workbook(folder / "c.xlsm", [(1, 1.0)])
+    files = list(scan_folder(str(folder), recursive=True))
+
+    results = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        progress = run_folder_batch(
+            files,
+            params={"model": "m"},
+            executor=executor,
+            on_result=lambda result, _: results.append(result),
+            root=str(folder),
+        )
+
+    assert progress.done_files == 4 and progress.failed == 2
+    failed = sorted(os.path.basename(r["path"]) for r in results if not r["ok"])
+    assert failed == ["c.xlsm", "c.xlsx"]
+    base = workdir / "results" / "data"
+    assert open_result(str(base / "a" / "x")).row_count == 1
+    assert open_result(str(base / "b" / "x")).row_count == 2
+    assert not (base / "c").exists()
+
+
+def test_worker_failure_is_reported_as_failed_file(workdir, monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    from src.logic import folder_batch
+
+    def crash(path, params, output_dir=None):
+        raise BrokenProcessPool("worker died")
+
+    monkeypatch.setattr(folder_batch, "process_file", crash)
+    results = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        progress = run_folder_batch(
+            [("a.xlsx", 10)],
+            executor=executor,
+            on_result=lambda result, _: results.append(result),
+        )
+    assert progress.failed == 1
+    assert results == [{"path": "a.xlsx", "ok": False, "error": "worker died", "elapsed": 0.0}]
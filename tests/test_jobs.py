@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""JobExecutor の同時実行数の上限・キャンセル・終了処理"""
+
+import threading
+
+import pytest
+
+from src.logic.engine import PipelineCancelled
+from src.logic.jobs import CANCELLED, DONE, FAILED, JobExecutor
+
+TIMEOUT = 5.0
+
+
+@pytest.fixture
+def executor():
+    executor = JobExecutor(max_workers=3, limits={"pipeline1": 1})
+    yield executor
+    executor.shutdown(wait=True, cancel_pending=True, timeout=TIMEOUT)
+
+
+def wait_for_cancel(job):
+    """キャンセルされるまで待ってから中止する（長い処理の代わり）"""
+    job.cancel_event.wait(TIMEOUT)
+    raise PipelineCancelled()
+
+
+def test_result_and_failure_status(executor):
+    ok = executor.submit(lambda job: 42, key="a")
+    failed = executor.submit(lambda job: 1 / 0, key="b")
+    assert ok.wait(TIMEOUT) and failed.wait(TIMEOUT)
+    assert (ok.status, ok.result) == (DONE, 42)
+    assert failed.status == FAILED
+    assert isinstance(failed.error, ZeroDivisionError)
+
+
+def test_limit_per_key_queues_second_job(executor):
+    release = threading.Event()
+    first_started = threading.Event()
+    started = []
+
+    def run(job):
+        started.append(job.name)
+        first_started.set()
+        release.wait(TIMEOUT)
+
+    first = executor.submit(run, key="pipeline1", name="first")
+    second = executor.submit(run, key="pipeline1", name="second")
+    other = executor.submit(lambda job: started.append("other"), key="pipeline2")
+    assert first_started.wait(TIMEOUT) and other.wait(TIMEOUT)
+
+    # pipeline1は同時に1つまで（ワーカーに空きがあっても2つ目は待機）
+    assert executor.queued_count("pipeline1") == 1
+    assert "second" not in started
+    release.set()
+    assert first.wait(TIMEOUT) and second.wait(TIMEOUT)
+    assert started.index("first") < started.index("second")
+
+
+def test_cancel_running_and_queued_jobs(executor):
+    running = executor.submit(wait_for_cancel, key="pipeline1")
+    queued = executor.submit(lambda job: "never", key="pipeline1")
+
+    assert executor.cancel("pipeline1") == 2
+    assert running.wait(TIMEOUT) and queued.wait(TIMEOUT)
+    assert running.status == CANCELLED
+    assert queued.status == CANCELLED
+    assert queued.result is None
+    assert executor.active_jobs() == []
+
+
+def test_shutdown_cancels_and_rejects_new_jobs():
+    executor = JobExecutor(max_workers=1)
+    running = executor.submit(wait_for_cancel, key="a")
+    executor.shutdown(wait=True, cancel_pending=True, timeout=TIMEOUT)
+
+    assert running.status == CANCELLED
+    with pytest.raises(RuntimeError):
+        executor.submit(lambda job: None, key="a")
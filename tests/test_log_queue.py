@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""BoundedLogQueue のオーバーフロー時の動作"""
+
+import datetime
+import queue
+
+import pytest
+
+from src.gui.log_queue import BoundedLogQueue, CallSiteRateLimiter
+from src.gui.log_record import LogRecord
+
+
+def make_record(message, level_no=20, level_name="INFO"):
+    return LogRecord(datetime.datetime.now(), level_no, level_name, "test", message, ("test", 1))
+
+
+def drain(log_queue):
+    messages = []
+    while True:
+        try:
+            messages.append(log_queue.get_nowait().message)
+        except queue.Empty:
+            return messages
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        BoundedLogQueue(policy="unknown")
+
+
+def test_drop_oldest_keeps_newest_and_reports_drops():
+    log_queue = BoundedLogQueue(maxsize=3, policy="drop_oldest")
+    for i in range(5):
+        log_queue.put(make_record(f"m{i}"))
+
+    messages = drain(log_queue)
+    assert "2 件のメッセージを破棄しました" in messages[0]
+    assert messages[1:] == ["m2", "m3", "m4"]
+    assert log_queue.stats["dropped"] == 2
+    assert log_queue.stats["max_depth"] == 3
+
+
+def test_drop_debug_prefers_debug_records():
+    log_queue = BoundedLogQueue(maxsize=3, policy="drop_debug")
+    log_queue.put(make_record("info1"))
+    log_queue.put(make_record("debug1", 10, "DEBUG"))
+    log_queue.put(make_record("info2"))
+    # 満杯: 新しいINFOは古いDEBUGを押し出す
+    log_queue.put(make_record("info3"))
+    # 満杯でDEBUGがない: 新しいDEBUGは追加されない
+    log_queue.put(make_record("debug2", 10, "DEBUG"))
+
+    messages = drain(log_queue)
+    assert messages[1:] == ["info1", "info2", "info3"]
+    assert log_queue.stats["dropped"] == 2
+
+
+def test_collapse_folds_consecutive_duplicates():
+    log_queue = BoundedLogQueue(maxsize=10, policy="collapse")
+    for _ in range(4):
+        log_queue.put(make_record("same"))
+    log_queue.put(make_record("other"))
+
+    assert drain(log_queue) == ["same", "同様のメッセージ 3 件を抑制しました", "other"]
+    assert log_queue.stats["collapsed"] == 3
+    assert log_queue.empty()
+
+
+def test_rate_limiter_only_limits_debug():
+    limiter = CallSiteRateLimiter(max_per_second=2)
+    site = ("module", 10)
+    assert [limiter.allow(site, 10) for _ in range(4)] == [True, True, False, False]
+    assert limiter.allow(site, 20)
+    assert limiter.take_suppressed() == 2
+    assert limiter.take_suppressed() == 0
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""LogRingBuffer の容量・取り出し・クリア"""
+
+import datetime
+
+from src.gui.log_record import LogRecord
+from src.gui.log_view import LogRingBuffer
+
+
+def make_record(i, level_name="INFO"):
+    moment = datetime.datetime(2024, 1, 1, 12, 34, 56)
+    return LogRecord(moment, 20, level_name, "test", f"メッセージ{i}")
+
+
+def messages(buffer, first=0, count=None):
+    count = len(buffer) if count is None else count
+    return [line.rsplit(" | ", 1)[-1] for line, _ in buffer.get_range(first, count)]
+
+
+def test_lines_match_record_format():
+    buffer = LogRingBuffer(capacity=10)
+    record = make_record(1, "WARNING")
+    buffer.append(record)
+    buffer.append("plain text")
+    assert buffer.get_range(0, 2) == [(record.format(), "WARNING"), ("plain text", None)]
+
+
+def test_capacity_drops_oldest_across_blocks(monkeypatch):
+    monkeypatch.setattr(LogRingBuffer, "BLOCK_LINES", 4)
+    buffer = LogRingBuffer(capacity=10)
+    buffer.extend(make_record(i) for i in range(25))
+
+    assert len(buffer) == 10
+    assert buffer.total_appended == 25
+    assert buffer.first_index == 15
+    assert messages(buffer) == [f"メッセージ{i}" for i in range(15, 25)]
+    # ブロックの境界をまたぐ範囲
+    assert messages(buffer, 2, 5) == [f"メッセージ{i}" for i in range(17, 22)]
+
+
+def test_get_range_is_clamped():
+    buffer = LogRingBuffer(capacity=5)
+    buffer.extend(str(i) for i in range(3))
+    assert [line for line, _ in buffer.get_range(1, 100)] == ["1", "2"]
+    assert buffer.get_range(10, 5) == []
+
+
+def test_clear_resets_counters():
+    buffer = LogRingBuffer(capacity=5)
+    buffer.extend(make_record(i) for i in range(8))
+    buffer.clear()
+
+    assert len(buffer) == 0
+    assert buffer.total_appended == 0
+    assert buffer.first_index == 0
+    buffer.append(make_record(99))
+    assert messages(buffer) == ["メッセージ99"]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""RunProfilerのスレッドの計測"""
+
+import os
+import sys
+import threading
+
+from src.logic.profiling import RunProfiler
+
+
+def _busy_function():
+    return sum(i * i for i in range(2000))
+
+
+def _function_names(profiler):
+    return {function for (_, _, function) in profiler.stats.stats}
+
+
+def test_threads_started_in_section_are_profiled(tmp_path):
+    with RunProfiler("test", log_dir=str(tmp_path)) as profiler:
+        thread = threading.Thread(target=_busy_function)
+        thread.start()
+        thread.join()
+    assert "_busy_function" in _function_names(profiler)
+    assert profiler.unfinished_threads == 0
+    assert os.path.exists(profiler.pstats_path)
+
+
+def test_thread_profiler_stops_with_its_target(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+
+    def worker():
+        started.set()
+        release.wait(5)
+
+    with RunProfiler("test", log_dir=str(tmp_path)) as profiler:
+        thread = threading.Thread(target=worker)
+        thread.start()
+        started.wait(5)
+    # 区間の終了時にまだ動いていたスレッドは集計に含めない
+    assert profiler.unfinished_threads == (1 if sys.version_info < (3, 12) else 0)
+    release.set()
+    thread.join()
+    assert profiler._running == 0
+    assert len(profiler._profiles) == 1
+
+    # 区間の外で開始したスレッドは計測しない
+    after = {}
+    thread = threading.Thread(target=lambda: after.setdefault("profile", sys.getprofile()))
+    thread.start()
+    thread.join()
+    assert after["profile"] is None
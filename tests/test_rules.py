@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""rules.to_array / validate_batch とパイプライン1の検証・保存"""
+
+import numpy as np
+import pytest
+
+from conftest import write_workbook
+from src.logic import rules
+from src.logic.columnar_store import open_result
+
+
+def test_to_array_uses_float_only_for_numbers():
+    numbers = rules.to_array([1, 2.5, None])
+    assert numbers.dtype == np.float64
+    assert np.isnan(numbers[2])
+
+    # 数字の文字列やboolは数値に変換しない
+    for values in (["00123", "42"], [True, False], [1, "a", None]):
+        array = rules.to_array(values)
+        assert array.dtype == object
+        assert list(array) == values
+
+
+def test_validate_batch_masks_and_counts():
+    batch = rules.to_batch({"id": ["00123", "x", None], "value": [1.0, None, 3.0]})
+    specs = [
+        {"rule": "not_null", "column": "id"},
+        {"rule": "numeric", "column": "id"},
+        {"rule": "range", "column": "value", "min": 0, "max": 2},
+    ]
+    mask, failures = rules.validate_batch(batch, specs)
+    assert mask.tolist() == [False, False, False]
+    assert failures == {"not_null(id)": 1, "numeric(id)": 2, "range(value)": 2}
+
+    with pytest.raises(ValueError):
+        rules.validate_batch(batch, [{"rule": "unknown"}])
+
+
+def test_string_column_fails_numeric_and_round_trips(fast_pipeline, workdir):
+    path = write_workbook(workdir / "ids.xlsx", [("00123", 1), ("00042", 2), ("7", 3)])
+
+    # 数字の文字列は numeric ルールに違反する
+    result = fast_pipeline.process_data(
+        input_path=path, validation_rules=[{"rule": "numeric", "column": "id"}]
+    )
+    assert result.values["saved"]["rows"] == 0
+
+    # 検証を通した文字列は先頭の0も含めてそのまま保存される
+    result = fast_pipeline.process_data(input_path=path)
+    saved = open_result(result.values["saved"]["path"])
+    assert saved.row_count == 3
+    assert list(saved["id"].to_array()) == ["00123", "00042", "7"]
+    assert saved["value"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_transformed_batches_collect_counts_and_times():
+    class Source:
+        def chunks(self):
+            yield {"value": [1, None, 3]}
+            yield {"value": [None, 5]}
+
+    batches = rules.TransformedBatches(
+        Source(), [{"rule": "not_null", "column": "value"}], [{"rule": "scale", "column": "value", "factor": 2}]
+    )
+    values = [list(batch["value"]) for batch in batches]
+    assert values == [[2.0, 6.0], [10.0]]
+    assert (batches.total_rows, batches.valid_rows) == (5, 3)
+    assert batches.failures == {"not_null(value)": 2}
+    assert set(batches.seconds) == {"read", "validate", "transform"}
+    assert all(seconds >= 0 for seconds in batches.seconds.values())
+
+    # 読み直すと0から数え直す
+    list(batches)
+    assert batches.total_rows == 5
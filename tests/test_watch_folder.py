@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""FolderWatcherのデバウンス（2回続けて変化しなかったファイルだけを処理する）"""
+
+from src.logic.watch_folder import FolderWatcher
+
+
+def _watcher(tmp_path):
+    folder = tmp_path / "in"
+    folder.mkdir()
+    watcher = FolderWatcher(
+        str(folder), settle_seconds=0, manifest_path=str(tmp_path / "manifest.json")
+    )
+    return folder, watcher
+
+
+def test_first_poll_does_not_treat_files_as_settled(tmp_path):
+    folder, watcher = _watcher(tmp_path)
+    (folder / "a.xlsx").write_bytes(b"data")
+
+    assert watcher.poll() == ([], 1)
+    ready, unsettled = watcher.poll()
+    assert ready == [(str(folder / "a.xlsx"), 4)] and unsettled == 0
+
+
+def test_file_added_after_empty_scan_waits_one_poll(tmp_path):
+    folder, watcher = _watcher(tmp_path)
+    assert watcher.poll() == ([], 0)
+
+    path = folder / "a.xlsx"
+    path.write_bytes(b"part")
+    assert watcher.poll() == ([], 1)
+    # 書き込みが続いている（サイズが変わった）間は処理しない
+    with open(path, "ab") as f:
+        f.write(b"-more")
+    assert watcher.poll() == ([], 1)
+    assert watcher.poll()[0] == [(str(path), 9)]
+
+
+def test_observe_counts_changed_files_and_primes_next_poll(tmp_path):
+    folder, watcher = _watcher(tmp_path)
+    (folder / "a.xlsx").write_bytes(b"data")
+    (folder / "b.txt").write_bytes(b"ignored")
+
+    assert watcher.observe() == 1
+    ready, _ = watcher.poll()
+    assert ready == [(str(folder / "a.xlsx"), 4)]
+
+    # 処理済みとして記録したファイルは次から対象外
+    watcher.mark_processed(ready[0][0])
+    assert watcher.observe() == 0
+    assert watcher.poll() == ([], 0)
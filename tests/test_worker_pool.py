@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""WorkerPoolの入れ替え（ヘルスチェックは実行件数に含めない）と失敗した実行"""
+
+import pickle
+import time
+
+import pytest
+from loguru import logger
+
+from conftest import write_workbook
+from src.logic.engine import StepError
+from src.logic.worker_pool import WorkerPool
+
+
+def _wait_until(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_recycles_after_runs_not_health_checks(workdir):
+    path = write_workbook(workdir / "data.xlsx", [(1, 1.0)])
+    pool = WorkerPool(size=1, recycle_after=2, health_interval=0.05, bound_logger=logger)
+    pool.start()
+    try:
+        kwargs = {"window_id": "test", "input_path": path}
+        first = pool.run("pipeline1", kwargs, logger)
+        # ヘルスチェックが何回行われてもプロセスは入れ替わらない
+        time.sleep(0.5)
+        second = pool.run("pipeline1", kwargs, logger)
+        assert second["pid"] == first["pid"]
+
+        # 2件実行したので入れ替わる
+        _wait_until(lambda: pool.stats["recycles"] == 1)
+        third = pool.run("pipeline1", kwargs, logger)
+        assert third["pid"] != first["pid"]
+        assert pool.stats["runs"] == 3 and pool.stats["rebuilds"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_failed_run_keeps_error_and_pool(workdir):
+    (workdir / "broken.xlsx").write_bytes(b"not an xlsx file")
+    path = write_workbook(workdir / "data.xlsx", [(1, 1.0)])
+    pool = WorkerPool(size=1, health_interval=60, bound_logger=logger)
+    pool.start()
+    try:
+        with pytest.raises(StepError) as e:
+            pool.run("pipeline1", {"window_id": "test", "input_path": "broken.xlsx"}, logger)
+        assert e.value.step_name == "ステップ1: データ読み込み"
+        assert "データ読み込み" in str(e.value)
+
+        # 失敗してもプールは作り直さずにそのまま使える
+        assert pool.ready and pool.stats["rebuilds"] == 0
+        assert pool.run("pipeline1", {"window_id": "test", "input_path": path}, logger)["rows"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_step_error_round_trips_through_pickle():
+    error = pickle.loads(pickle.dumps(StepError("ステップ1", ValueError("bad"))))
+    assert error.step_name == "ステップ1"
+    assert str(error) == "ステップ1: bad"